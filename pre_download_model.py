@@ -1,10 +1,116 @@
 # pre_download_model.py
-from faster_whisper import WhisperModel
+"""
+Download every configured Whisper model into models/ and record it in the
+local model registry (models/registry.json) with file sizes, checksums and
+load times. The app then loads models by path, with no hub lookups.
 
-print("Downloading large-v3 model... this may take 3-5 minutes.")
-print("This only happens once - the model is cached locally.")
+    python pre_download_model.py                        # models from config/settings.yaml
+    python pre_download_model.py --model large-v3 --compute-type float16
+    python pre_download_model.py --verify               # re-check checksums
+    python pre_download_model.py --list
+"""
 
-model = WhisperModel("large-v3", device="cpu", compute_type="int8")
+import argparse
+import sys
+import time
+from pathlib import Path
 
-print("✓ Model downloaded and cached!")
-print("You can now proceed to audio testing.")
+from src.engine import load_settings
+from src.model_registry import DEFAULT_MODELS_DIR, DEFAULT_REGISTRY, ModelRegistry, ModelNotAvailable
+
+SETTINGS_PATH = Path(__file__).resolve().parent / "config" / "settings.yaml"
+
+
+def configured_models(settings):
+    """{model name: set of compute types} used by settings.yaml (including per-app profiles)."""
+    whisper = settings.get("whisper", {})
+    compute_type = whisper.get("compute_type", "int8")
+    wanted = {whisper.get("model", "large-v3"): {compute_type}}
+    for profile in (settings.get("profiles") or {}).values():
+        if profile.get("model"):
+            wanted.setdefault(profile["model"], set()).add(compute_type)
+    return wanted
+
+
+def fetch(registry, name, models_dir, force=False):
+    """Download a model (unless already registered and intact) and register it."""
+    if name in registry.models and not force and not registry.check(name):
+        print(f"✓ {name} already registered ({registry.models[name]['size_bytes'] / 1e6:.0f} MB)")
+        return
+    from faster_whisper.utils import download_model
+
+    print(f"⬇️  Downloading {name}... (large models can take several minutes)")
+    t0 = time.time()
+    directory = download_model(name, output_dir=str(Path(models_dir) / name))
+    entry = registry.register(name, directory, source=name)
+    print(f"✓ {name}: {entry['size_bytes'] / 1e6:.0f} MB in {time.time() - t0:.0f}s → {directory}")
+
+
+def test_load(registry, name, compute_type, device):
+    """Load the model by path once to prove it works and record the load time."""
+    from faster_whisper import WhisperModel
+
+    path = registry.resolve(name)
+    t0 = time.time()
+    WhisperModel(path, device=device, compute_type=compute_type, local_files_only=True)
+    load_time = time.time() - t0
+    registry.record_load(name, compute_type, load_time)
+    print(f"✓ {name} ({compute_type}) loads in {load_time:.2f}s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Fill the local Whisper model registry")
+    parser.add_argument("--model", action="append", default=[], help="Extra model to fetch (repeatable)")
+    parser.add_argument("--compute-type", action="append", default=[], help="Extra compute type to test-load (repeatable)")
+    parser.add_argument("--models-dir", default=str(DEFAULT_MODELS_DIR), help="Where model directories go")
+    parser.add_argument("--registry", default=None, help="Registry file (default: whisper.registry or models/registry.json)")
+    parser.add_argument("--force", action="store_true", help="Re-download even if registered and intact")
+    parser.add_argument("--no-load", action="store_true", help="Skip the test load")
+    parser.add_argument("--verify", action="store_true", help="Check checksums of every registered model and exit")
+    parser.add_argument("--list", action="store_true", help="Show the registry and exit")
+    args = parser.parse_args()
+
+    settings = load_settings(str(SETTINGS_PATH))
+    whisper = settings.get("whisper", {})
+    registry = ModelRegistry(args.registry or whisper.get("registry") or DEFAULT_REGISTRY)
+
+    if args.list:
+        for name, entry in sorted(registry.models.items()):
+            loads = ", ".join(f"{ct} {t:.2f}s" for ct, t in entry.get("load_times", {}).items())
+            print(f"{name:<20} {entry['size_bytes'] / 1e6:>7.0f} MB  {entry['path']}  {loads}")
+        return 0
+
+    if args.verify:
+        failed = 0
+        for name in sorted(registry.models):
+            problems = registry.check(name, full_check=True)
+            if problems:
+                failed += 1
+                print(f"✗ {name}: {'; '.join(problems)}")
+            else:
+                print(f"✓ {name}")
+        return 1 if failed else 0
+
+    wanted = configured_models(settings)
+    for name in args.model:
+        wanted.setdefault(name, set())
+    for compute_types in wanted.values():
+        compute_types.update(args.compute_type)
+
+    failed = 0
+    for name, compute_types in wanted.items():
+        try:
+            fetch(registry, name, args.models_dir, force=args.force)
+            if not args.no_load:
+                for compute_type in sorted(compute_types or {"int8"}):
+                    test_load(registry, name, compute_type, whisper.get("device", "cpu"))
+        except (ModelNotAvailable, OSError, ValueError) as e:
+            failed += 1
+            print(f"✗ {name}: {e}")
+
+    print(f"\nRegistry: {registry.path}")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
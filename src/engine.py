@@ -1,7 +1,17 @@
-from faster_whisper import WhisperModel
+import contextlib
+import ctypes
+import ctypes.util
+import gc
+import threading
 import time
+from collections import OrderedDict
+
 import yaml
 
+from src.feature_cache import CachingFeatureExtractor, open_feature_cache
+from src.metrics import resident_memory_bytes
+from src.model_registry import DEFAULT_REGISTRY, ModelRegistry
+
 def load_settings(path="config/settings.yaml"):
     """Load settings with safe defaults."""
     try:
@@ -28,12 +38,111 @@ def load_vocab(path="config/vocab.yaml"):
         print(f"Warning: Could not load {path}: {e}")
         return []  # Empty list is safe default
 
+def release_freed_memory():
+    """Collect garbage and hand freed heap pages back to the OS (best effort)."""
+    gc.collect()
+    try:
+        libc = ctypes.CDLL(ctypes.util.find_library("c"))
+    except OSError:
+        return
+    if hasattr(libc, "malloc_trim"):                    # glibc
+        libc.malloc_trim(0)
+    elif hasattr(libc, "malloc_zone_pressure_relief"):  # macOS libmalloc
+        libc.malloc_zone_pressure_relief(None, 0)
+
+class ModelCache:
+    """
+    LRU cache of loaded models bounded by an estimated memory budget.
+
+    The most recently inserted model is never evicted, so a single model
+    larger than the budget still loads.
+    """
+
+    def __init__(self, budget_bytes=None):
+        self.budget_bytes = budget_bytes
+        self._models = OrderedDict()    # name -> (model, resident bytes)
+        self.evictions = 0
+
+    def __contains__(self, name):
+        return name in self._models
+
+    def __len__(self):
+        return len(self._models)
+
+    def names(self):
+        return list(self._models)
+
+    @property
+    def total_bytes(self):
+        return sum(size for _, size in self._models.values())
+
+    def get(self, name):
+        """Return a model and mark it most recently used (None if not resident)."""
+        entry = self._models.get(name)
+        if entry is None:
+            return None
+        self._models.move_to_end(name)
+        return entry[0]
+
+    def make_room(self, size, keep=()):
+        """Evict least recently used models until size more bytes fit. Returns evicted names."""
+        evicted = []
+        if self.budget_bytes is None:
+            return evicted
+        for name in list(self._models):
+            if self.total_bytes + size <= self.budget_bytes:
+                break
+            if name in keep:
+                continue
+            del self._models[name]
+            self.evictions += 1
+            evicted.append(name)
+        return evicted
+
+    def put(self, name, model, size):
+        """Insert a model, evicting older ones to stay within budget. Returns evicted names."""
+        self._models.pop(name, None)
+        evicted = self.make_room(size)
+        self._models[name] = (model, size)
+        return evicted
+
+    def clear(self):
+        self._models.clear()
+
+
 class WhisperEngine:
-    def __init__(self, config=None, model=None):
-        """Initialize Whisper model from config or use provided model."""
+    def __init__(self, config=None, model=None, thread_scope=None):
+        """
+        Initialize Whisper model from config or use provided model.
+
+        thread_scope, if given, is a context manager factory wrapped around
+        every model load (CpuGuard.spawning, to claim the threads the load
+        starts).
+        """
+        self._lock = threading.Lock()
+        self.thread_scope = thread_scope or contextlib.nullcontext
+        self._loaders = {}                  # name -> background load thread
+        self.load_errors = {}
+        self.fallback = None                # Smaller model kept resident while idle
+        self.fallback_after = 1.0
+        self.on_reload = None               # Called with the reload time in seconds
+        self.registry = None
+        self.offline = False
+        self.device = "cpu"
+        self.compute_type = "int8"
+        self.cpu_threads = 0
+        self.num_workers = 1
+        self.backend = "faster_whisper"
+        self.stub_options = {}
+        self.feature_cache = None           # Log-mel features on disk (feature_cache.enabled)
+
         if model is not None:
             # Use provided model (for testing/performance)
-            self.model = model
+            self.model_name = "provided"
+            self.cache = ModelCache()
+            self.cache.put(self.model_name, model, 0)
+            self.load_time = 0.0
+            self.reloadable = False
             print("Using provided model instance")
         else:
             # Load model from config
@@ -41,21 +150,202 @@ class WhisperEngine:
                 config = load_settings()
 
             whisper_config = config.get("whisper", {})
-            model_size = whisper_config.get("model", "large-v3")
-            device = whisper_config.get("device", "cpu")
-            compute_type = whisper_config.get("compute_type", "int8")
-
-            print(f"Loading {model_size} model (device={device}, compute={compute_type})...")
-            self.model = WhisperModel(
-                model_size,
-                device=device,
-                compute_type=compute_type
+            self.model_name = whisper_config.get("model", "large-v3")
+            self.device = whisper_config.get("device", "cpu")
+            self.compute_type = whisper_config.get("compute_type", "int8")
+            self.cpu_threads = whisper_config.get("cpu_threads", 0)  # 0 = CTranslate2 default
+            self.num_workers = whisper_config.get("num_workers", 1)  # Concurrent transcribe() calls
+            # "stub" swaps in a deterministic fake model (no weights needed)
+            self.backend = whisper_config.get("backend", "faster_whisper")
+            self.stub_options = whisper_config.get("stub", {}) or {}
+            self.feature_cache = open_feature_cache(config)
+
+            # Loaded models (the default one plus per-app profile models)
+            budget_mb = config.get("model_cache", {}).get("memory_budget_mb")
+            self.cache = ModelCache(budget_mb * 1024 * 1024 if budget_mb else None)
+
+            # Offline (default): load by direct path from the local model
+            # registry, never touching the hub; fail fast if it's missing
+            self.offline = whisper_config.get("offline", True)
+            if self.offline and self.backend != "stub":
+                self.registry = ModelRegistry(whisper_config.get("registry") or DEFAULT_REGISTRY)
+                self.registry.resolve(self.model_name)
+
+            print(f"Loading {self.model_name} model (device={self.device}, compute={self.compute_type})...")
+            model, self.load_time, size = self._open(self.model_name)
+            self.cache.put(self.model_name, model, size)
+            self.reloadable = True
+            print(f"Model loaded! ({self.load_time:.2f}s)")
+
+    @property
+    def model(self):
+        """The default model (None while released)."""
+        return self.cache.get(self.model_name)
+
+    def _expected_size(self, name):
+        """Resident bytes a model took last time (or its size on disk)."""
+        if self.registry is None or name not in self.registry.models:
+            return 0
+        entry = self.registry.models[name]
+        return entry.get("resident_bytes", {}).get(self.compute_type, entry["size_bytes"])
+
+    def _open(self, name):
+        """Load a model by name (via the registry when offline). Returns (model, seconds, resident bytes)."""
+        model_path = self.registry.resolve(name) if self.registry is not None else name
+        rss_before = resident_memory_bytes()
+        load_start = time.time()
+        if self.backend == "stub":
+            from src.stub_model import StubWhisperModel as WhisperModel
+        else:
+            # Imported here: faster_whisper pulls in ctranslate2, av and
+            # tokenizers, which dominate import time
+            from faster_whisper import WhisperModel
+        with self.thread_scope():
+            model = WhisperModel(
+                model_path,
+                device=self.device,
+                compute_type=self.compute_type,
+                cpu_threads=self.cpu_threads,
+                num_workers=self.num_workers,
+                local_files_only=self.offline,
+                **(self.stub_options if self.backend == "stub" else {})
             )
-            print("Model loaded!")
+        if self.feature_cache is not None and hasattr(model, "feature_extractor"):
+            # transcribe() calls model.feature_extractor on the audio left after VAD
+            model.feature_extractor = CachingFeatureExtractor(model.feature_extractor, self.feature_cache)
+        load_time = time.time() - load_start
+        rss_after = resident_memory_bytes()
+        # RSS growth is the best estimate of what the model costs to keep;
+        # fall back to the size on disk when it can't be measured
+        size = rss_after - rss_before if rss_before and rss_after and rss_after > rss_before else 0
+        size = size or self._expected_size(name)
+        if self.registry is not None:
+            self.registry.record_load(name, self.compute_type, load_time, resident_bytes=size)
+        return model, load_time, size
+
+    @property
+    def is_loaded(self):
+        return self.model_name in self.cache
+
+    def resident_models(self):
+        """Names of the models currently loaded."""
+        return self.cache.names()
+
+    def unload(self, fallback_model=None):
+        """
+        Release every cached model to free memory, optionally keeping a
+        smaller fallback model resident. Returns False if there was nothing
+        to release.
+        """
+        with self._lock:
+            if not self.reloadable or not len(self.cache):
+                return False
+            self.cache.clear()
+        release_freed_memory()
+        if fallback_model and self.fallback is None:
+            try:
+                self.fallback, _, _ = self._open(fallback_model)
+            except Exception as e:
+                print(f"⚠ Could not load fallback model {fallback_model}: {e}")
+        return True
+
+    def load_async(self, name=None):
+        """Start loading a model (default: the main one) in the background if it isn't resident."""
+        name = name or self.model_name
+        with self._lock:
+            loader = self._loaders.get(name)
+            if name in self.cache or (loader and loader.is_alive()) or not self.reloadable:
+                return False
+            self.load_errors.pop(name, None)
+            loader = threading.Thread(target=self._load, args=(name,), name=f"model-load-{name}", daemon=True)
+            self._loaders[name] = loader
+            loader.start()
+        return True
+
+    def _load(self, name):
+        print(f"🔁 Loading {name}...")
+        with self._lock:
+            # Evict before loading so the peak stays within the budget
+            evicted = self.cache.make_room(self._expected_size(name), keep=(name,))
+        if evicted:
+            release_freed_memory()
+            print(f"♻️  Evicted {', '.join(evicted)} to stay within the model memory budget")
+        try:
+            model, load_time, size = self._open(name)
+        except Exception as e:
+            self.load_errors[name] = e
+            print(f"✗ Loading {name} failed: {e}")
+            return
+        with self._lock:
+            evicted = self.cache.put(name, model, size)
+            if name == self.model_name:
+                self.load_time = load_time
+                # The main model is back; the fallback is no longer needed
+                self.fallback = None
+        if evicted:
+            print(f"♻️  Evicted {', '.join(evicted)} to stay within the model memory budget")
+        print(f"✓ {name} loaded ({load_time:.2f}s)")
+        if self.on_reload:
+            self.on_reload(load_time)
+
+    def _resident_model(self, name=None, cancel_token=None, trace=None):
+        """
+        The model to decode with, waiting for a load in progress (for the
+        main model, at most fallback_after seconds if a fallback is resident).
+        """
+        name = name or self.model_name
+        model = self.cache.get(name)
+        if model is not None:
+            return model
+        self.load_async(name)
+        loader = self._loaders.get(name)
+        wait_start = time.monotonic()
+        try:
+            while True:
+                model = self.cache.get(name)
+                if model is not None:
+                    break
+                if cancel_token is not None:
+                    cancel_token.raise_if_cancelled()
+                if (name == self.model_name and self.fallback is not None
+                        and time.monotonic() - wait_start >= self.fallback_after):
+                    print("⚡ Main model still loading, using the fallback model")
+                    return self.fallback
+                if loader is None or not loader.is_alive():
+                    model = self.cache.get(name)
+                    if model is None:
+                        raise RuntimeError(f"Loading {name} failed: {self.load_errors.get(name)}")
+                    break
+                loader.join(0.05)
+        finally:
+            waited = time.monotonic() - wait_start
+            if trace is not None:
+                trace.span("engine.reload_wait", wait_start, wait_start + waited, model=name)
+        # The load outlasted the recording (it should fit inside an utterance)
+        print(f"⏳ Waited {waited:.2f}s for {name} to load")
+        return model
+
+    def transcribe(self, audio_path, language="en", custom_vocab=None, beam_size=5,
+                   cancel_token=None, trace=None, model_name=None):
+        """
+        Transcribe audio file with optional vocab injection.
+
+        If cancel_token is given, it is checked before decoding and between
+        decoded segments; cancellation raises TranscriptionCancelled and
+        abandons the lazy segment generator so decoding stops.
+
+        If trace is given (a DictationTrace), engine.prepare (audio decode,
+        VAD, features) and engine.decode (segment generation) spans are recorded.
 
-    def transcribe(self, audio_path, language="en", custom_vocab=None, beam_size=5):
-        """Transcribe audio file with optional vocab injection."""
+        model_name picks a cached model (default: whisper.model). If it isn't
+        resident (a per-app profile model, or released while idle), this waits
+        for its background load (recorded as an engine.reload_wait span).
+        """
         start_time = time.time()
+        if cancel_token is not None:
+            cancel_token.raise_if_cancelled()
+        model = self._resident_model(model_name, cancel_token, trace)
+        prepare_start = time.monotonic()
 
         # Build initial_prompt if vocab provided
         # NOTE: initial_prompt was causing truncated transcriptions!
@@ -64,7 +354,7 @@ class WhisperEngine:
         # if custom_vocab:
         #     initial_prompt = "Key terms: " + ", ".join(custom_vocab) + "."
 
-        segments, info = self.model.transcribe(
+        segments, info = model.transcribe(
             audio_path,
             language=language,
             # initial_prompt disabled - was breaking transcription
@@ -75,9 +365,21 @@ class WhisperEngine:
             vad_filter=True,
             vad_parameters=dict(min_silence_duration_ms=500)
         )
+        decode_start = time.monotonic()
+        if trace is not None:
+            trace.span("engine.prepare", prepare_start, decode_start)
 
-        # Collect all segments
-        text = " ".join([seg.text for seg in segments])
+        # Collect all segments (faster-whisper decodes lazily as we iterate)
+        texts = []
+        try:
+            for seg in segments:
+                texts.append(seg.text)
+                if cancel_token is not None:
+                    cancel_token.raise_if_cancelled()
+        finally:
+            if trace is not None:
+                trace.span("engine.decode", decode_start, time.monotonic(), segments=len(texts))
+        text = " ".join(texts)
 
         elapsed = time.time() - start_time
 
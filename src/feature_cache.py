@@ -0,0 +1,258 @@
+"""
+On-disk cache of log-mel features, for repeated runs over the same corpus.
+
+faster-whisper's WhisperModel.transcribe decodes the audio, applies the VAD,
+then calls model.feature_extractor(waveform) and hands the log-mel
+spectrogram to the encoder. CachingFeatureExtractor replaces that
+extractor: it hashes the waveform it is given (after VAD, so the key
+covers exactly what would be computed) together with the extractor's
+parameters. A hit returns the stored .npy memory-mapped copy-on-write
+(pages are read lazily and never written back), and the encoder gets it
+without the STFT and mel projection being recomputed. A miss computes
+the features, stores them and returns them.
+
+Entries are files under dir/<2 hex>/<key>.npy, written atomically (safe
+with several worker processes sharing the directory). A hit touches the
+file's mtime. When the cache grows past max_bytes, the least recently
+used entries are deleted, down to EVICT_TO of the budget. Stale entries
+(from changed parameters, or audio that's gone from the corpus) are
+never hit again, so they age out this way. Time saved is estimated from
+the compute cost per frame measured on misses, which is kept in
+cost.json so runs that only hit can still report it.
+
+Opt-in via settings (feature_cache.enabled) or --feature-cache in
+test_runner.py and tests/benchmark_matrix.py.
+"""
+
+import hashlib
+import json
+import os
+import threading
+import time
+from pathlib import Path
+
+from src.metrics import REGISTRY
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+DEFAULT_DIR = PROJECT_ROOT / "cache" / "features"
+EVICT_TO = 0.8
+# Extractor attributes that change the features (faster_whisper.FeatureExtractor names)
+PARAMETERS = ("sampling_rate", "n_fft", "hop_length", "chunk_length", "n_samples", "nb_max_frames")
+
+
+def feature_cache_settings(settings):
+    """feature_cache settings with defaults filled in."""
+    conf = dict(settings.get("feature_cache", {}) or {})
+    conf.setdefault("enabled", False)
+    conf.setdefault("dir", str(DEFAULT_DIR))
+    conf.setdefault("max_size_mb", 2048)
+    return conf
+
+
+def open_feature_cache(settings):
+    """FeatureCache for settings, or None when the cache isn't enabled."""
+    conf = feature_cache_settings(settings)
+    if not conf["enabled"]:
+        return None
+    directory = Path(conf["dir"])
+    if not directory.is_absolute():
+        directory = PROJECT_ROOT / directory
+    max_mb = conf["max_size_mb"]
+    return FeatureCache(directory, int(max_mb * 1024 * 1024) if max_mb else None)
+
+
+def extractor_fingerprint(extractor):
+    """Hash of an extractor's class and parameters (mel filterbank included)."""
+    h = hashlib.blake2b(digest_size=8)
+    h.update(f"{type(extractor).__module__}.{type(extractor).__qualname__}".encode())
+    for name in PARAMETERS:
+        h.update(f"{name}={getattr(extractor, name, None)!r};".encode())
+    filters = getattr(extractor, "mel_filters", None)
+    if filters is not None:
+        import numpy as np
+        h.update(np.ascontiguousarray(filters).tobytes())
+    return h.hexdigest()
+
+
+class FeatureCache:
+    """Directory of .npy feature files with size-based LRU eviction."""
+
+    def __init__(self, directory=DEFAULT_DIR, max_bytes=2048 * 1024 * 1024):
+        self.dir = Path(directory)
+        self.dir.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evicted = 0
+        self.compute_seconds = 0.0      # Spent computing features on misses
+        self.computed_frames = 0
+        self.load_seconds = 0.0         # Spent loading features on hits
+        self.hit_frames = 0
+        self.size = sum(p.stat().st_size for p in self.dir.glob("*/*.npy"))
+        self._cost_path = self.dir / "cost.json"
+        try:
+            self._cost = json.loads(self._cost_path.read_text())
+        except (OSError, ValueError):
+            self._cost = {"seconds": 0.0, "frames": 0}
+        self._metrics = {
+            "hits": REGISTRY.counter("stt_feature_cache_hits_total", "Log-mel features served from disk"),
+            "misses": REGISTRY.counter("stt_feature_cache_misses_total", "Log-mel features computed"),
+            "size": REGISTRY.gauge("stt_feature_cache_bytes", "Size of the feature cache on disk"),
+        }
+        self._metrics["size"].set(self.size)
+
+    def path(self, key):
+        return self.dir / key[:2] / f"{key}.npy"
+
+    def load(self, key):
+        """Cached features (copy-on-write memory map), or None."""
+        import numpy as np
+
+        path = self.path(key)
+        start = time.perf_counter()
+        try:
+            features = np.load(path, mmap_mode="c")
+            os.utime(path)
+        except (OSError, ValueError):
+            return None
+        with self._lock:
+            self.hits += 1
+            self.load_seconds += time.perf_counter() - start
+            self.hit_frames += features.shape[-1]
+        self._metrics["hits"].inc()
+        return features
+
+    def store(self, key, features, seconds):
+        """Save features computed in seconds (atomically); evict if over budget."""
+        import numpy as np
+
+        path = self.path(key)
+        path.parent.mkdir(exist_ok=True)
+        tmp = path.with_name(f"{path.stem}.{os.getpid()}.{threading.get_ident()}.tmp")
+        try:
+            with open(tmp, "wb") as f:
+                np.save(f, np.ascontiguousarray(features))
+            os.replace(tmp, path)
+            written = path.stat().st_size
+        except OSError as e:
+            print(f"⚠ Feature cache write failed: {e}")
+            tmp.unlink(missing_ok=True)
+            written = 0
+        with self._lock:
+            self.misses += 1
+            self.compute_seconds += seconds
+            self.computed_frames += features.shape[-1]
+            self._cost["seconds"] += seconds
+            self._cost["frames"] += features.shape[-1]
+            cost = json.dumps(self._cost)
+            self.size += written
+            over = self.max_bytes and self.size > self.max_bytes
+        try:
+            tmp = self._cost_path.with_name(f"cost.{os.getpid()}.{threading.get_ident()}.tmp")
+            tmp.write_text(cost)
+            os.replace(tmp, self._cost_path)
+        except OSError:
+            pass
+        self._metrics["misses"].inc()
+        if over:
+            self.evict()
+        self._metrics["size"].set(self.size)
+
+    def evict(self):
+        """Delete least recently used entries until under EVICT_TO of the budget."""
+        entries = []
+        for p in self.dir.glob("*/*.npy"):
+            try:
+                st = p.stat()
+            except OSError:
+                continue        # Evicted by another process
+            entries.append((st.st_mtime, st.st_size, p))
+        entries.sort()
+        total = sum(size for _, size, _ in entries)
+        target = self.max_bytes * EVICT_TO
+        removed = 0
+        for _, size, p in entries:
+            if total <= target:
+                break
+            try:
+                p.unlink()
+            except OSError:
+                continue
+            total -= size
+            removed += 1
+        with self._lock:
+            self.size = total
+            self.evicted += removed
+
+    def clear(self):
+        for p in self.dir.glob("*/*.npy"):
+            p.unlink(missing_ok=True)
+        with self._lock:
+            self.size = 0
+
+    def saved_seconds(self):
+        """Estimated compute time saved: hit frames at the measured cost per frame, minus load time."""
+        if not self._cost["frames"]:
+            return 0.0
+        return self.hit_frames * self._cost["seconds"] / self._cost["frames"] - self.load_seconds
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "compute_seconds": self.compute_seconds,
+            "load_seconds": self.load_seconds,
+            "saved_seconds": self.saved_seconds(),
+            "evicted": self.evicted,
+            "size_bytes": self.size,
+            "max_bytes": self.max_bytes,
+        }
+
+    def describe(self):
+        s = self.stats()
+        return (f"{s['hits']} hits / {s['misses']} misses ({s['hit_rate']:.0%}), "
+                f"~{s['saved_seconds']:.2f}s saved, {s['size_bytes'] / 1e6:.0f}/"
+                f"{s['max_bytes'] / 1e6:.0f} MB on disk"
+                + (f", {s['evicted']} evicted" if s['evicted'] else ""))
+
+
+class CachingFeatureExtractor:
+    """Drop-in for a model's feature_extractor that serves features from a FeatureCache."""
+
+    def __init__(self, extractor, cache):
+        self.extractor = extractor
+        self.cache = cache
+        self.fingerprint = extractor_fingerprint(extractor)
+
+    def __getattr__(self, name):
+        # sampling_rate, n_samples, time_per_frame, ... as the wrapped extractor
+        return getattr(self.extractor, name)
+
+    def key(self, waveform, args, kwargs):
+        import numpy as np
+
+        h = hashlib.blake2b(digest_size=16)
+        h.update(self.fingerprint.encode())
+        h.update(repr((args, sorted(kwargs.items()))).encode())
+        samples = np.ascontiguousarray(waveform)
+        h.update(f"{samples.dtype}{samples.shape}".encode())
+        h.update(memoryview(samples).cast("B"))
+        return h.hexdigest()
+
+    def __call__(self, waveform, *args, **kwargs):
+        import numpy as np
+
+        if not isinstance(waveform, np.ndarray):
+            # e.g. a torch tensor on a GPU extractor: nothing to gain from hashing it here
+            return self.extractor(waveform, *args, **kwargs)
+        key = self.key(waveform, args, kwargs)
+        features = self.cache.load(key)
+        if features is not None:
+            return features
+        start = time.perf_counter()
+        features = self.extractor(waveform, *args, **kwargs)
+        self.cache.store(key, features, time.perf_counter() - start)
+        return features
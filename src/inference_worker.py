@@ -0,0 +1,362 @@
+"""
+Whisper inference in a supervised child process.
+
+Decoding saturates the CPU and holds the GIL in stretches, which can delay
+the PortAudio callback, the hotkey listener and the menu bar UI. With
+`inference.isolated: true`, IsolatedEngine stands in for WhisperEngine and
+forwards work to a worker process that owns the model:
+
+- Audio goes over multiprocessing.shared_memory: the parent copies the
+  float32 samples into a shared block once and the worker decodes straight
+  from a view of it (nothing is pickled but a small header).
+- Requests and results travel over a Pipe as small dicts.
+- Engine spans recorded in the worker (time.monotonic is system-wide) are
+  replayed into the dictation's trace.
+- A reader thread notices the worker dying and restarts it with backoff;
+  the dictation in flight fails, the next one gets a fresh worker. The model
+  loads once per worker lifetime.
+"""
+
+import itertools
+import queue
+import signal
+import threading
+import time
+
+from src.job_queue import TranscriptionCancelled
+
+
+class _SpanRecorder:
+    """Collects engine spans in the worker so the parent can replay them."""
+
+    def __init__(self):
+        self.spans = []
+
+    def span(self, name, start, end, **args):
+        self.spans.append((name, start, end, args))
+
+
+class _EventToken:
+    """CancellationToken look-alike backed by a multiprocessing.Event."""
+
+    def __init__(self, event):
+        self.event = event
+
+    @property
+    def is_cancelled(self):
+        return self.event.is_set()
+
+    def raise_if_cancelled(self):
+        if self.event.is_set():
+            raise TranscriptionCancelled("cancelled")
+
+
+def _worker_main(conn, settings, cancel_event):
+    """Worker process entry point: load the model once, then serve requests."""
+    from multiprocessing import shared_memory
+
+    import numpy as np
+
+    from src.engine import WhisperEngine
+
+    # Ctrl+C reaches the whole process group; the parent decides when we stop
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+
+    try:
+        engine = WhisperEngine(config=settings)
+    except Exception as e:
+        conn.send({"type": "fatal", "error": f"{type(e).__name__}: {e}"})
+        return
+
+    # Background model loads report from their own thread
+    send_lock = threading.Lock()
+
+    def send(reply):
+        with send_lock:
+            conn.send(reply)
+
+    engine.on_reload = lambda seconds: send(
+        {"type": "loaded", "load_time": seconds, "models": engine.resident_models()}
+    )
+    send({"type": "ready", "load_time": engine.load_time, "models": engine.resident_models()})
+
+    token = _EventToken(cancel_event)
+    while True:
+        try:
+            msg = conn.recv()
+        except (EOFError, OSError):
+            return  # Parent went away
+        kind = msg["type"]
+        if kind == "stop":
+            return
+        if kind == "load":
+            engine.load_async(msg.get("model"))
+            continue
+        if kind != "transcribe":
+            continue
+
+        # The parent owns (and unlinks) the block; we only map it. Spawned
+        # children share the parent's resource tracker, so attaching here
+        # doesn't add a second owner.
+        shm = shared_memory.SharedMemory(name=msg["shm"])
+        recorder = _SpanRecorder()
+        audio = None
+        try:
+            audio = np.ndarray(msg["shape"], dtype=np.float32, buffer=shm.buf)
+            result = engine.transcribe(
+                audio,
+                language=msg["language"],
+                custom_vocab=msg["custom_vocab"],
+                beam_size=msg["beam_size"],
+                cancel_token=token,
+                trace=recorder,
+                model_name=msg["model_name"],
+            )
+            reply = {"type": "result", "result": result}
+        except TranscriptionCancelled:
+            reply = {"type": "cancelled"}
+        except Exception as e:
+            reply = {"type": "error", "error": f"{type(e).__name__}: {e}"}
+        finally:
+            del audio
+            shm.close()
+        reply.update(id=msg["id"], spans=recorder.spans, models=engine.resident_models())
+        send(reply)
+
+
+class IsolatedEngine:
+    """
+    WhisperEngine stand-in that runs inference in a supervised worker process.
+
+    Supports the engine surface ErikSTT uses: transcribe, load_async,
+    unload (stops the worker, returning all of its memory to the OS),
+    resident_models, is_loaded, load_time and on_reload.
+    """
+
+    def __init__(self, settings, restart_backoff=1.0, max_backoff=30.0, ready_timeout=300.0):
+        self.settings = settings
+        self.model_name = settings.get("whisper", {}).get("model", "large-v3")
+        self.reloadable = True
+        self.fallback = None
+        self.fallback_after = 1.0
+        self.on_reload = None
+        self.on_worker_start = None         # Called with the pid of each new worker
+        self.load_time = 0.0
+        self.restarts = 0
+        self.restart_backoff = restart_backoff
+        self.max_backoff = max_backoff
+        self._backoff = restart_backoff
+
+        import multiprocessing
+        self._ctx = multiprocessing.get_context("spawn")  # fork is unsafe with AppKit/threads
+        self._lock = threading.Lock()
+        self._ready = threading.Event()
+        self._ids = itertools.count(1)
+        self._pending = {}          # request id -> queue.Queue for its reply
+        self._models = []
+        self._process = None
+        self._conn = None
+        self._cancel = None
+        self._started_at = None
+        self._stopping = False
+        self.fatal = None
+
+        self._start()
+        if not self._wait_ready(ready_timeout):
+            raise RuntimeError(f"Inference worker failed to start: {self.fatal or 'timed out'}")
+        print(f"Model loaded in worker process (pid {self._process.pid})! ({self.load_time:.2f}s)")
+
+    # -- Worker lifecycle ------------------------------------------------
+
+    def _start(self):
+        with self._lock:
+            if self._process is not None and self._process.is_alive():
+                return False
+            parent_conn, child_conn = self._ctx.Pipe()
+            self._cancel = self._ctx.Event()
+            self._process = self._ctx.Process(
+                target=_worker_main,
+                args=(child_conn, self.settings, self._cancel),
+                name="inference-worker",
+                daemon=True,
+            )
+            self._stopping = False
+            self.fatal = None
+            self._ready.clear()
+            self._process.start()
+            child_conn.close()
+            self._conn = parent_conn
+            self._started_at = time.monotonic()
+            threading.Thread(
+                target=self._read_loop, args=(parent_conn, self._process),
+                name="inference-reader", daemon=True
+            ).start()
+        print(f"🧵 Started inference worker (pid {self._process.pid})")
+        if self.on_worker_start:
+            self.on_worker_start(self._process.pid)
+        return True
+
+    def _read_loop(self, conn, process):
+        """Dispatch worker messages; restart the worker if it dies unexpectedly."""
+        while True:
+            try:
+                msg = conn.recv()
+            except (EOFError, OSError):
+                break
+            kind = msg["type"]
+            if "models" in msg:
+                self._models = msg["models"]
+            if kind == "ready":
+                self.load_time = msg["load_time"]
+                self._ready.set()
+                if self.restarts and self.on_reload:
+                    self.on_reload(msg["load_time"])
+            elif kind == "loaded":
+                if self.on_reload:
+                    self.on_reload(msg["load_time"])
+            elif kind == "fatal":
+                self.fatal = msg["error"]
+                print(f"✗ Inference worker could not start: {self.fatal}")
+            elif "id" in msg:
+                reply = self._pending.pop(msg["id"], None)
+                if reply is not None:
+                    reply.put(msg)
+
+        process.join(timeout=5)
+        with self._lock:
+            if process is not self._process:
+                return  # An older worker; a newer one has taken over
+            self._ready.clear()
+            self._models = []
+            expected = self._stopping or self.fatal is not None
+        for reply in list(self._pending.values()):
+            reply.put({"type": "crashed"})
+        self._pending.clear()
+        if expected:
+            return
+
+        # Unexpected exit: restart, backing off if it keeps dying young
+        if time.monotonic() - self._started_at > 60:
+            self._backoff = self.restart_backoff
+        delay = self._backoff
+        self._backoff = min(self._backoff * 2, self.max_backoff)
+        print(f"⚠ Inference worker exited (code {process.exitcode}); restarting in {delay:.1f}s")
+        time.sleep(delay)
+        with self._lock:
+            if self._stopping or process is not self._process:
+                return
+        self.restarts += 1
+        self._start()
+
+    def _wait_ready(self, timeout=None, cancel_token=None):
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while not self._ready.wait(0.05):
+            if self.fatal is not None:
+                return False
+            if cancel_token is not None:
+                cancel_token.raise_if_cancelled()
+            if deadline is not None and time.monotonic() > deadline:
+                return False
+        return True
+
+    def close(self, timeout=5.0):
+        """Stop the worker (no restart)."""
+        with self._lock:
+            self._stopping = True
+            process, conn = self._process, self._conn
+        if process is None or not process.is_alive():
+            return False
+        try:
+            conn.send({"type": "stop"})
+        except (OSError, ValueError):
+            pass
+        process.join(timeout)
+        if process.is_alive():
+            process.terminate()
+        self._ready.clear()
+        return True
+
+    # -- WhisperEngine surface -------------------------------------------
+
+    @property
+    def is_loaded(self):
+        return self._ready.is_set()
+
+    @property
+    def pid(self):
+        return self._process.pid if self._process is not None else None
+
+    def resident_models(self):
+        return list(self._models)
+
+    def load_async(self, name=None):
+        """Start the worker if it was stopped, or ask it to load a profile model."""
+        if self._start():
+            return True
+        if name and name not in self._models and self._ready.is_set():
+            with self._lock:
+                self._conn.send({"type": "load", "model": name})
+            return True
+        return False
+
+    def unload(self, fallback_model=None):
+        """Stop the worker: the whole process and its memory go away."""
+        if fallback_model:
+            print("⚠ idle.fallback_model isn't used with an isolated inference worker")
+        return self.close()
+
+    def transcribe(self, audio, language="en", custom_vocab=None, beam_size=5,
+                   cancel_token=None, trace=None, model_name=None):
+        """Same contract as WhisperEngine.transcribe; audio is a 16 kHz float32 array."""
+        from multiprocessing import shared_memory
+
+        import numpy as np
+
+        if not self._ready.is_set():
+            self.load_async()
+            wait_start = time.monotonic()
+            if not self._wait_ready(cancel_token=cancel_token):
+                raise RuntimeError(f"Inference worker unavailable: {self.fatal}")
+            if trace is not None:
+                trace.span("engine.reload_wait", wait_start, time.monotonic(), model="worker")
+
+        audio = np.ascontiguousarray(audio, dtype=np.float32).reshape(-1)
+        shm = shared_memory.SharedMemory(create=True, size=max(audio.nbytes, 1))
+        try:
+            np.ndarray(audio.shape, dtype=np.float32, buffer=shm.buf)[:] = audio
+            request_id = next(self._ids)
+            reply = queue.Queue(maxsize=1)
+            self._pending[request_id] = reply
+            try:
+                with self._lock:
+                    self._cancel.clear()
+                    self._conn.send({
+                        "type": "transcribe", "id": request_id,
+                        "shm": shm.name, "shape": audio.shape,
+                        "language": language, "custom_vocab": custom_vocab,
+                        "beam_size": beam_size, "model_name": model_name,
+                    })
+            except (OSError, ValueError) as e:
+                self._pending.pop(request_id, None)
+                raise RuntimeError(f"Inference worker unavailable: {e}")
+            while True:
+                try:
+                    msg = reply.get(timeout=0.05)
+                    break
+                except queue.Empty:
+                    if cancel_token is not None and cancel_token.is_cancelled:
+                        self._cancel.set()  # Worker stops at the next segment
+        finally:
+            shm.close()
+            shm.unlink()
+
+        if trace is not None:
+            for name, start, end, args in msg.get("spans", []):
+                trace.span(name, start, end, **args)
+        if msg["type"] == "result":
+            return msg["result"]
+        if msg["type"] == "cancelled":
+            raise TranscriptionCancelled(getattr(cancel_token, "reason", None) or "cancelled")
+        if msg["type"] == "crashed":
+            raise RuntimeError("Inference worker crashed during transcription")
+        raise RuntimeError(f"Inference worker error: {msg['error']}")
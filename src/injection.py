@@ -1,19 +1,71 @@
+import importlib
 import subprocess
 import time
 
-# Try to import Quartz for CGEvent (most reliable paste method)
-try:
-    from Quartz import (
-        CGEventCreateKeyboardEvent,
-        CGEventPost,
-        kCGHIDEventTap,
-        CGEventSetFlags,
-        kCGEventFlagMaskCommand
-    )
-    HAS_QUARTZ = True
-except ImportError:
-    HAS_QUARTZ = False
-    print("⚠ Quartz not available, using AppleScript fallback for paste")
+from src.tracing import NULL_TRACE
+
+# Quartz (CGEvent) and AppKit (NSPasteboard, NSWorkspace) are PyObjC bridges
+# that take a noticeable fraction of a second to import, so they are loaded on
+# first use rather than at module import.
+_frameworks = {}
+
+def _framework(name):
+    """Import a PyObjC framework on first use; None if it isn't available."""
+    if name not in _frameworks:
+        try:
+            _frameworks[name] = importlib.import_module(name)
+        except ImportError:
+            _frameworks[name] = None
+            if name == "Quartz":
+                print("⚠ Quartz not available, using AppleScript fallback for paste")
+    return _frameworks[name]
+
+def has_quartz():
+    return _framework("Quartz") is not None
+
+def has_appkit():
+    return _framework("AppKit") is not None
+
+# Readiness ceilings (seconds). Overridden by the `injection:` block in settings.yaml.
+# (`injection.backend` selects the backend: auto | appkit | subprocess)
+DEFAULT_READINESS = {
+    "focus_timeout": 0.5,       # Max wait for the target app to become frontmost
+    "clipboard_timeout": 0.3,   # Max wait for the pasteboard change count to tick
+    "poll_initial": 0.005,      # First poll interval
+    "poll_max": 0.05,           # Backoff ceiling between polls
+}
+
+# Adaptive chunking for the keystroke fallback. Chunks grow as long as
+# throughput (chars/s) improves and the target app accepts them, and back
+# off when it rejects one. Overridden by the same `injection:` block.
+DEFAULT_KEYSTROKE = {
+    "keystroke_chunk_initial": 64,      # Characters in the first chunk
+    "keystroke_chunk_min": 8,
+    "keystroke_chunk_max": 512,
+    "keystroke_max_retries": 8,         # Consecutive rejected chunks before giving up
+}
+
+# CGEventKeyboardSetUnicodeString accepts at most 20 UTF-16 units per event
+CGEVENT_MAX_UNITS = 20
+
+def wait_until(predicate, timeout, poll_initial=0.005, poll_max=0.05,
+               clock=time.monotonic, sleep=time.sleep):
+    """
+    Poll predicate with exponential backoff until it returns True or timeout expires.
+
+    Returns:
+        tuple: (ready, waited_seconds)
+    """
+    start = clock()
+    interval = poll_initial
+    while True:
+        if predicate():
+            return True, clock() - start
+        waited = clock() - start
+        if waited >= timeout:
+            return False, waited
+        sleep(min(interval, timeout - waited))
+        interval = min(interval * 2, poll_max)
 
 def get_active_app():
     """Get the name of the currently frontmost application."""
@@ -30,25 +82,45 @@ def get_active_app():
         return None
 
 def activate_app(app_name):
-    """Activate (focus) a specific application by name."""
+    """
+    Ask a specific application to activate (focus) by name.
+
+    Returns immediately; callers wait for the app to actually become
+    frontmost (see Injector.restore_focus).
+    """
     if not app_name:
-        return
-        
+        return False
+
     print(f"🔄 Restoring focus to: {app_name}")
     script = f'tell application "{app_name}" to activate'
     try:
         subprocess.run(["osascript", "-e", script], check=True)
-        time.sleep(0.3)  # Allow focus to settle (0.3s for Electron apps like Cursor)
+        return True
     except Exception as e:
         print(f"⚠ Could not activate app {app_name}: {e}")
+        return False
+
+def clipboard_change_count():
+    """Return the general pasteboard change count, or None if AppKit is unavailable."""
+    AppKit = _framework("AppKit")
+    if AppKit is None:
+        return None
+    return AppKit.NSPasteboard.generalPasteboard().changeCount()
+
+def copy_to_clipboard(text):
+    """Copy text to the clipboard via pbcopy."""
+    subprocess.run(["pbcopy"], input=text.encode(), check=True)
+
+def escape_applescript(text):
+    """Escape special characters for an AppleScript string literal."""
+    return text.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n').replace('\r', '')
 
 def inject_text_applescript(text):
     """
     Inject text using AppleScript keystroke (fallback method).
     Types text character by character at cursor position.
     """
-    # Escape special characters for AppleScript
-    escaped = text.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n').replace('\r', '')
+    escaped = escape_applescript(text)
 
     script = f'''
     tell application "System Events"
@@ -58,7 +130,6 @@ def inject_text_applescript(text):
 
     try:
         subprocess.run(["osascript", "-e", script], check=True, capture_output=True)
-        print("✓ Text injected via AppleScript keystroke")
         return True
     except subprocess.CalledProcessError as e:
         print(f"✗ AppleScript injection failed: {e}")
@@ -66,22 +137,23 @@ def inject_text_applescript(text):
 
 def paste_with_cgevent():
     """Paste using CGEvent (most reliable for Electron apps)."""
-    if not HAS_QUARTZ:
+    Quartz = _framework("Quartz")
+    if Quartz is None:
         return False
     
     try:
         # Key code 9 = 'v'
         # Create key down event with Command modifier
-        event_down = CGEventCreateKeyboardEvent(None, 9, True)
-        CGEventSetFlags(event_down, kCGEventFlagMaskCommand)
+        event_down = Quartz.CGEventCreateKeyboardEvent(None, 9, True)
+        Quartz.CGEventSetFlags(event_down, Quartz.kCGEventFlagMaskCommand)
         
         # Create key up event with Command modifier
-        event_up = CGEventCreateKeyboardEvent(None, 9, False)
-        CGEventSetFlags(event_up, kCGEventFlagMaskCommand)
+        event_up = Quartz.CGEventCreateKeyboardEvent(None, 9, False)
+        Quartz.CGEventSetFlags(event_up, Quartz.kCGEventFlagMaskCommand)
         
         # Post the events
-        CGEventPost(kCGHIDEventTap, event_down)
-        CGEventPost(kCGHIDEventTap, event_up)
+        Quartz.CGEventPost(Quartz.kCGHIDEventTap, event_down)
+        Quartz.CGEventPost(Quartz.kCGHIDEventTap, event_up)
         
         print("✓ Paste sent via CGEvent (Quartz)")
         return True
@@ -104,65 +176,699 @@ def paste_with_applescript():
         print(f"⚠ AppleScript paste failed: {e}")
         return False
 
-def inject_text_clipboard(text):
+def press_return_applescript():
+    """Press Return via AppleScript (key code 36)."""
+    script = '''
+    tell application "System Events"
+        key code 36
+    end tell
+    '''
+    try:
+        subprocess.run(["osascript", "-e", script], check=True, capture_output=True)
+        return True
+    except subprocess.CalledProcessError as e:
+        print(f"✗ AppleScript Return failed: {e}")
+        return False
+
+def utf16_slices(text, max_units=CGEVENT_MAX_UNITS):
+    """Split text into pieces of at most max_units UTF-16 code units."""
+    piece, units = [], 0
+    for ch in text:
+        width = 2 if ord(ch) > 0xFFFF else 1
+        if units + width > max_units:
+            yield "".join(piece)
+            piece, units = [], 0
+        piece.append(ch)
+        units += width
+    if piece:
+        yield "".join(piece)
+
+def type_with_cgevent(text):
+    """Type text with Unicode keyboard events, up to 20 characters per event."""
+    Quartz = _framework("Quartz")
+    if Quartz is None:
+        return False
+
+    try:
+        for piece in utf16_slices(text):
+            units = len(piece.encode("utf-16-le")) // 2
+            event_down = Quartz.CGEventCreateKeyboardEvent(None, 0, True)
+            Quartz.CGEventKeyboardSetUnicodeString(event_down, units, piece)
+            event_up = Quartz.CGEventCreateKeyboardEvent(None, 0, False)
+            Quartz.CGEventKeyboardSetUnicodeString(event_up, units, piece)
+            Quartz.CGEventPost(Quartz.kCGHIDEventTap, event_down)
+            Quartz.CGEventPost(Quartz.kCGHIDEventTap, event_up)
+        return True
+    except Exception as e:
+        print(f"⚠ CGEvent typing failed: {e}")
+        return False
+
+def split_chunks(line, size):
     """
-    Inject text using clipboard + paste (primary method).
-    Copies text to clipboard, then pastes with Cmd+V.
-    Uses CGEvent (Quartz) if available, falls back to AppleScript.
+    Take the next chunk of at most size characters from line,
+    preferring to break after a space.
+
+    Returns:
+        tuple: (chunk, rest)
     """
-    try:
-        # Copy to clipboard
-        subprocess.run(["pbcopy"], input=text.encode(), check=True)
-        print(f"📋 Copied to clipboard: {text[:50]}...")
+    if len(line) <= size:
+        return line, ""
+    cut = line.rfind(" ", size // 2, size)
+    cut = size if cut == -1 else cut + 1
+    return line[:cut], line[cut:]
 
-        # Wait for clipboard and app to be ready
-        time.sleep(0.4)  # Longer delay for Electron apps
-        
+
+class AdaptiveChunker:
+    """
+    Picks keystroke chunk sizes for throughput (characters per second).
+
+    Each call has a fixed cost, so bigger chunks type faster until the
+    target app can't keep up. The size doubles after every full chunk the
+    backend accepts, up to `ceiling`, the largest size the app is known to
+    take. When a larger size turns out slower than the previous one, the
+    size goes back and the ceiling is set there. When the app rejects a
+    chunk (its input queue is full), the size is halved and the ceiling is
+    lowered below the rejected size. After PROBE_AFTER accepted chunks at
+    the ceiling it is raised again, so a slow app doesn't cap a faster one
+    for good. The learned size carries over between injections, within
+    [min_size, max_size].
+    """
+
+    SLOWER = 0.9            # A rate under this fraction of the previous size's counts as slower
+    BACKOFF = 0.8           # Ceiling after a rejection, as a fraction of the rejected size
+    PROBE_AFTER = 16
+
+    def __init__(self, initial=64, min_size=8, max_size=512):
+        self.min_size = min_size
+        self.max_size = max_size
+        self.size = self._clamp(initial)
+        self.ceiling = max_size
+        self._previous = None       # (size, chars/s) before the last increase
+        self._at_ceiling = 0
+
+    def _clamp(self, size):
+        return max(self.min_size, min(int(size), self.max_size))
+
+    def observe(self, chars, seconds):
+        """Record that a chunk cut at the current size (`chars` characters) was accepted in `seconds`."""
+        if seconds <= 0:
+            return
+        rate = chars / seconds
+        if self._previous and self._previous[0] < self.size and rate < self._previous[1] * self.SLOWER:
+            self.size = self.ceiling = self._previous[0]
+            self._previous = None
+            return
+        if self.size < self.ceiling:
+            self._previous = (self.size, rate)
+            self.size = self._clamp(min(self.ceiling, self.size * 2))
+            self._at_ceiling = 0
+            return
+        self._at_ceiling += 1
+        if self._at_ceiling >= self.PROBE_AFTER and self.ceiling < self.max_size:
+            self.ceiling = self._clamp(self.ceiling * 1.25)
+            self._at_ceiling = 0
+
+    def reject(self, chars):
+        """Record that the backend rejected a chunk of `chars` characters."""
+        self.ceiling = self._clamp(min(self.ceiling, chars * self.BACKOFF))
+        self.size = self._clamp(min(self.ceiling, chars // 2))
+        self._previous = None
+        self._at_ceiling = 0
+
+
+def _fourcc(code):
+    """Pack a four-character Apple Event code into an int."""
+    return int.from_bytes(code.encode("ascii"), "big")
+
+
+class ClipboardError(RuntimeError):
+    """The pasteboard refused a write (in-process backends; pbcopy raises CalledProcessError)."""
+
+
+class InjectionBackend:
+    """
+    Interface between the Injector and the OS.
+
+    frontmost_app(max_age) may return a cached name no older than max_age
+    seconds (None = backend default, 0 = always fresh). set_clipboard raises
+    ClipboardError or subprocess.CalledProcessError when the write fails.
+    """
+
+    def frontmost_app(self, max_age=None):
+        raise NotImplementedError
+
+    def activate(self, app_name):
+        raise NotImplementedError
+
+    def clipboard_change_count(self):
+        return None
+
+    def set_clipboard(self, text):
+        raise NotImplementedError
+
+    def paste(self):
+        raise NotImplementedError
+
+    def keystroke(self, text):
+        raise NotImplementedError
+
+    def key_return(self):
+        """Press Return (newlines are sent as key presses, never inside keystroke strings)."""
+        return self.keystroke("\n")
+
+
+class SubprocessBackend(InjectionBackend):
+    """Talks to macOS through osascript/pbcopy (and Quartz/AppKit when available)."""
+
+    def frontmost_app(self, max_age=None):
+        return get_active_app()
+
+    def activate(self, app_name):
+        return activate_app(app_name)
+
+    def clipboard_change_count(self):
+        return clipboard_change_count()
+
+    def set_clipboard(self, text):
+        copy_to_clipboard(text)
+
+    def paste(self):
         # Try CGEvent first (most reliable), then AppleScript
-        if HAS_QUARTZ and paste_with_cgevent():
-            print("✓ Text injected via clipboard paste (CGEvent)")
+        if paste_with_cgevent():
             return True
-        elif paste_with_applescript():
-            print("✓ Text injected via clipboard paste (AppleScript)")
+        return paste_with_applescript()
+
+    def keystroke(self, text):
+        return inject_text_applescript(text)
+
+    def key_return(self):
+        return press_return_applescript()
+
+
+class AppKitBackend(InjectionBackend):
+    """
+    Long-lived in-process backend: no process is spawned per call.
+
+    - Frontmost app comes straight from the window server (Quartz window
+      list), so it stays correct without a running Cocoa run loop.
+    - Activation goes through NSRunningApplication, looked up by the pid
+      the window server reports for the app (NSWorkspace.runningApplications
+      is only refreshed by the main run loop, which CLI mode doesn't run).
+    - The clipboard goes through NSPasteboard.
+    - AppleScript handlers are compiled once into a persistent NSAppleScript
+      and invoked with Apple Events. NSAppleScript is main-thread only, so
+      off the main thread (the pipeline's inject stage) the handlers fall
+      back to osascript.
+    - The frontmost-app lookup is cached for `frontmost_ttl` seconds and
+      invalidated whenever we activate an app.
+    """
+
+    HANDLERS = '''
+    on type_text(t)
+        tell application "System Events" to keystroke t
+    end type_text
+
+    on paste_clipboard()
+        tell application "System Events" to key code 9 using command down
+    end paste_clipboard
+
+    on press_return()
+        tell application "System Events" to key code 36
+    end press_return
+    '''
+
+    def __init__(self, frontmost_ttl=0.1, clock=time.monotonic):
+        if not (has_appkit() and has_quartz()):
+            raise RuntimeError("AppKitBackend requires PyObjC (AppKit + Quartz)")
+        self.AppKit = _framework("AppKit")
+        self.Quartz = _framework("Quartz")
+        self.frontmost_ttl = frontmost_ttl
+        self.clock = clock
+        self._frontmost = None
+        self._frontmost_at = None
+        self._pids = {}                 # App name -> pid last seen in the window list
+        self._pasteboard = self.AppKit.NSPasteboard.generalPasteboard()
+        self._workspace = self.AppKit.NSWorkspace.sharedWorkspace()
+        self._script = None             # Compiled on first use on the main thread
+
+    # osascript equivalents of the handlers, for calls off the main thread
+    FALLBACKS = {
+        "type_text": inject_text_applescript,
+        "paste_clipboard": paste_with_applescript,
+        "press_return": press_return_applescript,
+    }
+
+    def _call_handler(self, name, *args):
+        """Invoke a handler in the persistent script via an Apple Event (osascript off the main thread)."""
+        if not self.AppKit.NSThread.isMainThread():
+            return self.FALLBACKS[name](*args)
+        if self._script is None:
+            self._script = self.AppKit.NSAppleScript.alloc().initWithSource_(self.HANDLERS)
+            ok, error = self._script.compileAndReturnError_(None)
+            if not ok:
+                print(f"⚠ Could not compile AppleScript handlers: {error}")
+        NSAppleEventDescriptor = self.AppKit.NSAppleEventDescriptor
+        event = NSAppleEventDescriptor.appleEventWithEventClass_eventID_targetDescriptor_returnID_transactionID_(
+            _fourcc("ascr"), _fourcc("psbr"),
+            NSAppleEventDescriptor.currentProcessDescriptor(), -1, 0
+        )
+        event.setParamDescriptor_forKeyword_(
+            NSAppleEventDescriptor.descriptorWithString_(name), _fourcc("snam")
+        )
+        params = NSAppleEventDescriptor.listDescriptor()
+        for i, arg in enumerate(args, 1):
+            params.insertDescriptor_atIndex_(NSAppleEventDescriptor.descriptorWithString_(arg), i)
+        event.setParamDescriptor_forKeyword_(params, _fourcc("----"))
+
+        _, error = self._script.executeAppleEvent_error_(event, None)
+        if error:
+            print(f"⚠ AppleScript handler {name} failed: {error}")
+            return False
+        return True
+
+    def frontmost_app(self, max_age=None):
+        max_age = self.frontmost_ttl if max_age is None else max_age
+        now = self.clock()
+        if self._frontmost_at is not None and now - self._frontmost_at <= max_age:
+            return self._frontmost
+
+        name = None
+        Quartz = self.Quartz
+        windows = Quartz.CGWindowListCopyWindowInfo(
+            Quartz.kCGWindowListOptionOnScreenOnly | Quartz.kCGWindowListExcludeDesktopElements,
+            Quartz.kCGNullWindowID
+        )
+        # Window list is front-to-back; layer 0 is normal app windows
+        for window in windows or []:
+            if window.get("kCGWindowLayer") == 0:
+                name = window.get("kCGWindowOwnerName")
+                self._pids[name] = window.get("kCGWindowOwnerPID")
+                break
+        if name is None:
+            app = self._workspace.frontmostApplication()
+            name = app.localizedName() if app else None
+
+        self._frontmost = name
+        self._frontmost_at = now
+        return name
+
+    def _running_app(self, app_name):
+        """NSRunningApplication for app_name: the pid seen last, else a fresh window-list scan."""
+        NSRunningApplication = self.AppKit.NSRunningApplication
+        pid = self._pids.get(app_name)
+        if pid is not None:
+            app = NSRunningApplication.runningApplicationWithProcessIdentifier_(pid)
+            if app is not None and not app.isTerminated() and app.localizedName() == app_name:
+                return app
+        Quartz = self.Quartz
+        windows = Quartz.CGWindowListCopyWindowInfo(Quartz.kCGWindowListOptionAll, Quartz.kCGNullWindowID)
+        for window in windows or []:
+            if window.get("kCGWindowOwnerName") == app_name:
+                app = NSRunningApplication.runningApplicationWithProcessIdentifier_(
+                    window.get("kCGWindowOwnerPID"))
+                if app is not None and not app.isTerminated():
+                    self._pids[app_name] = app.processIdentifier()
+                    return app
+        return None
+
+    def activate(self, app_name):
+        self._frontmost_at = None  # Invalidate cache
+        print(f"🔄 Restoring focus to: {app_name}")
+        app = self._running_app(app_name)
+        if app is None:
+            print(f"⚠ Could not find running app {app_name}")
+            return False
+        return bool(app.activateWithOptions_(self.AppKit.NSApplicationActivateIgnoringOtherApps))
+
+    def clipboard_change_count(self):
+        return self._pasteboard.changeCount()
+
+    def set_clipboard(self, text):
+        self._pasteboard.clearContents()
+        if not self._pasteboard.setString_forType_(text, self.AppKit.NSPasteboardTypeString):
+            raise ClipboardError("NSPasteboard rejected clipboard write")
+
+    def paste(self):
+        if paste_with_cgevent():
             return True
-        else:
-            print("✗ Both paste methods failed")
+        return self._call_handler("paste_clipboard")
+
+    def keystroke(self, text):
+        # Unicode keyboard events type up to 20 characters per event and need
+        # no quoting; the AppleScript handler is the fallback.
+        if type_with_cgevent(text):
+            return True
+        return self._call_handler("type_text", text)
+
+    def key_return(self):
+        return self._call_handler("press_return")
+
+
+def make_backend(name="auto"):
+    """
+    Create an injection backend by name.
+
+    auto picks the persistent AppKit backend when PyObjC is available,
+    otherwise the subprocess backend.
+    """
+    if name == "appkit" or (name == "auto" and has_appkit() and has_quartz()):
+        return AppKitBackend()
+    if name in ("auto", "subprocess"):
+        return SubprocessBackend()
+    raise ValueError(f"Unknown injection backend: {name}")
+
+
+class FakeBackend(InjectionBackend):
+    """
+    In-memory backend for exercising the injection timing logic without macOS.
+
+    Focus and clipboard changes only become visible after the configured
+    delays, mimicking a slow app activation or pasteboard update.
+
+    Every backend call is recorded in `calls` as (method, seconds), and
+    `call_overhead` adds a fixed cost per call (e.g. 0.03 to stand in for a
+    process spawn) so per-injection overhead can be benchmarked headlessly.
+
+    Keystrokes additionally cost `keystroke_char_cost` seconds per character,
+    acting as a stand-in event sink for the chunked typing path. With
+    `keystroke_buffer` set, the sink is an app with a bounded input queue:
+    typed characters drain at `keystroke_drain_rate` per second, and a chunk
+    that doesn't fit in the free space is dropped and reported (keystroke
+    returns False and nothing is typed; dropped characters are counted in
+    `dropped`).
+
+    With `clipboard_ok` False, set_clipboard raises ClipboardError like a
+    pasteboard that rejects the write.
+    """
+
+    def __init__(self, frontmost="Terminal", focus_delay=0.0, clipboard_delay=0.0,
+                 paste_ok=True, keystroke_ok=True, call_overhead=0.0, clipboard_ok=True,
+                 keystroke_char_cost=0.0, keystroke_buffer=None, keystroke_drain_rate=0.0,
+                 clock=time.monotonic):
+        self.clock = clock
+        self.focus_delay = focus_delay
+        self.clipboard_delay = clipboard_delay
+        self.paste_ok = paste_ok
+        self.keystroke_ok = keystroke_ok
+        self.clipboard_ok = clipboard_ok
+        self.call_overhead = call_overhead
+        self.keystroke_char_cost = keystroke_char_cost
+        self.keystroke_buffer = keystroke_buffer
+        self.keystroke_drain_rate = keystroke_drain_rate
+        self._queued = 0.0              # Characters waiting in the sink's input queue
+        self._drained_at = clock()
+        self.dropped = 0
+        self._frontmost = frontmost
+        self._pending_focus = None      # (app_name, ready_at)
+        self._change_count = 0
+        self._pending_clipboard = None  # (text, ready_at)
+        self.clipboard = ""
+        self.pasted = []
+        self.typed = []
+        self.calls = []
+
+    def _record(self, method, started):
+        if self.call_overhead:
+            time.sleep(self.call_overhead)
+        self.calls.append((method, time.monotonic() - started))
+
+    def frontmost_app(self, max_age=None):
+        started = time.monotonic()
+        if self._pending_focus and self.clock() >= self._pending_focus[1]:
+            self._frontmost = self._pending_focus[0]
+            self._pending_focus = None
+        self._record("frontmost_app", started)
+        return self._frontmost
+
+    def activate(self, app_name):
+        started = time.monotonic()
+        self._pending_focus = (app_name, self.clock() + self.focus_delay)
+        self._record("activate", started)
+        return True
+
+    def clipboard_change_count(self):
+        started = time.monotonic()
+        if self._pending_clipboard and self.clock() >= self._pending_clipboard[1]:
+            self.clipboard = self._pending_clipboard[0]
+            self._pending_clipboard = None
+            self._change_count += 1
+        self._record("clipboard_change_count", started)
+        return self._change_count
+
+    def set_clipboard(self, text):
+        started = time.monotonic()
+        if not self.clipboard_ok:
+            self._record("set_clipboard", started)
+            raise ClipboardError("fake pasteboard rejected clipboard write")
+        self._pending_clipboard = (text, self.clock() + self.clipboard_delay)
+        self._record("set_clipboard", started)
+
+    def paste(self):
+        started = time.monotonic()
+        if self.paste_ok:
+            if self._pending_clipboard and self.clock() >= self._pending_clipboard[1]:
+                self.clipboard = self._pending_clipboard[0]
+                self._pending_clipboard = None
+                self._change_count += 1
+            self.pasted.append(self.clipboard)
+        self._record("paste", started)
+        return self.paste_ok
+
+    def keystroke(self, text):
+        started = time.monotonic()
+        if self.keystroke_buffer is not None:
+            now = self.clock()
+            self._queued = max(0.0, self._queued - (now - self._drained_at) * self.keystroke_drain_rate)
+            self._drained_at = now
+            if self._queued + len(text) > self.keystroke_buffer:
+                self.dropped += len(text)
+                self._record("keystroke", started)
+                return False
+            self._queued += len(text)
+        if self.keystroke_char_cost:
+            time.sleep(self.keystroke_char_cost * len(text))
+        if self.keystroke_ok:
+            self.typed.append(text)
+        self._record("keystroke", started)
+        return self.keystroke_ok
+
+    def key_return(self):
+        started = time.monotonic()
+        if self.keystroke_ok:
+            self.typed.append("\n")
+        self._record("key_return", started)
+        return self.keystroke_ok
+
+
+class Injector:
+    """
+    Injects text into the target app, waiting on real readiness signals
+    (frontmost app, pasteboard change count) instead of fixed sleeps.
+
+    The measured wait for each step of the last injection is kept in
+    `last_timings` (seconds). Keystroke fallback throughput is kept in
+    `last_keystroke_stats`.
+    """
+
+    def __init__(self, backend=None, settings=None):
+        settings = settings or {}
+        self.backend = backend or make_backend(settings.get("backend", "auto"))
+        self.readiness = dict(DEFAULT_READINESS)
+        self.readiness.update({k: v for k, v in settings.items() if k in DEFAULT_READINESS})
+        keystroke = dict(DEFAULT_KEYSTROKE)
+        keystroke.update({k: v for k, v in settings.items() if k in DEFAULT_KEYSTROKE})
+        self.chunker = AdaptiveChunker(
+            initial=keystroke["keystroke_chunk_initial"],
+            min_size=keystroke["keystroke_chunk_min"],
+            max_size=keystroke["keystroke_chunk_max"],
+        )
+        self.max_retries = keystroke["keystroke_max_retries"]
+        self.last_timings = {}
+        self.last_keystroke_stats = {}
+        self.trace = NULL_TRACE
+
+    def _wait(self, predicate, timeout):
+        return wait_until(
+            predicate,
+            timeout,
+            poll_initial=self.readiness["poll_initial"],
+            poll_max=self.readiness["poll_max"],
+        )
+
+    def restore_focus(self, app_name):
+        """Activate app_name and wait until it is confirmed frontmost."""
+        if self.backend.frontmost_app() == app_name:
+            self.last_timings["focus_wait"] = 0.0
+            return True
+
+        self.backend.activate(app_name)
+        ready, waited = self._wait(
+            lambda: self.backend.frontmost_app(max_age=0) == app_name,
+            self.readiness["focus_timeout"],
+        )
+        self.last_timings["focus_wait"] = waited
+        if not ready:
+            print(f"⚠ {app_name} not frontmost after {waited*1000:.0f}ms, injecting anyway")
+        return ready
+
+    def inject_clipboard(self, text):
+        """
+        Inject text using clipboard + paste (primary method).
+        Waits for the pasteboard change count to tick before sending Cmd+V.
+        """
+        try:
+            with self.trace.timed("inject.clipboard"):
+                before = self.backend.clipboard_change_count()
+                self.backend.set_clipboard(text)
+                print(f"📋 Copied to clipboard: {text[:50]}...")
+
+                if before is None:
+                    # No change count available; pbcopy has returned, so the write is done
+                    self.last_timings["clipboard_wait"] = 0.0
+                else:
+                    ready, waited = self._wait(
+                        lambda: self.backend.clipboard_change_count() != before,
+                        self.readiness["clipboard_timeout"],
+                    )
+                    self.last_timings["clipboard_wait"] = waited
+                    if not ready:
+                        print(f"⚠ Clipboard change not observed after {waited*1000:.0f}ms")
+
+            with self.trace.timed("inject.paste"):
+                pasted = self.backend.paste()
+            if pasted:
+                print("✓ Text injected via clipboard paste")
+                return True
+            print("✗ Paste failed")
             return False
-            
-    except subprocess.CalledProcessError as e:
-        print(f"✗ Clipboard injection failed: {e}")
-        return False
+
+        except (subprocess.CalledProcessError, ClipboardError) as e:
+            print(f"✗ Clipboard injection failed: {e}")
+            return False
+
+    def inject_keystrokes(self, text):
+        """
+        Type text in adaptively sized chunks (fallback method).
+
+        Newlines are sent as Return key presses between lines, so no chunk
+        ever carries a newline or needs newline quoting. A rejected chunk
+        (keystroke returns False, nothing typed) is retried smaller after a
+        backoff, up to keystroke_max_retries times in a row.
+        """
+        start = time.perf_counter()
+        span_start = time.monotonic()
+        chunks = 0
+        rejected = 0
+        lines = text.replace("\r", "").split("\n")
+
+        for i, line in enumerate(lines):
+            if i > 0:
+                if not self.backend.key_return():
+                    print("✗ Keystroke injection failed at newline")
+                    return False
+            rest = line
+            retries = 0
+            while rest:
+                chunk, remainder = split_chunks(rest, self.chunker.size)
+                t0 = time.perf_counter()
+                if self.backend.keystroke(chunk):
+                    if remainder:
+                        # Only chunks cut at the size limit (not a line's tail) say anything about it
+                        self.chunker.observe(len(chunk), time.perf_counter() - t0)
+                    rest = remainder
+                    chunks += 1
+                    retries = 0
+                    continue
+                rejected += 1
+                retries += 1
+                if retries > self.max_retries:
+                    self._keystroke_stats(text, chunks, rejected, start, span_start)
+                    print(f"✗ Keystroke injection failed after {chunks} chunks ({rejected} rejected)")
+                    return False
+                self.chunker.reject(len(chunk))
+                # Give the app time to drain its input queue
+                time.sleep(min(self.readiness["poll_initial"] * 2 ** retries, self.readiness["poll_max"]))
+
+        stats = self._keystroke_stats(text, chunks, rejected, start, span_start)
+        print(f"✓ Text injected via keystrokes ({len(text)} chars, {chunks} chunks, "
+              f"{stats['chars_per_sec']:.0f} chars/s)")
+        return True
+
+    def _keystroke_stats(self, text, chunks, rejected, start, span_start):
+        """Record the keystroke span, timing and throughput of the injection that began at start."""
+        elapsed = time.perf_counter() - start
+        self.trace.span("inject.keystroke", span_start, time.monotonic(), chars=len(text), chunks=chunks,
+                        rejected=rejected)
+        self.last_timings["keystroke"] = elapsed
+        self.last_keystroke_stats = {
+            "chars": len(text),
+            "chunks": chunks,
+            "rejected": rejected,
+            "seconds": elapsed,
+            "chars_per_sec": len(text) / elapsed if elapsed > 0 else 0.0,
+            "chunk_size": self.chunker.size,
+        }
+        return self.last_keystroke_stats
+
+    def inject(self, text, force_applescript=False, restore_app=None, trace=None):
+        """
+        Inject text at cursor using primary clipboard method, fallback to AppleScript.
+
+        Args:
+            text: The text to inject
+            force_applescript: If True, skip clipboard and use AppleScript directly (for testing)
+            restore_app: Optional name of app to refocus before injection
+            trace: Optional DictationTrace to record focus/clipboard/paste spans on
+        """
+        self.last_timings = {}
+        self.trace = trace or NULL_TRACE
+
+        # Restore focus if requested
+        if restore_app:
+            with self.trace.timed("inject.focus_restore", app=restore_app):
+                self.restore_focus(restore_app)
+
+        # If forcing AppleScript (for testing fallback), skip clipboard
+        if force_applescript:
+            print("⚠ Forcing AppleScript method (testing fallback)...")
+            return self.inject_keystrokes(text)
+
+        # Try clipboard method first (faster and more reliable)
+        if self.inject_clipboard(text):
+            return True
+
+        # Fall back to AppleScript keystroke (slower)
+        print("⚠ Clipboard method failed, trying AppleScript keystroke...")
+        return self.inject_keystrokes(text)
+
+
+_default_injector = None
+
+def get_default_injector():
+    """Return the shared module-level Injector (created on first use)."""
+    global _default_injector
+    if _default_injector is None:
+        _default_injector = Injector()
+    return _default_injector
+
+def inject_text_clipboard(text):
+    """Inject text using clipboard + paste (primary method) via the default injector."""
+    return get_default_injector().inject_clipboard(text)
 
 def inject_text(text, force_applescript=False, restore_app=None):
     """
     Inject text at cursor using primary clipboard method, fallback to AppleScript.
-    
+
+    Convenience wrapper around a module-level Injector with default settings.
+
     Args:
         text: The text to inject
         force_applescript: If True, skip clipboard and use AppleScript directly (for testing)
         restore_app: Optional name of app to refocus before injection
     """
-    # Restore focus if requested
-    if restore_app:
-        activate_app(restore_app)
-        
-    # If forcing AppleScript (for testing fallback), skip clipboard
-    if force_applescript:
-        print("⚠ Forcing AppleScript method (testing fallback)...")
-        return inject_text_applescript(text)
-    
-    # Try clipboard method first (faster and more reliable)
-    # Debug: Check active app
-    current_app = get_active_app()
-    if current_app:
-        print(f"👀 Active App for Injection: {current_app}")
-
-    if inject_text_clipboard(text):
-        return True
-
-    # Fall back to AppleScript keystroke (slower)
-    print("⚠ Clipboard method failed, trying AppleScript keystroke...")
-    return inject_text_applescript(text)
+    return get_default_injector().inject(
+        text, force_applescript=force_applescript, restore_app=restore_app
+    )
 
 if __name__ == "__main__":
     import sys
@@ -186,7 +892,10 @@ if __name__ == "__main__":
     print("\nInjecting text in 3 seconds... Focus Notes.app or any text editor now!")
     time.sleep(3)
 
-    success = inject_text(test_text, force_applescript=test_fallback)
+    injector = get_default_injector()
+    success = injector.inject(test_text, force_applescript=test_fallback)
+    for step, waited in injector.last_timings.items():
+        print(f"   {step}: {waited*1000:.1f}ms")
     
     print("\n" + "=" * 60)
     print(f"Final result: {'✓ SUCCESS' if success else '✗ FAILED'}")
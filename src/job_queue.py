@@ -0,0 +1,55 @@
+import threading
+import time
+
+from src.tracing import NULL_TRACE
+
+
+class TranscriptionCancelled(Exception):
+    """Raised inside a job when its cancellation token has been triggered."""
+
+
+class CancellationToken:
+    """Thread-safe flag checked by the engine between decoded segments."""
+
+    def __init__(self):
+        self._event = threading.Event()
+        self.reason = None
+
+    def cancel(self, reason="cancelled"):
+        self.reason = reason
+        self._event.set()
+
+    @property
+    def is_cancelled(self):
+        return self._event.is_set()
+
+    def raise_if_cancelled(self):
+        if self._event.is_set():
+            raise TranscriptionCancelled(self.reason)
+
+
+class DictationJob:
+    """One finished recording waiting to be transcribed and injected."""
+
+    def __init__(self, audio_chunks, target_app=None, ready_at=0.0, callbacks=None, trace=None,
+                 profile=None):
+        self.audio_chunks = audio_chunks    # List still receiving tail audio until ready_at
+        self.target_app = target_app
+        self.profile = profile              # Per-app Profile (model, beam size, mode, replacements)
+        self.ready_at = ready_at            # time.monotonic() when the tail is complete
+        self.callbacks = callbacks or {}
+        self.trace = trace or NULL_TRACE
+        self.token = CancellationToken()
+        self.enqueued_at = None
+        self.queued_at = None               # When it entered its current stage queue
+        self.started_at = None
+        self.profiling = False              # A profiler session was opened for it (assemble stage)
+
+        # Filled in by the pipeline stages
+        self.temp_path = None
+        self.audio = None                   # float32 samples, when not going through a WAV
+        self.audio_duration = None
+        self.result = None
+        self.processed_text = None
+        self.success = None
+        self.error = None
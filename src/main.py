@@ -6,26 +6,42 @@ Hotkey-driven transcription with custom vocabulary and text injection.
 Run with: python -m src.main
 """
 
-import sounddevice as sd
-import numpy as np
 import tempfile
+import threading
 import time
 from pathlib import Path
 from collections import deque
-from pynput import keyboard
-import scipy.io.wavfile as wav
+from concurrent.futures import ThreadPoolExecutor
+
+# sounddevice, numpy, scipy, pynput and faster_whisper are imported where they
+# are first used, so importing this module (menubar app, tools, benchmarks)
+# stays fast. tests/benchmark_startup.py enforces this.
 
 # Package imports (run with: python -m src.main)
 from src.engine import WhisperEngine, load_settings, load_vocab
 from src.post_process import load_replacements, process_mode_a, process_mode_b
-from src.injection import inject_text, get_active_app
+from src.injection import Injector
+from src.job_queue import DictationJob, TranscriptionCancelled
+from src.pipeline import Stage, DictationPipeline
+from src.tracing import TraceRecorder, NULL_TRACE
+from src.metrics import REGISTRY, MetricsExporter, resident_memory_bytes
+from src.profiling import DictationProfiler, profiling_settings
+from src.profiles import ProfileResolver
+from src.scheduling import CpuGuard, scheduling_settings
 
 
 class ErikSTT:
     """Main Speech-to-Text application with hotkey control."""
     
-    def __init__(self):
-        """Initialize the STT engine and load configurations."""
+    def __init__(self, settings=None, injector=None, stream=None):
+        """
+        Initialize the STT engine and load configurations.
+        
+        settings, injector and stream replace config/settings.yaml, the
+        text injector and the microphone stream (for testing/benchmarks:
+        the caller then feeds audio through audio_callback).
+        """
+        self.init_started = time.monotonic()
         print("=" * 60)
         print("INITIALIZING ERIK STT")
         print("=" * 60)
@@ -37,8 +53,10 @@ class ErikSTT:
         settings_path = project_root / "config" / "settings.yaml"
         
         # Load settings first
-        print(f"\n⚙️  Loading settings from {settings_path}...")
-        self.settings = load_settings(str(settings_path))
+        if settings is None:
+            print(f"\n⚙️  Loading settings from {settings_path}...")
+            settings = load_settings(str(settings_path))
+        self.settings = settings
         
         # Get processing mode from settings (default: "raw")
         self.mode = self.settings.get("modes", {}).get("default", "raw")
@@ -53,47 +71,227 @@ class ErikSTT:
         self.replacements = load_replacements(str(replacements_path))
         print(f"   Loaded {len(self.replacements)} replacement rules")
         
+        # Per-app profiles (model, beam size, mode, replacements)
+        self.profiles = ProfileResolver(self.settings, project_root, self.replacements)
+        self.profile = self.profiles.for_app(None)
+        if self.profiles.definitions:
+            print(f"   Profiles: {', '.join(self.profiles.definitions)}")
+        
         # Initialize Whisper engine with settings from config
         print("\n🤖 Initializing Whisper Engine...")
-        self.engine = WhisperEngine(config=self.settings)
+        # Keep a core free for audio capture while recording; cap inference
+        # threads unless whisper.cpu_threads is set explicitly
+        self.cpu_guard = CpuGuard(scheduling_settings(self.settings))
+        whisper_conf = self.settings.setdefault("whisper", {})
+        if not whisper_conf.get("cpu_threads"):
+            whisper_conf["cpu_threads"] = self.cpu_guard.inference_threads()
+        print(f"   CPU guard: {self.cpu_guard.describe()}")
+        # Optionally decode in a supervised child process so inference can't
+        # starve the audio callback, hotkey listener or UI of CPU/GIL time
+        self.isolated = self.settings.get("inference", {}).get("isolated", False)
+        if self.isolated:
+            from src.inference_worker import IsolatedEngine
+            self.engine = IsolatedEngine(self.settings)
+            self.cpu_guard.set_worker(self.engine.pid)
+            self.engine.on_worker_start = self.cpu_guard.set_worker
+        else:
+            self.engine = WhisperEngine(config=self.settings, thread_scope=self.cpu_guard.spawning)
+        
+        # Fleet-level metrics (Prometheus text via local HTTP and/or file)
+        self._init_metrics(project_root)
+        
+        # Opt-in profiling of slow dictations (settings or ERIK_STT_PROFILE=1)
+        self.profiler = None
+        profile_conf = profiling_settings(self.settings)
+        if profile_conf["enabled"]:
+            self.profiler = DictationProfiler(profile_conf, project_root)
+            self.engine.transcribe = self.profiler.wrap_transcribe(self.engine.transcribe)
+        
+        # Text injector (backend + readiness ceilings from settings)
+        # The backend is long-lived so per-dictation calls don't spawn processes
+        self.injector = injector or Injector(settings=self.settings.get("injection", {}))
         
         # Recording state
         self.is_recording = False
         self.audio_data = []
         self.sample_rate = 16000
         
+        # Per-dictation latency traces (JSONL, exportable to Chrome trace format)
+        tracing_settings = self.settings.get("tracing", {})
+        self.tracer = TraceRecorder(
+            path=str(project_root / tracing_settings.get("path", "logs/traces.jsonl")),
+            enabled=tracing_settings.get("enabled", True),
+            max_bytes=int(tracing_settings.get("max_size_mb", 10) * 1024 * 1024),
+            backups=tracing_settings.get("backups", 3),
+        )
+        self.trace = NULL_TRACE
+        self.hotkey_at = None
+        self.recording_started_at = None
+        self.awaiting_first_audio = False
+        
+        # Tail capture: after stop, keep feeding the just-finished recording
+        # for tail_seconds without blocking the hotkey listener
+        self.tail_seconds = 0.5
+        self.tail_target = None
+        self.tail_until = 0.0
+        
+        # Staged dictation pipeline. Each stage handles jobs strictly in order;
+        # stages overlap, so one utterance is injected while the next decodes.
+        queue_settings = self.settings.get("queue", {})
+        self.stages = [
+            Stage("assemble", self._stage_assemble),
+            Stage("decode", self._stage_decode),
+            Stage("post_process", self._stage_post_process, offload=False),
+            Stage("inject", self._stage_inject),
+        ]
+        # Finished jobs are cleaned up (temp file, trace, profile) on their own
+        # thread, so a slow disk never stalls the pipeline's event loop
+        self._finisher = ThreadPoolExecutor(max_workers=1, thread_name_prefix="dictation-finish")
+        self.pipeline = DictationPipeline(
+            self.stages,
+            on_finish=self._finish_job_async,
+            max_pending=queue_settings.get("max_pending", 4)
+        )
+        
+        # Optionally let a new dictation preempt one that has been
+        # transcribing for at least preempt_after seconds
+        self.preempt = queue_settings.get("preempt", False)
+        self.preempt_after = queue_settings.get("preempt_after", 5.0)
+        
         # Pre-roll buffer to capture audio before hotkey press (0.5s)
         # Assuming ~100ms chunks (conservative), 10 chunks = 1s. 
         # We'll use a larger buffer to be safe, exact duration depends on callback blocksize.
         self.pre_roll_buffer = deque(maxlen=20) 
         
+        # Audio callback health (overflows = blocks PortAudio had to drop)
+        self.last_callback_at = None
+        self.input_overflows = 0
+        
         # Start persistent stream (eliminates startup latency)
         print("\n🎤 Starting persistent audio stream...")
-        self.stream = sd.InputStream(
-            samplerate=self.sample_rate,
-            channels=1,
-            dtype='float32',
-            callback=self.audio_callback
-        )
+        if stream is None:
+            import sounddevice as sd
+            stream = sd.InputStream(
+                samplerate=self.sample_rate,
+                channels=1,
+                dtype='float32',
+                callback=self.audio_callback
+            )
+        self.stream = stream
         self.stream.start()
         
         # Track currently pressed keys for Option+Space hotkey (toggle mode)
         self.pressed_keys = set()
         
+        # Set when Esc is used for the Option+Esc cancel combo, so its
+        # release doesn't also exit the app
+        self.cancel_combo_used = False
+        
         # Track target app for injection
         self.target_app = None
         
+        # Release the model after a quiet period; it reloads on the next hotkey
+        self._init_idle_policy()
+        
         print("\n✓ Initialization complete!")
         print("=" * 60)
     
+    def _init_metrics(self, project_root):
+        """Register metrics and start the exporter configured in settings."""
+        metrics_settings = self.settings.get("metrics", {})
+        self.metrics = {
+            "stop_to_text": REGISTRY.histogram(
+                "stt_stop_to_text_seconds", "Hotkey stop to text injected"),
+            "rtf": REGISTRY.histogram(
+                "stt_real_time_factor", "Inference time divided by audio duration"),
+            "inference": REGISTRY.histogram(
+                "stt_inference_seconds", "Engine transcribe time"),
+            "queue_wait": REGISTRY.histogram(
+                "stt_queue_wait_seconds", "Time a dictation waited before its first stage"),
+            "injection_failures": REGISTRY.counter(
+                "stt_injection_failures_total", "Injections that reported failure"),
+            "model_load": REGISTRY.gauge(
+                "stt_model_load_seconds", "Time to load the Whisper model"),
+            "model_reload": REGISTRY.histogram(
+                "stt_model_reload_seconds", "Background model reloads after idle unload"),
+            "resident_memory": REGISTRY.gauge(
+                "stt_resident_memory_bytes", "Process RSS, sampled at load and unload"),
+            "input_overflows": REGISTRY.counter(
+                "stt_audio_input_overflows_total", "Audio blocks dropped because the callback ran late"),
+            "callback_jitter": REGISTRY.histogram(
+                "stt_audio_callback_jitter_seconds", "Deviation of audio callback spacing from the block length"),
+        }
+        self.metrics["model_load"].set(getattr(self.engine, "load_time", 0.0))
+        self.metrics["resident_memory"].set(resident_memory_bytes() or 0)
+        self.engine.on_reload = self.metrics["model_reload"].record
+        
+        self.metrics_exporter = None
+        if metrics_settings.get("enabled", True):
+            path = metrics_settings.get("path")
+            self.metrics_exporter = MetricsExporter(
+                REGISTRY,
+                http_port=metrics_settings.get("http_port"),
+                path=str(project_root / path) if path else None,
+                flush_interval=metrics_settings.get("flush_interval", 30.0)
+            ).start()
+    
+    def _init_idle_policy(self):
+        """Start the idle trimmer if idle.unload_after is set."""
+        idle_settings = self.settings.get("idle", {})
+        self.last_activity = time.monotonic()
+        self.unload_after = idle_settings.get("unload_after")
+        self.fallback_model = idle_settings.get("fallback_model")
+        self.engine.fallback_after = idle_settings.get("fallback_after", 1.0)
+        if not self.unload_after or not self.engine.reloadable:
+            return
+        interval = min(30.0, self.unload_after / 4)
+        threading.Thread(target=self._idle_loop, args=(interval,), name="idle-trimmer", daemon=True).start()
+    
+    def _idle_loop(self, interval):
+        while True:
+            time.sleep(interval)
+            quiet = time.monotonic() - self.last_activity
+            if (quiet >= self.unload_after and self.engine.resident_models()
+                    and not self.is_recording and not self.pipeline.pending()):
+                self.trim_memory(quiet)
+    
+    def trim_memory(self, quiet=0.0):
+        """Release the model (keeping the fallback, if any) and report RSS before/after."""
+        before = resident_memory_bytes()
+        released = ", ".join(self.engine.resident_models())
+        if not self.engine.unload(fallback_model=self.fallback_model):
+            return
+        after = resident_memory_bytes()
+        self.metrics["resident_memory"].set(after or 0)
+        kept = f", keeping {self.fallback_model}" if self.engine.fallback is not None else ""
+        if before and after:
+            print(f"💤 Idle for {quiet:.0f}s: released {released}{kept} "
+                  f"(RSS {before / 1e6:.0f} MB → {after / 1e6:.0f} MB)")
+        else:
+            print(f"💤 Idle for {quiet:.0f}s: released {released}{kept}")
+    
     def audio_callback(self, indata, frames, time_info, status):
         """Callback for sounddevice stream - appends audio chunks."""
-        if status:
-            pass # print(f"⚠ Audio callback status: {status}")
+        now = time.monotonic()
+        if self.last_callback_at is None:
+            # First call: this is PortAudio's thread; never restrict it
+            self.cpu_guard.protect_current_thread()
+        else:
+            self.metrics["callback_jitter"].record(abs(now - self.last_callback_at - frames / self.sample_rate))
+        self.last_callback_at = now
+        if status and status.input_overflow:
+            self.input_overflows += 1
+            self.metrics["input_overflows"].inc()
         
         # Only append if recording active
         if self.is_recording:
             self.audio_data.append(indata.copy())
+            if self.awaiting_first_audio:
+                self.awaiting_first_audio = False
+                self.trace.mark("first_audio_block")
+        elif self.tail_target is not None and time.monotonic() < self.tail_until:
+            # Still capturing the tail of the previous recording
+            self.tail_target.append(indata.copy())
         else:
             # Keep filling pre-roll buffer when not recording
             self.pre_roll_buffer.append(indata.copy())
@@ -103,6 +301,16 @@ class ErikSTT:
         if self.is_recording:
             return  # Already recording
         
+        self.last_activity = time.monotonic()
+        
+        if self.preempt and self.pipeline.cancel_current("preempted by new dictation",
+                                                         stage="decode", min_age=self.preempt_after):
+            print("⏭ Preempting stale transcription")
+        
+        # New trace for this dictation, anchored at the hotkey press
+        self.trace = self.tracer.new_trace()
+        self.trace.mark("hotkey_press", ts=self.hotkey_at)
+        
         # Clear previous audio data
         self.audio_data = []
         
@@ -110,121 +318,311 @@ class ErikSTT:
         if self.pre_roll_buffer:
             self.audio_data.extend(self.pre_roll_buffer)
             
+        self.recording_started_at = time.monotonic()
+        self.awaiting_first_audio = True
         self.is_recording = True
+        self.cpu_guard.recording_started()
         
         # Capture the active app immediately when recording starts
-        self.target_app = get_active_app()
+        with self.trace.timed("target_app_lookup"):
+            self.target_app = self.injector.backend.frontmost_app()
+        self.trace.meta["target_app"] = self.target_app
         print(f"🎯 Target App: {self.target_app}")
         
+        # Pick the app's profile; if its model isn't resident (another
+        # profile's model, or released while idle) load it while the user speaks
+        self.profile = self.profiles.for_app(self.target_app)
+        self.trace.meta["profile"] = self.profile.name
+        self.engine.load_async(self.profile.model)
+        if self.profile.name != "default":
+            print(f"🧩 Profile: {self.profile.name}")
+        
         print("🎤 Recording...")
     
     def stop_recording(self, **kwargs):
-        """Stop recording and process the audio."""
+        """
+        Stop recording and queue the audio for transcription.
+        
+        Returns immediately; the tail of the audio keeps being captured into
+        the queued job for tail_seconds, and the assemble stage waits for it.
+        Keyword arguments (on_transcription_complete, on_complete) are the
+        same callbacks process_audio accepts.
+        """
         if not self.is_recording:
             return  # Not recording
         
-        # Wait a moment to capture the tail of the audio
-        time.sleep(0.5)
-        
+        # Hand the live chunk list to the callback's tail path
+        stopped_at = time.monotonic()
+        self.tail_target = self.audio_data
+        self.tail_until = stopped_at + self.tail_seconds
         self.is_recording = False
+        self.cpu_guard.recording_stopped()
         print("⏹ Stopped")
         
-        # Process the recorded audio
-        self.process_audio(**kwargs)
+        self.trace.mark("hotkey_stop", ts=self.hotkey_at)
+        self.trace.span("recording", self.recording_started_at, stopped_at)
+        
+        job = DictationJob(
+            self.audio_data,
+            target_app=self.target_app,
+            ready_at=self.tail_until,
+            callbacks=kwargs,
+            trace=self.trace,
+            profile=self.profile
+        )
+        if not self.pipeline.submit(job) and kwargs.get("on_complete"):
+            kwargs["on_complete"]()
     
-    def process_audio(self, on_transcription_complete=None):
+    def cancel(self):
         """
-        Transcribe, process, and inject the recorded audio.
-        
-        Args:
-            on_transcription_complete: Optional callback to run after transcription 
-                                     but BEFORE injection (e.g., to hide UI).
+        Cancel hotkey: discard the recording in progress, or drop the
+        in-flight transcription and everything queued behind it.
         """
-        if not self.audio_data:
-            print("⚠ No audio data recorded")
+        if self.is_recording:
+            self.is_recording = False
+            self.cpu_guard.recording_stopped()
+            self.audio_data = []
+            print("🚫 Recording discarded")
+            self.trace.meta["outcome"] = "discarded"
+            self.tracer.write(self.trace)
             return
         
-        start_time = time.time()
+        count = self.pipeline.cancel_all("cancel hotkey")
+        if count:
+            print(f"🚫 Cancelling {count} dictation(s)")
+        else:
+            print("Nothing to cancel")
+    
+    # ------------------------------------------------------------------
+    # Pipeline stages: assemble → decode → post_process → inject.
+    # Each takes a DictationJob and stores its output on it. VAD runs inside
+    # the decode stage (faster-whisper's vad_filter).
+    # ------------------------------------------------------------------
+    
+    def _profile_key(self, job):
+        return job.trace.trace_id or f"job{id(job):x}"
+    
+    def _stage_assemble(self, job):
+        """Wait for the tail, then concatenate the chunks into a temp WAV (or array)."""
+        import numpy as np
+        import scipy.io.wavfile as wav
         
-        try:
-            # Concatenate all audio chunks
-            audio_array = np.concatenate(self.audio_data, axis=0)
+        remaining = job.ready_at - time.monotonic()
+        if remaining > 0:
+            with job.trace.timed("tail_wait"):
+                time.sleep(remaining)
+        
+        if not job.audio_chunks:
+            raise ValueError("No audio data recorded")
+        
+        if self.profiler:
+            self.profiler.begin(self._profile_key(job))
+            job.profiling = True
+        
+        # Concatenate all audio chunks
+        with job.trace.timed("buffer_assembly", chunks=len(job.audio_chunks)):
+            audio_array = np.concatenate(list(job.audio_chunks), axis=0)
             
             # Flatten if needed
             if audio_array.ndim > 1:
                 audio_array = audio_array.flatten()
+        
+        job.audio_duration = len(audio_array) / self.sample_rate
+        print(f"⏱ Recorded Audio Duration: {job.audio_duration:.2f}s")
+        
+        # The isolated worker reads the samples from shared memory; no WAV needed
+        if self.isolated:
+            job.audio = audio_array
+            return
+        
+        # Save to temporary WAV file
+        with job.trace.timed("wav_write"), \
+                tempfile.NamedTemporaryFile(suffix='.wav', delete=False) as temp_file:
+            job.temp_path = temp_file.name
             
-            # Save to temporary WAV file
-            with tempfile.NamedTemporaryFile(suffix='.wav', delete=False) as temp_file:
-                temp_path = temp_file.name
-                
-                # Convert to int16 for WAV
-                audio_int16 = (audio_array * 32767).astype(np.int16)
-                wav.write(temp_path, self.sample_rate, audio_int16)
-                
-                print(f"💾 Saved audio to {temp_path}")
-                
-                # Debug: Audio Duration
-                duration_sec = len(audio_array) / self.sample_rate
-                print(f"⏱ Recorded Audio Duration: {duration_sec:.2f}s")
-                
-                # Transcribe with custom vocabulary
-                print("🔊 Transcribing...")
-                result = self.engine.transcribe(
-                    temp_path,
-                    language="en",
-                    custom_vocab=self.custom_vocab,
-                    beam_size=self.settings.get("whisper", {}).get("beam_size", 5)
-                )
-                
-                raw_text = result['text']
-                print(f"📝 Raw transcription: {raw_text}")
-                
-                # Apply post-processing based on mode
-                if self.mode == "raw":
-                    processed_text = process_mode_a(raw_text, self.replacements)
-                else:  # mode == "formatted"
-                    processed_text = process_mode_b(raw_text, self.replacements)
-                
-                print(f"✨ Processed text: {processed_text}")
-                
-                # Run callback if provided (e.g., to hide bubble)
-                if on_transcription_complete:
-                    on_transcription_complete()
-                    # Give the UI thread a moment to actually hide the window
-                    time.sleep(0.2)
-                
-                # Inject text using clipboard-first method with AppleScript fallback
-                # restore_app ensures focus is back on the target before pasting
-                print("💉 Injecting text...")
-                success = inject_text(processed_text, restore_app=self.target_app)
-                
-                if success:
-                    print("✓ Text injection completed successfully")
-                else:
-                    print("✗ Text injection failed")
-                
-                # Calculate total latency
-                total_time = time.time() - start_time
-                print(f"⏱ Total latency: {total_time:.2f}s (inference: {result['inference_time']:.2f}s)")
-                
+            # Convert to int16 for WAV
+            audio_int16 = (audio_array * 32767).astype(np.int16)
+            wav.write(job.temp_path, self.sample_rate, audio_int16)
+        
+        print(f"💾 Saved audio to {job.temp_path}")
+    
+    def _stage_decode(self, job):
+        """Transcribe the assembled audio (cancellable between segments)."""
+        self.cpu_guard.add_inference_thread()
+        print("🔊 Transcribing...")
+        # CTranslate2 may start (OpenMP) threads on the first decode
+        with self.cpu_guard.spawning():
+            job.result = self.engine.transcribe(
+                job.audio if job.audio is not None else job.temp_path,
+                language="en",
+                custom_vocab=self.custom_vocab,
+                beam_size=job.profile.beam_size,
+                cancel_token=job.token,
+                trace=job.trace,
+                model_name=job.profile.model
+            )
+        print(f"📝 Raw transcription: {job.result['text']}")
+    
+    def _stage_post_process(self, job):
+        """Apply post-processing based on mode."""
+        raw_text = job.result['text']
+        # Profiles can pin a mode; otherwise follow the menu bar toggle
+        mode = job.profile.mode or self.mode
+        if mode == "raw":
+            job.processed_text = process_mode_a(raw_text, job.profile.replacements)
+        else:  # mode == "formatted"
+            job.processed_text = process_mode_b(raw_text, job.profile.replacements)
+        
+        print(f"✨ Processed text: {job.processed_text}")
+    
+    def _stage_inject(self, job):
+        """Inject the processed text into the target app."""
+        # Last chance to drop the dictation before anything is typed
+        job.token.raise_if_cancelled()
+        
+        # Run callback if provided (e.g., to hide bubble)
+        # The callback returns once the UI has actually updated
+        on_transcription_complete = job.callbacks.get("on_transcription_complete")
+        if on_transcription_complete:
+            with job.trace.timed("ui_callback"):
+                on_transcription_complete()
+        
+        # Inject text using clipboard-first method with AppleScript fallback
+        # restore_app ensures focus is back on the target before pasting
+        print("💉 Injecting text...")
+        job.success = self.injector.inject(
+            job.processed_text, restore_app=job.target_app, trace=job.trace
+        )
+        job.trace.mark("text_injected", success=job.success)
+        
+        self.metrics["stop_to_text"].record(time.monotonic() - job.enqueued_at)
+        if not job.success:
+            self.metrics["injection_failures"].inc()
+        
+        if job.success:
+            print("✓ Text injection completed successfully")
+        else:
+            print("✗ Text injection failed")
+        
+        waits = ", ".join(
+            f"{step}={waited*1000:.0f}ms" for step, waited in self.injector.last_timings.items()
+        )
+        if waits:
+            print(f"⏱ Injection waits: {waits}")
+        
+        # Calculate total latency
+        total_time = time.monotonic() - job.started_at
+        print(f"⏱ Total latency: {total_time:.2f}s (inference: {job.result['inference_time']:.2f}s)")
+    
+    def _finish_job_async(self, job):
+        """Pipeline on_finish hook (event loop thread): run _finish_job on the finisher thread."""
+        self.pipeline.loop.run_in_executor(self._finisher, self._finish_job_logged, job)
+
+    def _finish_job_logged(self, job):
+        try:
+            self._finish_job(job)
         except Exception as e:
+            print(f"⚠ Dictation cleanup failed: {e}")
+
+    def _finish_job(self, job):
+        """Runs once per job however it ended: clean up and notify."""
+        self.last_activity = time.monotonic()
+        # Clean up temp file
+        try:
+            import os
+            if job.temp_path:
+                os.unlink(job.temp_path)
+                print(f"🗑 Cleaned up {job.temp_path}")
+        except Exception as e:
+            print(f"⚠ Could not delete temp file: {e}")
+        
+        # Write the trace with its outcome
+        if job.token.is_cancelled:
+            outcome = "cancelled"
+        elif job.error is not None:
+            outcome = "error"
+        else:
+            outcome = "injected" if job.success else "injection_failed"
+        job.trace.meta["outcome"] = outcome
+        if job.result:
+            job.trace.meta["audio_duration"] = job.result.get("duration")
+            job.trace.meta["inference_time"] = job.result.get("inference_time")
+        self.tracer.write(job.trace)
+        
+        # Metrics
+        REGISTRY.counter("stt_dictations_total", "Dictations by outcome",
+                         labels={"outcome": outcome}).inc()
+        if job.started_at is not None and job.enqueued_at is not None:
+            self.metrics["queue_wait"].record(job.started_at - job.enqueued_at)
+        if job.result:
+            self.metrics["inference"].record(job.result["inference_time"])
+            if job.result.get("duration"):
+                self.metrics["rtf"].record(job.result["inference_time"] / job.result["duration"])
+        
+        # Keep profiles of slow dictations (stop → finished); jobs cancelled
+        # before assemble or with no audio never opened a session
+        if self.profiler and job.profiling:
+            self.profiler.end(self._profile_key(job), time.monotonic() - job.enqueued_at)
+        
+        on_complete = job.callbacks.get("on_complete")
+        if on_complete:
+            on_complete()
+    
+    def process_audio(self, on_transcription_complete=None, on_complete=None,
+                      audio_data=None, target_app=None, cancel_token=None):
+        """
+        Transcribe, process, and inject the recorded audio synchronously,
+        running the pipeline stages back to back on the calling thread.
+        
+        Args:
+            on_transcription_complete: Optional callback to run after transcription 
+                                     but BEFORE injection (e.g., to hide UI).
+            on_complete: Optional callback to run once the dictation is finished
+                         (successfully or not).
+            audio_data: Audio chunks to process (default: the last recording)
+            target_app: App to refocus before injection (default: the last target)
+            cancel_token: Optional CancellationToken; a cancelled job is never injected
+        """
+        target_app = self.target_app if target_app is None else target_app
+        job = DictationJob(
+            self.audio_data if audio_data is None else audio_data,
+            target_app=target_app,
+            callbacks={
+                "on_transcription_complete": on_transcription_complete,
+                "on_complete": on_complete,
+            },
+            trace=self.tracer.new_trace(),
+            profile=self.profiles.for_app(target_app)
+        )
+        if cancel_token is not None:
+            job.token = cancel_token
+        job.started_at = job.enqueued_at = time.monotonic()
+        
+        if not job.audio_chunks:
+            print("⚠ No audio data recorded")
+            self._finish_job(job)
+            return
+        
+        try:
+            for stage in self.stages:
+                with job.trace.timed(stage.name):
+                    stage.func(job)
+        
+        except TranscriptionCancelled as e:
+            print(f"🚫 Transcription cancelled ({e})")
+        
+        except Exception as e:
+            job.error = e
             print(f"✗ Error processing audio: {e}")
             import traceback
             traceback.print_exc()
         
         finally:
-            # Clean up temp file
-            try:
-                import os
-                if 'temp_path' in locals():
-                    os.unlink(temp_path)
-                    print(f"🗑 Cleaned up {temp_path}")
-            except Exception as e:
-                print(f"⚠ Could not delete temp file: {e}")
+            self._finish_job(job)
     
     def _is_option_key(self, key):
         """Check if the key is Option (Alt) key."""
+        from pynput import keyboard
         return key in (keyboard.Key.alt, keyboard.Key.alt_l, keyboard.Key.alt_r,
                        keyboard.Key.alt_gr)
     
@@ -236,7 +634,13 @@ class ErikSTT:
         return key
     
     def _check_hotkey(self):
-        """Check if Option+Space hotkey is active and toggle recording."""
+        """Check for Option+Space (toggle recording) or Option+Esc (cancel)."""
+        from pynput import keyboard
+        self.hotkey_at = time.monotonic()
+        if 'option' in self.pressed_keys and keyboard.Key.esc in self.pressed_keys:
+            self.cancel_combo_used = True
+            self.cancel()
+            return
         if 'option' in self.pressed_keys and keyboard.Key.space in self.pressed_keys:
             if self.is_recording:
                 # Already recording → stop and transcribe
@@ -261,12 +665,16 @@ class ErikSTT:
     
     def on_release(self, key):
         """Handle key release events."""
+        from pynput import keyboard
         # Remove key from pressed set
         normalized = self._normalize_key(key)
         self.pressed_keys.discard(normalized)
         
-        # Check for ESC to exit
+        # Check for ESC to exit (but not when it was part of Option+Esc cancel)
         if key == keyboard.Key.esc:
+            if self.cancel_combo_used:
+                self.cancel_combo_used = False
+                return
             print("\n👋 Exiting...")
             return False  # Stop listener
     
@@ -278,6 +686,7 @@ class ErikSTT:
         print("\n📋 INSTRUCTIONS:")
         print("   • Press Option+Space to START recording")
         print("   • Press Option+Space again to STOP and transcribe")
+        print("   • Press Option+Esc to CANCEL a recording or transcription")
         print("   • Press ESC to exit")
         print("   • Make sure target app is focused before stopping\n")
         print("Mode: {} (using {})".format(
@@ -287,14 +696,37 @@ class ErikSTT:
         print("\nListening for hotkeys...\n")
         
         # Create listener
+        from pynput import keyboard
         self.listener = keyboard.Listener(
             on_press=self.on_press,
             on_release=self.on_release
         )
         self.listener.start()
         
+        # Time from construction to accepting hotkeys (benchmark_startup.py waits for this line)
+        startup = time.monotonic() - self.init_started
+        REGISTRY.gauge("stt_startup_seconds", "Construction to hotkey listener ready").set(startup)
+        print(f"✓ Hotkey listener ready ({startup:.2f}s after startup)")
+        
         if blocking:
             self.listener.join()
+            # Let queued dictations finish before exiting
+            self.pipeline.stop()
+            self._finisher.shutdown(wait=True)
+            self.cpu_guard.release()
+            if self.isolated:
+                self.engine.close()
+            if self.metrics_exporter:
+                self.metrics_exporter.stop()
+            stats = self.pipeline.stats()
+            if self.input_overflows:
+                print(f"⚠ Audio input overflows: {self.input_overflows}")
+            print(f"📊 Queue: {stats['completed']} done, {stats['cancelled']} cancelled, "
+                  f"{stats['failed']} failed, {stats['dropped']} dropped, "
+                  f"max depth {stats['max_depth']}, avg wait {stats['avg_wait']:.2f}s")
+            for name, stage in stats["stages"].items():
+                print(f"   {name:<13} avg {stage['avg_service']*1000:.0f}ms, "
+                      f"max depth {stage['max_depth']}, backpressure {stage['backpressure']:.2f}s")
             print("✓ Application stopped")
 
     def run(self):
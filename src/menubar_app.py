@@ -5,13 +5,10 @@ Wraps the main STT logic in a macOS menu bar app using rumps.
 """
 
 import rumps
-import threading
 import time
 from src.main import ErikSTT
 # Import the new UI module
 from src.ui.bubble import StatusBubble
-# Import AppKit to run blocking updates on main thread if needed
-import AppKit
 
 class ErikSTTApp(rumps.App):
     def __init__(self):
@@ -26,9 +23,11 @@ class ErikSTTApp(rumps.App):
         # Override the STT state callbacks to update UI
         self.original_start = self.stt.start_recording
         self.original_stop = self.stt.stop_recording
+        self.original_cancel = self.stt.cancel
         
         self.stt.start_recording = self.wrapped_start_recording
         self.stt.stop_recording = self.wrapped_stop_recording
+        self.stt.cancel = self.wrapped_cancel
         
         # Setup Menu
         self.setup_menu()
@@ -41,6 +40,7 @@ class ErikSTTApp(rumps.App):
             rumps.MenuItem("Status: Idle"),
             rumps.separator,
             rumps.MenuItem("Mode: Raw", callback=self.toggle_mode),
+            rumps.MenuItem("Cancel (⌥Esc)", callback=self.cancel_clicked),
             rumps.separator,
             # Quit is added automatically by rumps, but we can customize if needed
         ]
@@ -87,24 +87,50 @@ class ErikSTTApp(rumps.App):
         # Update Bubble
         self.bubble.show("🧠 Transcribing...")
         
-        # Run processing in a separate thread so we don't block the UI
-        threading.Thread(target=self.run_processing_thread).start()
+        # Queue the dictation on the STT pipeline (returns immediately).
+        # self.bubble.hide runs BEFORE text injection; on_complete resets the UI.
+        self.original_stop(
+            on_transcription_complete=self.bubble.hide,
+            on_complete=self.on_dictation_complete
+        )
 
-    def run_processing_thread(self):
-        """Run the blocking processing logic in a background thread."""
-        # This blocks for ~5s while Whisper runs
-        # We pass self.bubble.hide as a callback so it runs BEFORE text injection
-        self.original_stop(on_transcription_complete=self.bubble.hide)
-        
-        # Reset UI on the main thread
+    def wrapped_cancel(self):
+        """Wrapper to update UI when a recording or transcription is cancelled."""
+        was_recording = self.stt.is_recording
+        self.original_cancel()
+        
+        if was_recording:
+            # Discarded recordings never reach the queue, so reset here
+            if self.stt.pipeline.pending():
+                self.title = "🧠 Transcribing..."
+                self.menu["Status: Idle"].title = "Status: Transcribing..."
+                self.bubble.show("🧠 Transcribing...")
+            else:
+                self.bubble.hide()
+                self.title = "🎙️"
+                self.menu["Status: Idle"].title = "Status: Idle"
+        # Cancelled jobs reset the UI through on_complete
+
+    def cancel_clicked(self, sender):
+        """Menu item handler for Cancel."""
+        self.stt.cancel()
+
+    def on_dictation_complete(self):
+        """Reset the UI after a dictation, unless more work is in flight."""
         # Note: self.title update is theoretically unsafe from background thread in standard Cocoa/PyObjC
         # but rumps seems to handle it or tolerate it. 
-        
-        # Reset Menubar
-        self.title = "🎙️"
-        self.menu["Status: Idle"].title = "Status: Idle"
-        
-        # Bubble is already hidden by the callback passed to original_stop
+        if self.stt.is_recording:
+            # A newer dictation started while this one was processing
+            self.title = "🔴 Recording..."
+            self.menu["Status: Idle"].title = "Status: Recording..."
+            self.bubble.show("🔴 Recording...")
+        elif self.stt.pipeline.pending():
+            # More dictations queued behind this one
+            self.bubble.show("🧠 Transcribing...")
+        else:
+            # Reset Menubar
+            self.title = "🎙️"
+            self.menu["Status: Idle"].title = "Status: Idle"
 
 if __name__ == "__main__":
     # Run the app
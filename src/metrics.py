@@ -0,0 +1,297 @@
+#!/usr/bin/env python3
+"""
+In-process metrics registry for long-running deployments.
+
+Counters, gauges and HDR-style (log-linear) histograms. Recording a value is
+a couple of float ops plus a list increment, so it is cheap enough for the
+hot path. Metrics are exposed in Prometheus text format, either over a local
+HTTP endpoint or by periodically flushing to a file (e.g. for the
+node_exporter textfile collector).
+
+    from src.metrics import REGISTRY
+    REGISTRY.histogram("stt_stop_to_text_seconds", "Hotkey stop to injected text").record(1.2)
+    print(REGISTRY.render())
+"""
+
+import math
+import os
+import subprocess
+import threading
+import time
+
+
+def _label_key(labels):
+    return tuple(sorted((labels or {}).items()))
+
+
+def _format_labels(labels, extra=None):
+    items = list(labels) + list((extra or {}).items())
+    if not items:
+        return ""
+    body = ",".join(f'{k}="{str(v)}"' for k, v in items)
+    return "{" + body + "}"
+
+
+class Counter:
+    """Monotonically increasing count."""
+
+    def __init__(self):
+        self.value = 0.0
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1.0):
+        with self._lock:
+            self.value += amount
+
+
+class Gauge:
+    """Value that can go up and down (last write wins)."""
+
+    def __init__(self):
+        self.value = 0.0
+
+    def set(self, value):
+        self.value = float(value)
+
+
+class Histogram:
+    """
+    HDR-style log-linear histogram.
+
+    Each power of two above `lowest` is split into `sub_buckets` linear
+    buckets, so quantiles are accurate to within 1/(2*sub_buckets) relative
+    error (about 1.6% with the default 32) across the whole range, at a
+    fixed memory cost.
+    """
+
+    QUANTILES = (0.5, 0.95, 0.99)
+
+    def __init__(self, lowest=1e-6, highest=1e4, sub_buckets=32):
+        self.lowest = lowest
+        self.highest = highest
+        self.sub_buckets = sub_buckets
+        exponents = int(math.ceil(math.log2(highest / lowest))) + 1
+        self.counts = [0] * (exponents * sub_buckets + 1)  # +1: underflow bucket 0
+        self.count = 0
+        self.sum = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+        self._lock = threading.Lock()
+
+    def _index(self, value):
+        if value < self.lowest:
+            return 0
+        value = min(value, self.highest)
+        mantissa, exponent = math.frexp(value / self.lowest)  # mantissa in [0.5, 1)
+        sub = int((mantissa * 2.0 - 1.0) * self.sub_buckets)
+        return 1 + (exponent - 1) * self.sub_buckets + sub
+
+    def _bucket_value(self, index):
+        """Midpoint of a bucket."""
+        if index == 0:
+            return 0.0
+        exponent, sub = divmod(index - 1, self.sub_buckets)
+        return self.lowest * (2.0 ** exponent) * (1.0 + (sub + 0.5) / self.sub_buckets)
+
+    def record(self, value):
+        index = self._index(value)
+        with self._lock:
+            self.counts[index] += 1
+            self.count += 1
+            self.sum += value
+            if value < self.min:
+                self.min = value
+            if value > self.max:
+                self.max = value
+
+    def quantile(self, q):
+        """Approximate value at quantile q (0..1); 0.0 if empty."""
+        with self._lock:
+            if self.count == 0:
+                return 0.0
+            target = max(1, int(math.ceil(q * self.count)))
+            seen = 0
+            for index, n in enumerate(self.counts):
+                seen += n
+                if seen >= target:
+                    # Clamp to observed range so p100/p0 are exact
+                    return min(max(self._bucket_value(index), self.min), self.max)
+        return self.max
+
+    def snapshot(self):
+        return {
+            "count": self.count,
+            "sum": self.sum,
+            "min": self.min if self.count else 0.0,
+            "max": self.max if self.count else 0.0,
+            **{f"p{int(q * 100)}": self.quantile(q) for q in self.QUANTILES},
+        }
+
+
+class MetricsRegistry:
+    """Named metric families, each keyed by a label set."""
+
+    def __init__(self):
+        self._families = {}  # name -> (kind, help, {label_key: metric})
+        self._lock = threading.Lock()
+
+    def _get(self, kind, name, help_text, labels, factory):
+        key = _label_key(labels)
+        family = self._families.get(name)
+        if family is None or key not in family[2]:
+            with self._lock:
+                family = self._families.setdefault(name, (kind, help_text, {}))
+                if family[0] != kind:
+                    raise ValueError(f"Metric {name} already registered as {family[0]}")
+                family[2].setdefault(key, factory())
+        return family[2][key]
+
+    def counter(self, name, help_text="", labels=None):
+        return self._get("counter", name, help_text, labels, Counter)
+
+    def gauge(self, name, help_text="", labels=None):
+        return self._get("gauge", name, help_text, labels, Gauge)
+
+    def histogram(self, name, help_text="", labels=None, **kwargs):
+        return self._get("summary", name, help_text, labels, lambda: Histogram(**kwargs))
+
+    def snapshot(self):
+        """Plain-dict view of every metric (for JSON reports)."""
+        out = {}
+        for name, (kind, _, metrics) in list(self._families.items()):
+            for key, metric in list(metrics.items()):
+                label = name + _format_labels(key)
+                out[label] = metric.snapshot() if kind == "summary" else metric.value
+        return out
+
+    def render(self):
+        """Render all metrics in Prometheus text exposition format."""
+        lines = []
+        for name, (kind, help_text, metrics) in sorted(self._families.items()):
+            if help_text:
+                lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+            for key, metric in sorted(metrics.items()):
+                if kind == "summary":
+                    for q in Histogram.QUANTILES:
+                        lines.append(f"{name}{_format_labels(key, {'quantile': q})} {metric.quantile(q):.6g}")
+                    lines.append(f"{name}_sum{_format_labels(key)} {metric.sum:.6g}")
+                    lines.append(f"{name}_count{_format_labels(key)} {metric.count}")
+                else:
+                    lines.append(f"{name}{_format_labels(key)} {metric.value:.6g}")
+        return "\n".join(lines) + "\n"
+
+
+def resident_memory_bytes():
+    """Current resident set size of this process in bytes, or None if unknown."""
+    try:
+        import psutil
+        return psutil.Process().memory_info().rss
+    except ImportError:
+        pass
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError):
+        pass
+    try:
+        # macOS without psutil: ps reports RSS in KiB
+        out = subprocess.run(["ps", "-o", "rss=", "-p", str(os.getpid())],
+                             capture_output=True, text=True, check=True).stdout
+        return int(out.strip()) * 1024
+    except (OSError, ValueError, subprocess.CalledProcessError):
+        return None
+
+
+# Shared default registry
+REGISTRY = MetricsRegistry()
+
+
+class MetricsExporter:
+    """
+    Exposes a registry via a local HTTP endpoint and/or a periodically
+    flushed file. Both run on daemon threads.
+    """
+
+    def __init__(self, registry=REGISTRY, http_port=None, path=None, flush_interval=30.0):
+        self.registry = registry
+        self.http_port = http_port
+        self.path = path
+        self.flush_interval = flush_interval
+        self._server = None
+        self._stop = threading.Event()
+
+    def start(self):
+        if self.http_port:
+            self._start_http()
+        if self.path:
+            threading.Thread(target=self._flush_loop, name="metrics-flush", daemon=True).start()
+        return self
+
+    def _start_http(self):
+        from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+        registry = self.registry
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path not in ("/", "/metrics"):
+                    self.send_error(404)
+                    return
+                body = registry.render().encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass  # Keep scrapes out of the console
+
+        try:
+            # Localhost only
+            self._server = ThreadingHTTPServer(("127.0.0.1", self.http_port), Handler)
+        except OSError as e:
+            print(f"⚠ Could not start metrics endpoint on port {self.http_port}: {e}")
+            return
+        threading.Thread(target=self._server.serve_forever, name="metrics-http", daemon=True).start()
+        print(f"📈 Metrics at http://127.0.0.1:{self.http_port}/metrics")
+
+    def flush(self):
+        """Write the current metrics atomically (write temp file, then rename)."""
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w") as f:
+            f.write(self.registry.render())
+        os.replace(tmp_path, self.path)
+
+    def _flush_loop(self):
+        while not self._stop.wait(self.flush_interval):
+            try:
+                self.flush()
+            except OSError as e:
+                print(f"⚠ Could not flush metrics to {self.path}: {e}")
+
+    def stop(self):
+        self._stop.set()
+        if self.path:
+            try:
+                self.flush()
+            except OSError as e:
+                print(f"⚠ Could not flush metrics to {self.path}: {e}")
+        if self._server:
+            self._server.shutdown()
+
+
+if __name__ == "__main__":
+    # Overhead check: cost per histogram record
+    hist = Histogram()
+    n = 200_000
+    t0 = time.perf_counter()
+    for i in range(n):
+        hist.record((i % 1000) * 0.001 + 0.0005)
+    elapsed = time.perf_counter() - t0
+    print(f"Histogram.record: {elapsed / n * 1e9:.0f}ns per call")
+    print(f"p50={hist.quantile(0.5):.4f} p95={hist.quantile(0.95):.4f} p99={hist.quantile(0.99):.4f}")
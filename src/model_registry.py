@@ -0,0 +1,183 @@
+"""
+Local registry of downloaded CTranslate2 Whisper models.
+
+Maps model names (as used in settings.yaml, e.g. "distil-small.en") to
+directories on disk, with per-file sizes and SHA-256 checksums plus load-time
+and resident-memory metadata per compute type. The engine loads models by direct path from here,
+so startup never resolves names through the Hugging Face hub/cache.
+
+Filled by pre_download_model.py. The main process and the isolated
+inference worker both record load stats, so every write re-reads the file
+under an exclusive lock (registry.lock) and replaces it atomically.
+"""
+
+import fcntl
+import hashlib
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+DEFAULT_MODELS_DIR = PROJECT_ROOT / "models"
+DEFAULT_REGISTRY = DEFAULT_MODELS_DIR / "registry.json"
+
+# Files a CTranslate2 Whisper model directory can't load without
+REQUIRED_FILES = ("model.bin", "config.json")
+# Load stats are only rewritten when they move by more than this fraction
+LOAD_STAT_TOLERANCE = 0.1
+
+
+class ModelNotAvailable(RuntimeError):
+    """The requested model isn't registered, or its files are missing/corrupt."""
+
+
+def sha256_file(path, block_size=1 << 20):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(block_size), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class ModelRegistry:
+    """JSON-backed name → model directory mapping (thread-safe writes)."""
+
+    def __init__(self, path=DEFAULT_REGISTRY):
+        self.path = Path(path)
+        self._lock = threading.Lock()
+        self.models = {}
+        self._reload()
+
+    def _reload(self):
+        if self.path.exists():
+            with open(self.path) as f:
+                self.models = json.load(f).get("models", {})
+
+    @contextmanager
+    def _file_lock(self):
+        """Exclusive lock across processes for a read-modify-write of the file."""
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with open(self.path.with_suffix(".lock"), "a") as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock, fcntl.LOCK_UN)
+
+    def _save(self):
+        tmp_path = self.path.with_name(f"{self.path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+        with open(tmp_path, "w") as f:
+            json.dump({"models": self.models}, f, indent=2, sort_keys=True)
+        os.replace(tmp_path, self.path)
+
+    def _directory(self, entry):
+        # Paths inside the registry's directory are stored relative to it
+        path = Path(entry["path"])
+        return path if path.is_absolute() else self.path.parent / path
+
+    def register(self, name, directory, source=None):
+        """Hash every file in directory and record it under name."""
+        directory = Path(directory).resolve()
+        missing = [f for f in REQUIRED_FILES if not (directory / f).exists()]
+        if missing:
+            raise ModelNotAvailable(f"{directory} is not a CTranslate2 model (missing {', '.join(missing)})")
+
+        files = {}
+        for file_path in sorted(directory.rglob("*")):
+            if file_path.is_file():
+                files[str(file_path.relative_to(directory))] = {
+                    "size": file_path.stat().st_size,
+                    "sha256": sha256_file(file_path),
+                }
+        try:
+            stored_path = str(directory.relative_to(self.path.parent.resolve()))
+        except ValueError:
+            stored_path = str(directory)
+
+        with self._lock, self._file_lock():
+            self._reload()      # Keep other processes' updates
+            previous = self.models.get(name, {})
+            self.models[name] = {
+                "path": stored_path,
+                "source": source or previous.get("source", name),
+                "files": files,
+                "size_bytes": sum(f["size"] for f in files.values()),
+                "registered_at": time.time(),
+                "load_times": previous.get("load_times", {}),
+                "resident_bytes": previous.get("resident_bytes", {}),
+            }
+            self._save()
+        return self.models[name]
+
+    def resolve(self, name, full_check=False):
+        """
+        Return the model directory for name, checking that its files are
+        present with the recorded sizes (and checksums if full_check).
+        Raises ModelNotAvailable instead of falling back to a download.
+        """
+        entry = self.models.get(name)
+        if entry is None:
+            raise ModelNotAvailable(
+                f"Model '{name}' is not in the registry ({self.path}). "
+                f"Run: python pre_download_model.py --model {name}"
+            )
+        directory = self._directory(entry)
+        problems = self.check(name, full_check=full_check)
+        if problems:
+            raise ModelNotAvailable(
+                f"Model '{name}' at {directory} failed verification ({'; '.join(problems[:3])}). "
+                f"Re-run: python pre_download_model.py --model {name}"
+            )
+        return str(directory)
+
+    def check(self, name, full_check=False):
+        """List problems with a registered model's files (empty if it is intact)."""
+        entry = self.models[name]
+        directory = self._directory(entry)
+        problems = []
+        for rel_path, meta in entry["files"].items():
+            file_path = directory / rel_path
+            try:
+                size = file_path.stat().st_size
+            except OSError:
+                problems.append(f"{rel_path} missing")
+                continue
+            if size != meta["size"]:
+                problems.append(f"{rel_path} is {size} bytes, expected {meta['size']}")
+            elif full_check and sha256_file(file_path) != meta["sha256"]:
+                problems.append(f"{rel_path} checksum mismatch")
+        return problems
+
+    def record_load(self, name, compute_type, seconds, resident_bytes=None):
+        """
+        Remember the load time (and resident size) of a model for a compute
+        type. The file is only rewritten when a stored value moves by more
+        than LOAD_STAT_TOLERANCE. Returns True if it was.
+        """
+        with self._lock:
+            entry = self.models.get(name)
+            if entry is None:
+                return False
+            updates = {}
+            if _changed(entry.get("load_times", {}).get(compute_type), seconds):
+                updates["load_times"] = round(seconds, 3)
+            if resident_bytes and _changed(entry.get("resident_bytes", {}).get(compute_type), resident_bytes):
+                updates["resident_bytes"] = int(resident_bytes)
+            if not updates:
+                return False
+            with self._file_lock():
+                self._reload()
+                entry = self.models.get(name)
+                if entry is None:
+                    return False
+                for key, value in updates.items():
+                    entry.setdefault(key, {})[compute_type] = value
+                self._save()
+        return True
+
+
+def _changed(stored, value):
+    return stored is None or abs(value - stored) > LOAD_STAT_TOLERANCE * stored
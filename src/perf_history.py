@@ -0,0 +1,363 @@
+#!/usr/bin/env python3
+"""
+Performance history: every test run's latency and accuracy, in SQLite.
+
+test_runner.py records each run here, tagged with the git commit, model,
+a hash of the settings that affect results and a fingerprint of the host,
+so runs are only compared with runs from the same machine.
+
+`compare` checks a candidate group of runs against a baseline group:
+
+- per test: latency and WER deltas, with a bootstrap confidence interval
+  for the latency delta when both sides have at least two samples;
+- corpus-wide, paired over the tests both sides ran: the mean latency
+  ratio and the mean WER delta, each with a bootstrap confidence interval.
+
+It exits 1 on a significant regression, where the interval lies entirely
+above zero and the change is bigger than the noise floor (--min-latency-pct,
+--min-wer-delta). It also exits 1 if the candidate's mean latency misses the
+target (--latency-target, default the 3000ms from the report).
+
+    python -m src.perf_history list
+    python -m src.perf_history compare                        # latest vs previous commit
+    python -m src.perf_history compare --baseline a1b2c3d --candidate latest
+    python -m src.perf_history show 42
+"""
+
+import argparse
+import hashlib
+import json
+import math
+import os
+import platform
+import random
+import sqlite3
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+DEFAULT_HISTORY = PROJECT_ROOT / "logs" / "perf_history.sqlite"
+
+BOOTSTRAP_SAMPLES = 2000
+CONFIDENCE = 0.95
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    started_at REAL NOT NULL,
+    git_commit TEXT,
+    git_dirty INTEGER,
+    model TEXT,
+    settings_hash TEXT,
+    host TEXT,
+    host_fingerprint TEXT,
+    notes TEXT
+);
+CREATE TABLE IF NOT EXISTS results (
+    run_id INTEGER NOT NULL REFERENCES runs(id),
+    test_name TEXT NOT NULL,
+    latency_ms REAL,
+    audio_duration_s REAL,
+    wer REAL,
+    cer REAL,
+    passed INTEGER,
+    error TEXT
+);
+CREATE INDEX IF NOT EXISTS results_run ON results(run_id);
+"""
+
+
+def git_revision(cwd=PROJECT_ROOT):
+    """(commit hash, has uncommitted changes), or (None, None) outside git."""
+    try:
+        commit = subprocess.run(["git", "rev-parse", "HEAD"], cwd=cwd, capture_output=True,
+                                text=True, check=True).stdout.strip()
+        status = subprocess.run(["git", "status", "--porcelain", "--untracked-files=no"], cwd=cwd,
+                                capture_output=True, text=True, check=True).stdout
+    except (OSError, subprocess.CalledProcessError):
+        return None, None
+    return commit, bool(status.strip())
+
+
+def host_fingerprint():
+    """Stable hash of what makes timings comparable: CPU, core count, memory, OS, Python."""
+    try:
+        memory = os.sysconf("SC_PAGE_SIZE") * os.sysconf("SC_PHYS_PAGES")
+    except (ValueError, OSError, AttributeError):
+        memory = None
+    parts = [platform.node(), platform.machine(), platform.processor(), platform.system(),
+             platform.release(), platform.python_version(), os.cpu_count(), memory]
+    return hashlib.sha256(json.dumps(parts, default=str).encode()).hexdigest()[:16]
+
+
+def mean(values):
+    return sum(values) / len(values)
+
+
+def _resample(samples, rng):
+    return [samples[rng.randrange(len(samples))] for _ in samples]
+
+
+def _interval(estimates, confidence):
+    estimates.sort()
+    tail = (1 - confidence) / 2
+    return estimates[int(tail * len(estimates))], estimates[min(len(estimates) - 1, int((1 - tail) * len(estimates)))]
+
+
+def bootstrap_ci(statistic, samples, rng, confidence=CONFIDENCE, n=BOOTSTRAP_SAMPLES):
+    """Percentile bootstrap interval of statistic(resample) for a list of samples."""
+    return _interval([statistic(_resample(samples, rng)) for _ in range(n)], confidence)
+
+
+def bootstrap_diff_ci(base, cand, rng, confidence=CONFIDENCE, n=BOOTSTRAP_SAMPLES):
+    """Percentile bootstrap interval of mean(cand) - mean(base), resampling each side."""
+    return _interval([mean(_resample(cand, rng)) - mean(_resample(base, rng)) for _ in range(n)], confidence)
+
+
+class PerfHistory:
+    """Run/result store. One connection per instance; not shared across threads."""
+
+    def __init__(self, path=DEFAULT_HISTORY):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.db = sqlite3.connect(str(self.path))
+        self.db.row_factory = sqlite3.Row
+        self.db.executescript(SCHEMA)
+
+    def close(self):
+        self.db.close()
+
+    def record_run(self, results, model, settings_hash, notes=None):
+        """Store one run's results (test_runner result dicts). Returns the run id."""
+        commit, dirty = git_revision()
+        with self.db:
+            cursor = self.db.execute(
+                "INSERT INTO runs (started_at, git_commit, git_dirty, model, settings_hash, host, "
+                "host_fingerprint, notes) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (time.time(), commit, dirty, model, settings_hash, platform.node(),
+                 host_fingerprint(), notes),
+            )
+            run_id = cursor.lastrowid
+            self.db.executemany(
+                "INSERT INTO results (run_id, test_name, latency_ms, audio_duration_s, wer, cer, "
+                "passed, error) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                [(run_id, r["test_name"], r.get("latency_ms"), r.get("audio_duration_s"),
+                  r.get("word_error_rate"), r.get("char_error_rate"), r.get("pass"), r.get("error"))
+                 for r in results],
+            )
+        return run_id
+
+    def runs(self, limit=None):
+        query = "SELECT runs.*, COUNT(results.test_name) AS tests FROM runs " \
+                "LEFT JOIN results ON results.run_id = runs.id GROUP BY runs.id ORDER BY runs.id DESC"
+        if limit:
+            query += f" LIMIT {int(limit)}"
+        return self.db.execute(query).fetchall()
+
+    def select(self, selector, relative_to=None):
+        """
+        Run ids for a selector: a run id, a commit prefix (every run of that
+        commit), "latest" (the newest run's commit/settings group) or
+        "previous" (the newest earlier group with the reference's settings and
+        model but a different commit). Only runs from the same host as the
+        reference run count.
+        """
+        rows = self.db.execute("SELECT * FROM runs ORDER BY id DESC").fetchall()
+        if not rows:
+            return []
+        if selector.isdigit():
+            return [int(selector)] if any(r["id"] == int(selector) for r in rows) else []
+
+        reference = relative_to or rows[0]
+        same_host = [r for r in rows if r["host_fingerprint"] == reference["host_fingerprint"]]
+        if selector == "latest":
+            group = (reference["git_commit"], reference["settings_hash"])
+        elif selector == "previous":
+            earlier = [r for r in same_host if r["id"] < reference["id"]
+                       and r["settings_hash"] == reference["settings_hash"] and r["model"] == reference["model"]
+                       and r["git_commit"] != reference["git_commit"]]
+            if not earlier:
+                return []
+            group = (earlier[0]["git_commit"], earlier[0]["settings_hash"])
+        else:
+            matches = [r for r in same_host if (r["git_commit"] or "").startswith(selector)]
+            return [r["id"] for r in matches]
+        return [r["id"] for r in same_host if (r["git_commit"], r["settings_hash"]) == group]
+
+    def run(self, run_id):
+        return self.db.execute("SELECT * FROM runs WHERE id = ?", (run_id,)).fetchone()
+
+    def samples(self, run_ids):
+        """{test name: {"latency": [...], "wer": [...]}} over the given runs (errored tests excluded)."""
+        out = {}
+        if not run_ids:
+            return out
+        marks = ",".join("?" * len(run_ids))
+        for row in self.db.execute(
+            f"SELECT test_name, latency_ms, wer FROM results WHERE run_id IN ({marks}) AND error IS NULL",
+            list(run_ids),
+        ):
+            test = out.setdefault(row["test_name"], {"latency": [], "wer": []})
+            if row["latency_ms"] is not None:
+                test["latency"].append(row["latency_ms"])
+            if row["wer"] is not None:
+                test["wer"].append(row["wer"])
+        return out
+
+
+def compare(baseline, candidate, min_latency_pct=5.0, min_wer_delta=0.005, seed=0):
+    """
+    Compare two samples() dicts. Returns a report dict with "tests" (per
+    test) and "corpus" (paired over common tests) entries and "regressions".
+    """
+    rng = random.Random(seed)
+    tests = []
+    regressions = []
+    common = sorted(set(baseline) & set(candidate))
+    for name in common:
+        base, cand = baseline[name], candidate[name]
+        entry = {"test": name}
+        if base["latency"] and cand["latency"]:
+            entry["latency_base_ms"] = mean(base["latency"])
+            entry["latency_cand_ms"] = mean(cand["latency"])
+            entry["latency_delta_ms"] = entry["latency_cand_ms"] - entry["latency_base_ms"]
+            if len(base["latency"]) >= 2 and len(cand["latency"]) >= 2:
+                entry["latency_ci_ms"] = bootstrap_diff_ci(base["latency"], cand["latency"], rng)
+                low = entry["latency_ci_ms"][0]
+                if low > 0 and entry["latency_delta_ms"] > entry["latency_base_ms"] * min_latency_pct / 100:
+                    regressions.append(f"{name}: latency +{entry['latency_delta_ms']:.0f}ms")
+        if base["wer"] and cand["wer"]:
+            entry["wer_base"] = mean(base["wer"])
+            entry["wer_cand"] = mean(cand["wer"])
+            entry["wer_delta"] = entry["wer_cand"] - entry["wer_base"]
+        tests.append(entry)
+
+    corpus = {"tests": len(common)}
+    ratios = [math.log(t["latency_cand_ms"] / t["latency_base_ms"]) for t in tests
+              if t.get("latency_base_ms") and t.get("latency_cand_ms")]
+    if len(ratios) >= 2:
+        low, high = bootstrap_ci(mean, ratios, rng)
+        corpus["latency_change_pct"] = (math.exp(mean(ratios)) - 1) * 100
+        corpus["latency_ci_pct"] = ((math.exp(low) - 1) * 100, (math.exp(high) - 1) * 100)
+        if low > 0 and corpus["latency_change_pct"] > min_latency_pct:
+            regressions.append(f"corpus: latency +{corpus['latency_change_pct']:.1f}%")
+    wer_deltas = [t["wer_delta"] for t in tests if "wer_delta" in t]
+    if len(wer_deltas) >= 2:
+        corpus["wer_delta"] = mean(wer_deltas)
+        corpus["wer_ci"] = bootstrap_ci(mean, wer_deltas, rng)
+        if corpus["wer_ci"][0] > 0 and corpus["wer_delta"] > min_wer_delta:
+            regressions.append(f"corpus: WER +{corpus['wer_delta'] * 100:.2f}pp")
+    return {"tests": tests, "corpus": corpus, "regressions": regressions}
+
+
+def _describe(history, run_ids):
+    first = history.run(run_ids[0])
+    commit = (first["git_commit"] or "no-git")[:10] + ("+dirty" if first["git_dirty"] else "")
+    return f"{commit} {first['model']} ({len(run_ids)} run{'s' if len(run_ids) > 1 else ''})"
+
+
+def _print_comparison(report, baseline_label, candidate_label):
+    print(f"Baseline:  {baseline_label}")
+    print(f"Candidate: {candidate_label}\n")
+    print(f"{'TEST':<28} | {'LATENCY (ms)':>22} | {'95% CI (ms)':>17} | {'WER':>16}")
+    print("-" * 94)
+    for t in report["tests"]:
+        latency = ci = wer = ""
+        if "latency_delta_ms" in t:
+            latency = f"{t['latency_base_ms']:.0f} → {t['latency_cand_ms']:.0f} ({t['latency_delta_ms']:+.0f})"
+        if "latency_ci_ms" in t:
+            ci = f"[{t['latency_ci_ms'][0]:+.0f}, {t['latency_ci_ms'][1]:+.0f}]"
+        if "wer_delta" in t:
+            wer = f"{t['wer_base']:.1%} → {t['wer_cand']:.1%}"
+        print(f"{t['test'][:28]:<28} | {latency:>22} | {ci:>17} | {wer:>16}")
+    corpus = report["corpus"]
+    print("-" * 94)
+    if "latency_change_pct" in corpus:
+        low, high = corpus["latency_ci_pct"]
+        print(f"Corpus latency: {corpus['latency_change_pct']:+.1f}% (95% CI {low:+.1f}% to {high:+.1f}%) "
+              f"over {corpus['tests']} tests")
+    if "wer_delta" in corpus:
+        low, high = corpus["wer_ci"]
+        print(f"Corpus WER:     {corpus['wer_delta'] * 100:+.2f}pp (95% CI {low * 100:+.2f} to {high * 100:+.2f}pp)")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Test run performance history")
+    parser.add_argument("--history", default=str(DEFAULT_HISTORY), help="SQLite history file")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    list_parser = sub.add_parser("list", help="Show recent runs")
+    list_parser.add_argument("--limit", type=int, default=20)
+
+    show_parser = sub.add_parser("show", help="Show one run's results")
+    show_parser.add_argument("run_id", type=int)
+
+    compare_parser = sub.add_parser("compare", help="Compare two groups of runs; exit 1 on regression")
+    compare_parser.add_argument("--baseline", default="previous",
+                                help="Run id, commit prefix, 'latest' or 'previous' (default)")
+    compare_parser.add_argument("--candidate", default="latest", help="Run id, commit prefix or 'latest' (default)")
+    compare_parser.add_argument("--min-latency-pct", type=float, default=5.0,
+                                help="Ignore latency increases smaller than this (noise floor)")
+    compare_parser.add_argument("--min-wer-delta", type=float, default=0.005,
+                                help="Ignore WER increases smaller than this (absolute)")
+    compare_parser.add_argument("--latency-target", type=float, default=3000.0,
+                                help="Fail if the candidate's mean latency is above this (ms; 0 = off)")
+    compare_parser.add_argument("--json", help="Also write the comparison to this file")
+    args = parser.parse_args(argv)
+
+    history = PerfHistory(args.history)
+    if args.command == "list":
+        for r in history.runs(args.limit):
+            started = time.strftime("%Y-%m-%d %H:%M", time.localtime(r["started_at"]))
+            commit = (r["git_commit"] or "no-git")[:10] + ("+" if r["git_dirty"] else " ")
+            print(f"{r['id']:>5}  {started}  {commit} {r['model'] or '':<18} {r['settings_hash'] or '':<16} "
+                  f"{r['tests']:>4} tests  {r['host'] or ''} {r['notes'] or ''}")
+        return 0
+
+    if args.command == "show":
+        rows = history.db.execute("SELECT * FROM results WHERE run_id = ? ORDER BY test_name",
+                                  (args.run_id,)).fetchall()
+        for r in rows:
+            status = "PASS" if r["passed"] else ("ERROR" if r["error"] else "FAIL")
+            wer = f"{r['wer']:.1%}" if r["wer"] is not None else "-"
+            latency = f"{r['latency_ms']:.0f}ms" if r["latency_ms"] is not None else "-"
+            print(f"{r['test_name']:<30} {latency:>8}  WER {wer:>6}  {status}")
+        return 0
+
+    candidate_ids = history.select(args.candidate)
+    if not candidate_ids:
+        print(f"✗ No runs match candidate '{args.candidate}'")
+        return 2
+    baseline_ids = history.select(args.baseline, relative_to=history.run(max(candidate_ids)))
+    if not baseline_ids:
+        print(f"✗ No runs on this host match baseline '{args.baseline}'")
+        return 2
+
+    candidate = history.samples(candidate_ids)
+    report = compare(history.samples(baseline_ids), candidate,
+                     args.min_latency_pct, args.min_wer_delta)
+    _print_comparison(report, _describe(history, baseline_ids), _describe(history, candidate_ids))
+
+    latencies = [v for test in candidate.values() for v in test["latency"]]
+    if args.latency_target and latencies and mean(latencies) > args.latency_target:
+        report["regressions"].append(
+            f"mean latency {mean(latencies):.0f}ms is over the {args.latency_target:.0f}ms target")
+    if args.json:
+        Path(args.json).parent.mkdir(parents=True, exist_ok=True)
+        Path(args.json).write_text(json.dumps({
+            "baseline_runs": baseline_ids, "candidate_runs": candidate_ids, **report,
+        }, indent=2))
+
+    if report["regressions"]:
+        print("\n❌ Regressions:")
+        for regression in report["regressions"]:
+            print(f"   - {regression}")
+        return 1
+    print("\n✅ No significant regressions")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
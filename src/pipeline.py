@@ -0,0 +1,246 @@
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from src.job_queue import TranscriptionCancelled
+
+
+class Stage:
+    """
+    One step of the dictation pipeline.
+
+    func(job) does the work and stores its output on the job. Offloaded
+    stages run on their own single-thread executor, so a stage handles one
+    job at a time (preserving order) while other stages work on other jobs.
+    """
+
+    def __init__(self, name, func, offload=True, maxsize=1):
+        self.name = name
+        self.func = func
+        self.offload = offload
+        self.maxsize = maxsize      # Bound on the queue feeding this stage
+        self.queue = None           # Created inside the pipeline's event loop
+        self.executor = None
+        self.current = None
+        self.processed = 0
+        self.max_depth = 0
+        self.total_service = 0.0
+        self.last_service = 0.0
+        self.total_blocked = 0.0    # Time spent waiting for room downstream
+
+    def stats(self):
+        return {
+            "depth": self.queue.qsize() if self.queue else 0,
+            "max_depth": self.max_depth,
+            "processed": self.processed,
+            "last_service": self.last_service,
+            "avg_service": self.total_service / self.processed if self.processed else 0.0,
+            "backpressure": self.total_blocked,
+        }
+
+
+class DictationPipeline:
+    """
+    Stages connected by bounded asyncio queues, running on a private event
+    loop in a background thread.
+
+    Each stage processes jobs strictly in order, but different stages run
+    concurrently, so post-processing and injection of one utterance overlap
+    with decoding of the next. Bounded queues between stages apply
+    backpressure instead of piling up work.
+
+    on_finish(job) is called exactly once per submitted job (completed,
+    failed or cancelled), from the pipeline thread. Each finished job is
+    counted under exactly one of completed, cancelled and failed; wait-time
+    averages cover completed jobs only.
+    """
+
+    def __init__(self, stages, on_finish=None, max_pending=4, name="dictation-pipeline"):
+        self.stages = stages
+        self.on_finish = on_finish
+        self.max_pending = max_pending
+        self.submitted = 0
+        self.completed = 0
+        self.dropped = 0
+        self.cancelled = 0
+        self.failed = 0
+        self.max_depth = 0
+        self.last_wait = 0.0
+        self.total_wait = 0.0
+        self._in_flight = []
+        self._lock = threading.Lock()
+
+        self.loop = asyncio.new_event_loop()
+        self._ready = threading.Event()
+        self._thread = threading.Thread(target=self._run_loop, name=name, daemon=True)
+        self._thread.start()
+        self._ready.wait()
+
+    def _run_loop(self):
+        asyncio.set_event_loop(self.loop)
+        for i, stage in enumerate(self.stages):
+            # The first queue is bounded by submit(); inner queues give backpressure
+            stage.queue = asyncio.Queue(maxsize=0 if i == 0 else stage.maxsize)
+            if stage.offload:
+                stage.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix=stage.name)
+        self._tasks = [
+            self.loop.create_task(self._run_stage(i)) for i in range(len(self.stages))
+        ]
+        self._ready.set()
+        self.loop.run_forever()
+        self.loop.close()
+
+    def submit(self, job):
+        """Queue a job without blocking (thread-safe). Returns False if the pipeline is full."""
+        with self._lock:
+            depth = len(self._in_flight)
+            if depth >= self.max_pending:
+                self.dropped += 1
+                print(f"✗ Dictation pipeline full ({self.max_pending} pending), dropping dictation")
+                return False
+            job.enqueued_at = time.monotonic()
+            job.queued_at = job.enqueued_at
+            self._in_flight.append(job)
+            self.submitted += 1
+            self.max_depth = max(self.max_depth, depth + 1)
+        if depth > 0:
+            print(f"📥 Queued dictation (depth {depth + 1})")
+        self.loop.call_soon_threadsafe(self.stages[0].queue.put_nowait, job)
+        return True
+
+    def pending(self):
+        """Jobs anywhere in the pipeline."""
+        with self._lock:
+            return len(self._in_flight)
+
+    def stats(self):
+        """Pipeline-wide queue depth and wait time, plus per-stage metrics."""
+        with self._lock:
+            depth = len(self._in_flight)
+        return {
+            "depth": depth,
+            "max_depth": self.max_depth,
+            "submitted": self.submitted,
+            "completed": self.completed,
+            "dropped": self.dropped,
+            "cancelled": self.cancelled,
+            "failed": self.failed,
+            "last_wait": self.last_wait,
+            "avg_wait": self.total_wait / self.completed if self.completed else 0.0,
+            "stages": {stage.name: stage.stats() for stage in self.stages},
+        }
+
+    async def _run_stage(self, index):
+        stage = self.stages[index]
+        next_stage = self.stages[index + 1] if index + 1 < len(self.stages) else None
+
+        while True:
+            job = await stage.queue.get()
+            if job is None:
+                if next_stage:
+                    await next_stage.queue.put(None)
+                else:
+                    self.loop.stop()
+                return
+
+            stage.max_depth = max(stage.max_depth, stage.queue.qsize() + 1)
+            dequeued_at = time.monotonic()
+            job.trace.span(f"queue:{stage.name}", job.queued_at, dequeued_at)
+
+            if index == 0:
+                job.started_at = time.monotonic()
+                self.last_wait = job.started_at - job.enqueued_at
+
+            if job.token.is_cancelled:
+                print(f"🚫 Skipped cancelled dictation at {stage.name} ({job.token.reason})")
+                self._finish(job)
+                continue
+
+            stage.current = job
+            t0 = time.perf_counter()
+            try:
+                if stage.offload:
+                    await self.loop.run_in_executor(stage.executor, stage.func, job)
+                else:
+                    stage.func(job)
+            except TranscriptionCancelled as e:
+                print(f"🚫 Dictation cancelled in {stage.name} ({e})")
+                self._finish(job)
+                continue
+            except Exception as e:
+                print(f"✗ {stage.name} stage failed: {e}")
+                import traceback
+                traceback.print_exc()
+                job.error = e
+                self._finish(job)
+                continue
+            finally:
+                job.trace.span(stage.name, dequeued_at, time.monotonic())
+                stage.current = None
+                stage.last_service = time.perf_counter() - t0
+                stage.total_service += stage.last_service
+                stage.processed += 1
+
+            if next_stage:
+                t1 = time.perf_counter()
+                job.queued_at = time.monotonic()
+                await next_stage.queue.put(job)
+                stage.total_blocked += time.perf_counter() - t1
+            else:
+                self._finish(job)
+
+    def _finish(self, job):
+        with self._lock:
+            if job in self._in_flight:
+                self._in_flight.remove(job)
+            if job.token.is_cancelled:
+                self.cancelled += 1
+            elif job.error is not None:
+                self.failed += 1
+            else:
+                self.completed += 1
+                if job.started_at is not None:
+                    self.total_wait += job.started_at - job.enqueued_at
+        if self.on_finish:
+            try:
+                self.on_finish(job)
+            except Exception as e:
+                print(f"⚠ Pipeline finish callback failed: {e}")
+
+    def cancel_current(self, reason="cancelled", min_age=0.0, stage=None):
+        """
+        Cancel the oldest in-flight job (or the one in the named stage) if it
+        started at least min_age seconds ago. Returns True if a job was cancelled.
+        """
+        if stage is not None:
+            jobs = [s.current for s in self.stages if s.name == stage and s.current]
+        else:
+            with self._lock:
+                jobs = [j for j in self._in_flight if j.started_at is not None]
+        for job in jobs:
+            if job.token.is_cancelled:
+                continue
+            if time.monotonic() - job.started_at < min_age:
+                return False
+            job.token.cancel(reason)
+            return True
+        return False
+
+    def cancel_all(self, reason="cancelled"):
+        """Cancel every job in the pipeline. Returns the number cancelled."""
+        count = 0
+        with self._lock:
+            for job in self._in_flight:
+                if not job.token.is_cancelled:
+                    job.token.cancel(reason)
+                    count += 1
+        return count
+
+    def stop(self, timeout=None):
+        """Let queued jobs drain through every stage, then stop the loop."""
+        self.loop.call_soon_threadsafe(self.stages[0].queue.put_nowait, None)
+        self._thread.join(timeout)
+        for stage in self.stages:
+            if stage.executor:
+                stage.executor.shutdown(wait=False)
@@ -1,6 +1,6 @@
 import yaml
 import re
-from typing import Dict, List
+from typing import Dict, List, Pattern, Tuple, Union
 from pathlib import Path
 
 def load_replacements(path: str) -> Dict[str, str]:
@@ -25,13 +25,22 @@ def load_replacements(path: str) -> Dict[str, str]:
         print(f"Warning: Unexpected error loading {path}: {e}, using empty replacements")
         return {}
 
-def apply_replacements(text: str, replacements: Dict[str, str]) -> str:
+CompiledReplacements = List[Tuple[Pattern, str]]
+
+def compile_replacements(replacements: Dict[str, str]) -> CompiledReplacements:
+    """Precompile replacement patterns once (order is kept: rules apply in sequence)."""
+    return [
+        (re.compile(r'\b' + re.escape(old) + r'\b', flags=re.IGNORECASE), new)
+        for old, new in replacements.items()
+    ]
+
+def apply_replacements(text: str, replacements: Union[Dict[str, str], CompiledReplacements]) -> str:
     """Apply case-insensitive regex replacements with word boundaries."""
+    if isinstance(replacements, dict):
+        replacements = compile_replacements(replacements)
     result = text
-    for old, new in replacements.items():
-        # Create case-insensitive pattern with word boundaries
-        pattern = r'\b' + re.escape(old) + r'\b'
-        result = re.sub(pattern, new, result, flags=re.IGNORECASE)
+    for pattern, new in replacements:
+        result = pattern.sub(new, result)
     return result
 
 def normalize_spacing(text: str) -> str:
@@ -66,13 +75,13 @@ def capitalize_sentences(text: str) -> str:
 
     return ''.join(result)
 
-def process_mode_a(text: str, replacements: Dict[str, str]) -> str:
+def process_mode_a(text: str, replacements: Union[Dict[str, str], CompiledReplacements]) -> str:
     """Apply replacements + normalize spacing only."""
     text = apply_replacements(text, replacements)
     text = normalize_spacing(text)
     return text
 
-def process_mode_b(text: str, replacements: Dict[str, str]) -> str:
+def process_mode_b(text: str, replacements: Union[Dict[str, str], CompiledReplacements]) -> str:
     """Mode A + capitalize sentences."""
     text = process_mode_a(text, replacements)
     text = capitalize_sentences(text)
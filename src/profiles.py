@@ -0,0 +1,84 @@
+"""
+Per-application dictation profiles.
+
+A profile overrides the model, beam size, processing mode and replacement set
+for dictations whose target app (the frontmost app at hotkey press) matches
+one of its `apps`. Anything a profile leaves out comes from the defaults
+(whisper.model, whisper.beam_size, the menu bar mode, config/replacements.yaml).
+
+Compiled replacement sets are built once per profile and cached.
+"""
+
+import threading
+from pathlib import Path
+
+from src.post_process import compile_replacements, load_replacements
+
+
+class Profile:
+    """Settings for one group of apps."""
+
+    def __init__(self, name, model=None, beam_size=None, mode=None, replacements=None):
+        self.name = name
+        self.model = model              # None = the engine's default model
+        self.beam_size = beam_size
+        self.mode = mode                # None = follow the app-wide mode toggle
+        self.replacements = replacements or []  # Compiled (pattern, replacement) pairs
+
+    def __repr__(self):
+        return f"Profile({self.name!r}, model={self.model!r}, mode={self.mode!r})"
+
+
+class ProfileResolver:
+    """Maps app names to profiles; caches each profile's compiled replacements."""
+
+    def __init__(self, settings, project_root, base_replacements):
+        """base_replacements: the default {spoken: written} dict from replacements.yaml."""
+        self.project_root = Path(project_root)
+        self.base_replacements = base_replacements
+        whisper = settings.get("whisper", {})
+        self.default_model = whisper.get("model")
+        self.default_beam_size = whisper.get("beam_size", 5)
+        self.definitions = settings.get("profiles", {}) or {}
+        self.by_app = {
+            app.lower(): name
+            for name, definition in self.definitions.items()
+            for app in definition.get("apps", [])
+        }
+        self._profiles = {}
+        self._lock = threading.Lock()
+
+    def models(self):
+        """Every model a profile can ask for (for pre-downloading/warming)."""
+        return {d["model"] for d in self.definitions.values() if d.get("model")}
+
+    def for_app(self, app_name):
+        """The profile for app_name (the default profile if none matches)."""
+        name = self.by_app.get((app_name or "").lower(), "default")
+        profile = self._profiles.get(name)
+        if profile is None:
+            with self._lock:
+                profile = self._profiles.get(name) or self._build(name)
+                self._profiles[name] = profile
+        return profile
+
+    def _build(self, name):
+        definition = self.definitions.get(name, {})
+        replacements = self.base_replacements
+        if definition.get("replacements"):
+            # Profile rules go first so they win over the defaults; a
+            # profile can also override a default rule by key
+            extra = load_replacements(str(self.project_root / definition["replacements"]))
+            replacements = {**extra, **{k: v for k, v in self.base_replacements.items() if k not in extra}}
+        return Profile(
+            name,
+            model=definition.get("model", self.default_model),
+            beam_size=definition.get("beam_size", self.default_beam_size),
+            mode=definition.get("mode"),
+            replacements=compile_replacements(replacements),
+        )
+
+    def invalidate(self):
+        """Drop cached profiles (e.g. after editing the replacement files)."""
+        with self._lock:
+            self._profiles.clear()
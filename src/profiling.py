@@ -0,0 +1,206 @@
+"""
+Opt-in profiling of slow dictations.
+
+Enable with `profiling.enabled: true` in config/settings.yaml or the
+ERIK_STT_PROFILE=1 environment variable (ERIK_STT_PROFILE_THRESHOLD
+overrides the latency threshold in seconds).
+
+- A sampling profiler snapshots every thread's stack (sys._current_frames)
+  at a fixed interval while a dictation is in flight. A dictation runs
+  across several pipeline threads, which cProfile (one thread) can't see.
+  Output is folded stacks, viewable with speedscope or flamegraph.pl.
+- Optionally, WhisperEngine.transcribe is wrapped with cProfile for an
+  exact call-count view of the decode (.prof, viewable with snakeviz/pstats).
+
+Profiles are only saved when a dictation's latency crosses the threshold,
+and only the N slowest are kept.
+"""
+
+import cProfile
+import marshal
+import os
+import sys
+import threading
+import time
+from collections import Counter
+
+
+def profiling_settings(settings):
+    """Merge the profiling: settings block with environment overrides."""
+    conf = {
+        "enabled": False,
+        "threshold": 3.0,
+        "keep": 10,
+        "interval": 0.005,
+        "cprofile_engine": False,
+        "dir": "logs/profiles",
+    }
+    conf.update((settings or {}).get("profiling", {}) or {})
+    if os.environ.get("ERIK_STT_PROFILE"):
+        conf["enabled"] = os.environ["ERIK_STT_PROFILE"] not in ("0", "false", "")
+    if os.environ.get("ERIK_STT_PROFILE_THRESHOLD"):
+        conf["threshold"] = float(os.environ["ERIK_STT_PROFILE_THRESHOLD"])
+    return conf
+
+
+# Innermost frames of threads parked waiting for work
+IDLE_FRAMES = {
+    ("threading.py", "wait"),
+    ("threading.py", "_wait_for_tstate_lock"),
+    ("queue.py", "get"),
+    ("selectors.py", "select"),
+    ("thread.py", "_worker"),
+}
+
+
+def _is_idle(frame):
+    code = frame.f_code
+    return (os.path.basename(code.co_filename), code.co_name) in IDLE_FRAMES
+
+
+def _collapse(frame):
+    """Render a frame's stack as 'outer;...;inner' (folded stack format)."""
+    parts = []
+    while frame is not None:
+        code = frame.f_code
+        parts.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+        frame = frame.f_back
+    return ";".join(reversed(parts))
+
+
+class SamplingProfiler:
+    """
+    Samples all thread stacks while at least one session is open.
+
+    Sessions overlap freely (back-to-back dictations); each sample is
+    counted in every open session. The sampler thread sleeps when no
+    session is open, so it costs nothing between dictations.
+    """
+
+    def __init__(self, interval=0.005):
+        self.interval = interval
+        self._sessions = {}
+        self._lock = threading.Lock()
+        self._active = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="sampling-profiler", daemon=True)
+        self._thread.start()
+
+    def begin(self, key):
+        with self._lock:
+            self._sessions[key] = Counter()
+            self._active.set()
+
+    def end(self, key):
+        """Close a session and return its Counter of folded stacks."""
+        with self._lock:
+            stacks = self._sessions.pop(key, Counter())
+            if not self._sessions:
+                self._active.clear()
+        return stacks
+
+    def _run(self):
+        own_id = threading.get_ident()
+        while True:
+            self._active.wait()
+            names = {t.ident: t.name for t in threading.enumerate()}
+            sample = Counter()
+            for thread_id, frame in sys._current_frames().items():
+                # Skip ourselves and threads parked in a wait (they only add noise)
+                if thread_id == own_id or _is_idle(frame):
+                    continue
+                sample[f"{names.get(thread_id, thread_id)};{_collapse(frame)}"] += 1
+            with self._lock:
+                for stacks in self._sessions.values():
+                    stacks.update(sample)
+            time.sleep(self.interval)
+
+
+class ProfileStore:
+    """Directory keeping profiles for the N slowest dictations."""
+
+    def __init__(self, directory, keep=10):
+        self.directory = directory
+        self.keep = keep
+        self._lock = threading.Lock()
+
+    def save(self, latency, key, files):
+        """
+        Save {suffix: text_or_bytes} for one dictation, then prune so only
+        the `keep` slowest dictations remain. Returns the saved paths.
+        """
+        prefix = f"{int(latency * 1000):07d}ms_{key}"
+        paths = []
+        with self._lock:
+            os.makedirs(self.directory, exist_ok=True)
+            for suffix, data in files.items():
+                path = os.path.join(self.directory, prefix + suffix)
+                mode = "wb" if isinstance(data, bytes) else "w"
+                with open(path, mode) as f:
+                    f.write(data)
+                paths.append(path)
+            self._prune()
+        return paths
+
+    def _prune(self):
+        # File names sort by zero-padded latency, so the slowest sort last
+        groups = {}
+        for name in os.listdir(self.directory):
+            groups.setdefault(name.split(".", 1)[0], []).append(name)
+        for prefix in sorted(groups)[:-self.keep or None]:
+            for name in groups[prefix]:
+                os.remove(os.path.join(self.directory, name))
+
+
+class DictationProfiler:
+    """Ties sampling/cProfile sessions to dictations and saves the slow ones."""
+
+    def __init__(self, conf, project_root="."):
+        self.threshold = conf["threshold"]
+        self.sampler = SamplingProfiler(conf["interval"])
+        self.store = ProfileStore(os.path.join(str(project_root), conf["dir"]), keep=conf["keep"])
+        self.cprofile_engine = conf["cprofile_engine"]
+        self._engine_profiles = {}
+        print(f"🔬 Profiling slow dictations (>{self.threshold:.1f}s) into {self.store.directory}")
+
+    def begin(self, key):
+        self.sampler.begin(key)
+
+    def end(self, key, latency):
+        """Close the session; save its profiles if latency crossed the threshold."""
+        stacks = self.sampler.end(key)
+        engine_profile = self._engine_profiles.pop(key, None)
+        if latency < self.threshold:
+            return []
+
+        files = {".folded": "".join(f"{stack} {count}\n" for stack, count in stacks.most_common())}
+        if engine_profile is not None:
+            # Same format as Profile.dump_stats, loadable with pstats
+            engine_profile.create_stats()
+            files[".engine.prof"] = marshal.dumps(engine_profile.stats)
+        paths = self.store.save(latency, key, files)
+        print(f"🔬 Slow dictation ({latency:.2f}s) profiled: {paths[0]}")
+        return paths
+
+    def wrap_transcribe(self, transcribe):
+        """
+        Wrap WhisperEngine.transcribe with cProfile (if cprofile_engine is on).
+        The trace ID of the call's trace keys the profile to its dictation,
+        so this needs tracing enabled.
+        """
+        if not self.cprofile_engine:
+            return transcribe
+
+        def profiled_transcribe(*args, **kwargs):
+            trace = kwargs.get("trace")
+            key = getattr(trace, "trace_id", None)
+            if key is None:
+                return transcribe(*args, **kwargs)
+            profile = cProfile.Profile()
+            profile.enable()
+            try:
+                return transcribe(*args, **kwargs)
+            finally:
+                profile.disable()
+                self._engine_profiles[key] = profile
+
+        return profiled_transcribe
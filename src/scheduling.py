@@ -0,0 +1,221 @@
+"""
+CPU scheduling guard: keep inference from starving audio capture.
+
+CTranslate2 will happily use every core during decode. On a busy machine
+that delays the PortAudio callback (input overflows) and the hotkey
+listener. The guard:
+
+- caps inference threads (CTranslate2 cpu_threads) at cores - reserve_cores.
+  cpu_threads is fixed when a model loads, so this cap is static;
+- while a recording is active, restricts inference threads to the
+  non-reserved cores (Linux sched_setaffinity) and lifts that when the
+  recording stops, so decode gets every core again;
+- raises the niceness of inference threads (Linux, per thread) or of the
+  isolated worker process (any POSIX);
+- puts every thread it touched back to its original affinity and niceness
+  on release().
+
+Inference threads in-process are the native threads that appear while the
+guard wraps a model load or a decode (spawning(): the CTranslate2/OpenMP
+pools sized by cpu_threads) plus threads registered with add_inference_thread
+(the decode stage), never protected threads (the audio callback). Other
+native threads, such as CoreAudio/PortAudio's, are left alone. With an
+isolated worker, every thread of the worker process is an inference thread.
+"""
+
+import contextlib
+import os
+import sys
+import threading
+
+# setpriority() on a thread ID renices just that thread on Linux; elsewhere
+# the ID would be taken as a process ID
+PER_THREAD_NICE = sys.platform.startswith("linux")
+
+
+def scheduling_settings(settings):
+    conf = {
+        "enabled": True,
+        "reserve_cores": 1,
+        "cap_threads": True,
+        "nice": 5,
+    }
+    conf.update((settings or {}).get("scheduling", {}) or {})
+    return conf
+
+
+def _tasks(pid="self"):
+    """Thread IDs of a process (Linux); empty where /proc isn't available."""
+    try:
+        return {int(tid) for tid in os.listdir(f"/proc/{pid}/task")}
+    except OSError:
+        return set()
+
+
+class CpuGuard:
+    def __init__(self, conf, cpu_count=None):
+        self.enabled = conf.get("enabled", True)
+        self.nice = conf.get("nice", 0) if self.enabled else 0
+        self.cap_threads = conf.get("cap_threads", True)
+        if hasattr(os, "sched_getaffinity"):
+            self.all_cores = sorted(os.sched_getaffinity(0))
+        else:
+            self.all_cores = list(range(cpu_count or os.cpu_count() or 1))
+        reserve = conf.get("reserve_cores", 1) if self.enabled else 0
+        # Never reserve every core
+        reserve = min(reserve, len(self.all_cores) - 1)
+        self.inference_cores = self.all_cores[:len(self.all_cores) - reserve]
+        self.reserved_cores = self.all_cores[len(self.all_cores) - reserve:]
+        self.can_pin = self.enabled and bool(self.reserved_cores) and hasattr(os, "sched_setaffinity")
+
+        self.capped = False
+        self.worker_pid = None
+        self._worker_nice = None        # The worker's niceness before set_worker
+        self._protected = set()
+        self._inference_threads = set()
+        self._niced = {}                # tid -> niceness before we raised it
+        self._pinned = {}               # tid -> affinity before we first restricted it
+        self._lock = threading.Lock()
+
+    def describe(self):
+        if not self.enabled:
+            return "off"
+        parts = [f"{self.inference_threads() or 'default'} inference threads"]
+        if self.can_pin:
+            parts.append(f"core(s) {','.join(map(str, self.reserved_cores))} reserved while recording")
+        if self.nice:
+            parts.append(f"nice +{self.nice}")
+        return ", ".join(parts)
+
+    def inference_threads(self):
+        """cpu_threads for model loads (0 = CTranslate2's default)."""
+        if not (self.enabled and self.cap_threads) or len(self.all_cores) < 2:
+            return 0
+        return len(self.inference_cores)
+
+    def protect_current_thread(self):
+        """Mark the calling thread (e.g. the audio callback) as never restricted."""
+        with self._lock:
+            self._protected.add(threading.get_native_id())
+
+    def add_inference_thread(self, native_id=None):
+        """Mark the calling thread (e.g. the decode stage) as an inference thread."""
+        native_id = native_id or threading.get_native_id()
+        self._claim({native_id})
+
+    @contextlib.contextmanager
+    def spawning(self):
+        """
+        Wrap a model load or decode: native threads that appear meanwhile
+        (CTranslate2 starts its pools there) become inference threads.
+        """
+        if not self.enabled or self.worker_pid is not None:
+            yield
+            return
+        before = _tasks()
+        try:
+            yield
+        finally:
+            python_threads = {t.native_id for t in threading.enumerate()}
+            self._claim(_tasks() - before - python_threads)
+
+    def _claim(self, tids):
+        with self._lock:
+            tids = tids - self._inference_threads - self._protected
+            self._inference_threads |= tids
+        if not tids:
+            return
+        self._renice(tids)
+        if self.capped and self.can_pin:
+            self._set_affinity(tids, self.inference_cores)
+
+    def set_worker(self, pid):
+        """Treat every thread of an isolated inference worker as an inference thread."""
+        self.worker_pid = pid
+        if self.enabled and self.nice and hasattr(os, "setpriority"):
+            try:
+                nice = os.getpriority(os.PRIO_PROCESS, pid)
+                os.setpriority(os.PRIO_PROCESS, pid, nice + self.nice)
+                self._worker_nice = (pid, nice)
+            except OSError as e:
+                print(f"⚠ Could not renice inference worker: {e}")
+
+    def _inference_tids(self):
+        if self.worker_pid is not None:
+            return _tasks(self.worker_pid)
+        alive = _tasks()
+        with self._lock:
+            # Pools die with their model (idle unload, eviction); forget their IDs
+            if alive:
+                self._inference_threads &= alive
+                for gone in self._niced.keys() - alive:
+                    del self._niced[gone]
+                for gone in self._pinned.keys() - alive:
+                    del self._pinned[gone]
+            return set(self._inference_threads)
+
+    def _renice(self, tids):
+        # Linux applies setpriority to a single thread; niceness can only be
+        # raised without privileges, so each thread is reniced once
+        if not (self.nice and PER_THREAD_NICE) or self.worker_pid is not None:
+            return
+        for tid in tids - self._niced.keys():
+            try:
+                nice = os.getpriority(os.PRIO_PROCESS, tid)
+                os.setpriority(os.PRIO_PROCESS, tid, nice + self.nice)
+            except OSError:
+                continue
+            self._niced[tid] = nice
+
+    def _set_affinity(self, tids, cores):
+        for tid in tids:
+            try:
+                if tid not in self._pinned:
+                    self._pinned[tid] = os.sched_getaffinity(tid)
+                os.sched_setaffinity(tid, cores)
+            except OSError:
+                continue  # Thread exited
+
+    def recording_started(self):
+        """Keep inference off the reserved cores while audio is being captured."""
+        if not self.enabled:
+            return
+        tids = self._inference_tids()
+        self._renice(tids)
+        if self.can_pin:
+            self._set_affinity(tids, self.inference_cores)
+        self.capped = True
+
+    def recording_stopped(self):
+        """Give inference every core again."""
+        if not self.capped:
+            return
+        self.capped = False
+        if self.can_pin:
+            self._set_affinity(self._inference_tids(), self.all_cores)
+
+    def release(self):
+        """
+        Put every thread (and the worker) back to the affinity and niceness
+        it had before the guard touched it. Lowering niceness needs
+        privileges (RLIMIT_NICE) on Linux, so that part is best effort.
+        """
+        self.recording_stopped()
+        for tid, cores in self._pinned.items():
+            try:
+                os.sched_setaffinity(tid, cores)
+            except OSError:
+                continue
+        restores = list(self._niced.items())
+        if self._worker_nice is not None:
+            restores.append(self._worker_nice)
+        for tid, nice in restores:
+            try:
+                os.setpriority(os.PRIO_PROCESS, tid, nice)
+            except OSError:
+                continue  # Exited, or not allowed to lower it
+        self._pinned.clear()
+        self._niced.clear()
+        self._worker_nice = None
+        with self._lock:
+            self._inference_threads.clear()
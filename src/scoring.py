@@ -0,0 +1,247 @@
+"""
+Word and character error rates with alignments.
+
+WER = (substitutions + deletions + insertions) / reference words, from a
+minimum edit-distance alignment of reference and hypothesis tokens (CER is
+the same over characters).
+
+The edit-distance core works a row at a time with NumPy: the substitution
+and deletion terms of a row are elementwise, and the insertion chain
+(row[j] = min(row[j], row[j-1] + 1)) is a running minimum of
+(row[j] - j) plus j. Only a band of diagonals around the corner-to-corner
+path is computed. A narrow first pass bounds the distance, which bounds
+how far an optimal path can stray from the diagonal, so at most one wider
+pass is needed. Near-correct transcripts, which are most of a corpus,
+cost O(n · band) instead of O(n · m), even for long-form audio. Inputs
+too long and too different to align exactly within MAX_CELLS get a valid
+but possibly non-minimal alignment, flagged as inexact.
+"""
+
+import re
+
+import numpy as np
+
+# Lowercase, drop punctuation (keeping in-word apostrophes), collapse spaces
+_PUNCTUATION = re.compile(r"[^\w\s']|(?<!\w)'|'(?!\w)")
+
+INITIAL_BAND = 8
+# Largest band matrix kept for the backtrace (int32 cells)
+MAX_CELLS = 32_000_000
+
+
+def normalize(text):
+    """Text as compared for scoring: lowercase, no punctuation, single spaces."""
+    return " ".join(_PUNCTUATION.sub(" ", (text or "").lower()).split())
+
+
+def _encode(ref, hyp):
+    """Map both token sequences to int arrays over a shared vocabulary."""
+    vocab = {}
+    ref_ids = np.array([vocab.setdefault(t, len(vocab)) for t in ref], dtype=np.int32)
+    hyp_ids = np.array([vocab.setdefault(t, len(vocab)) for t in hyp], dtype=np.int32)
+    return ref_ids, hyp_ids
+
+
+def _band_matrix(ref_ids, hyp_ids, band):
+    """
+    Edit-distance matrix restricted to a band of diagonals. Row i holds
+    columns j = i + low + d for d in 0..width-1. Returns (matrix, low, big),
+    with big marking cells outside the matrix.
+    """
+    n, m = len(ref_ids), len(hyp_ids)
+    big = n + m + 1
+    low = min(0, m - n) - band
+    width = max(0, m - n) + band - low + 1
+    offsets = np.arange(width, dtype=np.int32)
+
+    # hyp_pad[i + d] is the hypothesis token compared in cell (i, d); -1
+    # (never a token id) outside the hypothesis
+    hyp_pad = np.full(n + width + 1, -1, dtype=np.int32)
+    first = max(1, low)
+    hyp_pad[first - low:m + 1 - low] = hyp_ids[first - 1:]
+
+    matrix = np.empty((n + 1, width), dtype=np.int32)
+    cols = low + offsets
+    matrix[0] = np.where((cols >= 0) & (cols <= m), cols, big)  # Row 0: j insertions
+    for i in range(1, n + 1):
+        prev = matrix[i - 1]
+        row = matrix[i]
+        # Deletion: prev[j] is one offset to the right in the previous row
+        row[:-1] = prev[1:] + 1
+        row[-1] = big
+        # Hit/substitution: prev[j - 1] is at the same offset
+        np.minimum(row, prev + (hyp_pad[i:i + width] != ref_ids[i - 1]), out=row)
+        zero = -i - low             # Offset of column 0
+        if zero >= 0:
+            row[:zero] = big
+            if zero < width:
+                row[zero] = i
+        # Insertion chain: row[d] = min(row[d], row[d - 1] + 1)
+        row[:] = np.minimum.accumulate(row - offsets) + offsets
+        row[max(0, m - i - low + 1):] = big
+    return matrix, low, big
+
+
+def _matrix(ref_ids, hyp_ids):
+    """
+    Band matrix wide enough that the distance is exact, or as wide as
+    MAX_CELLS allows (the alignment is then valid but may not be minimal).
+    Returns (matrix, low, big, exact).
+    """
+    n, m = len(ref_ids), len(hyp_ids)
+    # Any banded path is a real alignment, so a narrow pass gives an upper
+    # bound U on the distance. A path leaving the band by e costs at least
+    # |m - n| + 2e, so a band of (U - |m - n|) / 2 can't miss the optimum.
+    matrix, low, big = _band_matrix(ref_ids, hyp_ids, INITIAL_BAND)
+    upper = int(matrix[n, m - n - low])
+    needed = (upper - abs(m - n)) // 2
+    if needed <= INITIAL_BAND:
+        return matrix, low, big, True
+    affordable = MAX_CELLS // (n + 1) - abs(m - n) - 1
+    band = min(needed, max(INITIAL_BAND, affordable // 2))
+    matrix, low, big = _band_matrix(ref_ids, hyp_ids, band)
+    return matrix, low, big, band >= needed
+
+
+def align(ref, hyp):
+    """
+    Minimum edit-distance alignment of two token sequences, as
+    (ops, exact): ops is a list of (op, ref_token, hyp_token) with op "="
+    (hit), "S", "D" or "I"; exact is False if the inputs were too long and
+    different for an exact alignment within MAX_CELLS.
+    """
+    ref, hyp = list(ref), list(hyp)
+    if not ref or not hyp:
+        return [("D", t, None) for t in ref] + [("I", None, t) for t in hyp], True
+    ref_ids, hyp_ids = _encode(ref, hyp)
+    matrix, low, big, exact = _matrix(ref_ids, hyp_ids)
+
+    def cost(i, j):
+        d = j - i - low
+        if 0 <= d < matrix.shape[1] and matrix[i, d] < big:
+            return int(matrix[i, d])
+        return None
+
+    # Backtrace: prefer hit/substitution, then deletion, then insertion
+    ops = []
+    i, j = len(ref), len(hyp)
+    while i or j:
+        here = cost(i, j)
+        if i and j:
+            diag = cost(i - 1, j - 1)
+            same = ref_ids[i - 1] == hyp_ids[j - 1]
+            if diag is not None and diag + (not same) == here:
+                ops.append(("=" if same else "S", ref[i - 1], hyp[j - 1]))
+                i, j = i - 1, j - 1
+                continue
+        if i:
+            up = cost(i - 1, j)
+            if up is not None and up + 1 == here:
+                ops.append(("D", ref[i - 1], None))
+                i -= 1
+                continue
+        ops.append(("I", None, hyp[j - 1]))
+        j -= 1
+    ops.reverse()
+    return ops, exact
+
+
+def edit_distance(ref, hyp):
+    """Levenshtein distance between two token sequences (an upper bound past MAX_CELLS)."""
+    ref, hyp = list(ref), list(hyp)
+    if not ref or not hyp:
+        return len(ref) + len(hyp)
+    ref_ids, hyp_ids = _encode(ref, hyp)
+    matrix, low, _, _ = _matrix(ref_ids, hyp_ids)
+    return int(matrix[len(ref), len(hyp) - len(ref) - low])
+
+
+class ErrorRate:
+    """Error counts for one comparison (or a sum of several)."""
+
+    def __init__(self, hits=0, substitutions=0, deletions=0, insertions=0, alignment=None, exact=True):
+        self.hits = hits
+        self.substitutions = substitutions
+        self.deletions = deletions
+        self.insertions = insertions
+        self.alignment = alignment or []
+        self.exact = exact          # False: counts are an upper bound
+
+    @classmethod
+    def from_alignment(cls, ops, exact=True):
+        counts = {"=": 0, "S": 0, "D": 0, "I": 0}
+        for op, _, _ in ops:
+            counts[op] += 1
+        return cls(counts["="], counts["S"], counts["D"], counts["I"], ops, exact)
+
+    @classmethod
+    def from_dict(cls, data):
+        """Inverse of as_dict (without the alignment)."""
+        return cls(data["hits"], data["substitutions"], data["deletions"], data["insertions"],
+                   exact=data.get("exact", True))
+
+    @property
+    def reference_length(self):
+        return self.hits + self.substitutions + self.deletions
+
+    @property
+    def errors(self):
+        return self.substitutions + self.deletions + self.insertions
+
+    @property
+    def rate(self):
+        if self.reference_length == 0:
+            return 0.0 if self.insertions == 0 else 1.0
+        return self.errors / self.reference_length
+
+    def __add__(self, other):
+        """Corpus-level totals (errors summed before dividing, not averaged rates)."""
+        return ErrorRate(
+            self.hits + other.hits,
+            self.substitutions + other.substitutions,
+            self.deletions + other.deletions,
+            self.insertions + other.insertions,
+            exact=self.exact and other.exact,
+        )
+
+    def as_dict(self):
+        return {
+            "rate": self.rate,
+            "substitutions": self.substitutions,
+            "deletions": self.deletions,
+            "insertions": self.insertions,
+            "hits": self.hits,
+            "reference_length": self.reference_length,
+            "exact": self.exact,
+        }
+
+    def __repr__(self):
+        return (f"ErrorRate({self.rate:.2%}: S={self.substitutions} D={self.deletions} "
+                f"I={self.insertions} N={self.reference_length})")
+
+
+def word_error(reference, hypothesis):
+    """WER of hypothesis against reference (both normalized first)."""
+    return ErrorRate.from_alignment(*align(normalize(reference).split(), normalize(hypothesis).split()))
+
+
+def char_error(reference, hypothesis):
+    """CER of hypothesis against reference (both normalized first)."""
+    return ErrorRate.from_alignment(*align(normalize(reference), normalize(hypothesis)))
+
+
+def format_alignment(ops):
+    """Three aligned lines (REF, HYP, error markers) for reports."""
+    ref_line, hyp_line, marks = [], [], []
+    for op, ref_token, hyp_token in ops:
+        ref_token = ref_token if ref_token is not None else "*" * len(hyp_token)
+        hyp_token = hyp_token if hyp_token is not None else "*" * len(ref_token)
+        width = max(len(ref_token), len(hyp_token))
+        ref_line.append(ref_token.ljust(width))
+        hyp_line.append(hyp_token.ljust(width))
+        marks.append(("" if op == "=" else op).ljust(width))
+    return "\n".join([
+        "REF: " + " ".join(ref_line),
+        "HYP: " + " ".join(hyp_line),
+        "     " + " ".join(marks).rstrip(),
+    ])
@@ -0,0 +1,184 @@
+"""
+Deterministic stand-in for faster_whisper.WhisperModel.
+
+Selected with `whisper.backend: stub`. It needs no model weights, so the code
+around the model (audio loading, the engine, post-processing, the dictation
+pipeline, benchmarks) can be exercised and timed on any machine:
+
+- audio is read for real (16-bit PCM WAV path or float32 array), and split
+  into segments on silence with a simple energy gate;
+- the "transcript" is the clip's ground truth (the .txt next to a WAV) when
+  there is one, otherwise words picked deterministically from the audio
+  content, so the same audio always gives the same text;
+- decode cost is simulated per segment (`rtf` seconds per audio second) and,
+  like faster-whisper, paid lazily as segments are iterated;
+- like faster-whisper, concurrent calls decode num_workers at a time;
+- load time and resident memory can be simulated too;
+- with `features`, log-mel features are computed for the speech like
+  faster-whisper does before encoding (model.feature_extractor, so the
+  feature cache can be exercised; see src/feature_cache.py).
+"""
+
+import threading
+import time
+import wave
+import zlib
+from collections import namedtuple
+from pathlib import Path
+
+Segment = namedtuple("Segment", "id start end text")
+TranscriptionInfo = namedtuple("TranscriptionInfo", "language language_probability duration")
+
+SAMPLE_RATE = 16000
+FRAME_SECONDS = 0.03
+SILENCE_RMS = 0.01          # Frames quieter than this are silence
+MIN_SILENCE_SECONDS = 0.5   # Same split as vad_parameters in the engine
+WORDS_PER_SECOND = 2.5
+
+WORDS = (
+    "the quick brown fox jumps over lazy dog voice activity detection is crucial "
+    "for ignoring background noise trading futures today speed accuracy reliability "
+    "first second point summary thinking about one more thing matters most"
+).split()
+
+
+def read_audio(audio):
+    """16 kHz mono float32 samples from a WAV path or an array."""
+    import numpy as np
+
+    if not isinstance(audio, (str, Path)):
+        return np.asarray(audio, dtype=np.float32).reshape(-1)
+    with wave.open(str(audio), "rb") as f:
+        rate, channels, width = f.getframerate(), f.getnchannels(), f.getsampwidth()
+        raw = f.readframes(f.getnframes())
+    if width != 2:
+        raise ValueError(f"{audio}: stub backend reads 16-bit PCM WAVs only")
+    samples = np.frombuffer(raw, dtype="<i2").astype(np.float32) / 32768.0
+    if channels > 1:
+        samples = samples.reshape(-1, channels).mean(axis=1)
+    if rate != SAMPLE_RATE:
+        # Linear resample; fine for timing and segmentation
+        positions = np.arange(0, len(samples), rate / SAMPLE_RATE)
+        samples = np.interp(positions, np.arange(len(samples)), samples).astype(np.float32)
+    return samples
+
+
+def speech_regions(samples, sample_rate=SAMPLE_RATE):
+    """[(start, end)] seconds of non-silent audio, split at MIN_SILENCE_SECONDS gaps."""
+    import numpy as np
+
+    frame = int(FRAME_SECONDS * sample_rate)
+    n = len(samples) // frame
+    if n == 0:
+        return []
+    rms = np.sqrt(np.mean(samples[:n * frame].reshape(n, frame) ** 2, axis=1))
+    voiced = np.flatnonzero(rms > SILENCE_RMS)
+    if len(voiced) == 0:
+        return []
+    # Split wherever the gap between voiced frames is long enough
+    gaps = np.flatnonzero(np.diff(voiced) * FRAME_SECONDS > MIN_SILENCE_SECONDS)
+    starts = np.concatenate(([voiced[0]], voiced[gaps + 1]))
+    ends = np.concatenate((voiced[gaps], [voiced[-1]])) + 1
+    return [(float(s * FRAME_SECONDS), float(e * FRAME_SECONDS)) for s, e in zip(starts, ends)]
+
+
+class FeatureExtractor:
+    """NumPy version of faster_whisper's log-mel FeatureExtractor (same parameters and call)."""
+
+    def __init__(self, feature_size=80, sampling_rate=SAMPLE_RATE, hop_length=160, chunk_length=30, n_fft=400):
+        self.sampling_rate = sampling_rate
+        self.n_fft = n_fft
+        self.hop_length = hop_length
+        self.chunk_length = chunk_length
+        self.n_samples = chunk_length * sampling_rate
+        self.nb_max_frames = self.n_samples // hop_length
+        self.time_per_frame = hop_length / sampling_rate
+        self.mel_filters = self.get_mel_filters(sampling_rate, n_fft, feature_size)
+
+    @staticmethod
+    def get_mel_filters(sr, n_fft, n_mels):
+        """Triangular filters evenly spaced on the mel scale, (n_mels, n_fft // 2 + 1)."""
+        import numpy as np
+
+        def mel(hz):
+            return 2595 * np.log10(1 + hz / 700)
+
+        edges = 700 * (10 ** (np.linspace(0, mel(sr / 2), n_mels + 2) / 2595) - 1)
+        bins = np.fft.rfftfreq(n_fft, 1 / sr)
+        lower = (bins - edges[:-2, None]) / (edges[1:-1] - edges[:-2])[:, None]
+        upper = (edges[2:, None] - bins) / (edges[2:] - edges[1:-1])[:, None]
+        filters = np.maximum(0, np.minimum(lower, upper))
+        return (filters * (2 / (edges[2:] - edges[:-2]))[:, None]).astype(np.float32)
+
+    def __call__(self, waveform, padding=160, chunk_length=None):
+        import numpy as np
+
+        if chunk_length is not None:
+            self.n_samples = chunk_length * self.sampling_rate
+            self.nb_max_frames = self.n_samples // self.hop_length
+        waveform = np.asarray(waveform, dtype=np.float32)
+        if padding:
+            waveform = np.pad(waveform, (0, padding))
+        # Centered STFT with a Hann window; the last frame is dropped, as in Whisper
+        half = self.n_fft // 2
+        padded = np.pad(waveform, (half, half), mode="reflect" if len(waveform) > half else "constant")
+        frames = np.lib.stride_tricks.sliding_window_view(padded, self.n_fft)[::self.hop_length]
+        power = np.abs(np.fft.rfft(frames * np.hanning(self.n_fft + 1)[:-1].astype(np.float32))) ** 2
+        log_spec = np.log10(np.maximum(self.mel_filters @ power[:-1].T, 1e-10))
+        log_spec = np.maximum(log_spec, log_spec.max() - 8.0)
+        return ((log_spec + 4.0) / 4.0).astype(np.float32)
+
+
+class StubWhisperModel:
+    """Implements the part of WhisperModel that WhisperEngine uses."""
+
+    def __init__(self, model_size_or_path="stub", rtf=0.0, load_seconds=0.0, resident_mb=0, features=False,
+                 num_workers=1, **kwargs):
+        self.name = str(model_size_or_path)
+        self.rtf = rtf
+        self._workers = threading.BoundedSemaphore(max(1, num_workers))
+        self.features = features
+        self.feature_extractor = FeatureExtractor()
+        if load_seconds:
+            time.sleep(load_seconds)
+        # Touch every page so the memory is really resident
+        self._weights = bytearray(b"\x01") * int(resident_mb * 1024 * 1024)
+
+    def _words(self, audio, samples, seconds):
+        """Ground truth next to a WAV, else a deterministic word sequence."""
+        if isinstance(audio, (str, Path)):
+            truth = Path(audio).with_suffix(".txt")
+            if truth.exists():
+                return truth.read_text().split()
+        seed = zlib.crc32(samples.tobytes())
+        count = max(1, round(seconds * WORDS_PER_SECOND))
+        return [WORDS[(seed + i * 7919) % len(WORDS)] for i in range(count)]
+
+    def transcribe(self, audio, language=None, beam_size=5, **kwargs):
+        samples = read_audio(audio)
+        duration = len(samples) / SAMPLE_RATE
+        regions = speech_regions(samples)
+        speech = sum(end - start for start, end in regions)
+        words = self._words(audio, samples, speech) if regions else []
+        if self.features and regions:
+            # Like faster-whisper: features of the speech left after VAD
+            import numpy as np
+            speech_audio = np.concatenate([samples[int(start * SAMPLE_RATE):int(end * SAMPLE_RATE)]
+                                           for start, end in regions])
+            self.feature_extractor(speech_audio, chunk_length=kwargs.get("chunk_length"))
+        info = TranscriptionInfo(language or "en", 1.0, duration)
+        return self._segments(regions, words, speech), info
+
+    def _segments(self, regions, words, speech):
+        # Hand out words in proportion to each region's length
+        taken = 0
+        elapsed = 0.0
+        for i, (start, end) in enumerate(regions):
+            elapsed += end - start
+            upto = len(words) if i == len(regions) - 1 else round(len(words) * elapsed / speech)
+            if self.rtf:
+                with self._workers:
+                    time.sleep((end - start) * self.rtf)
+            if upto > taken:
+                yield Segment(i, start, end, " " + " ".join(words[taken:upto]))
+            taken = upto
@@ -0,0 +1,233 @@
+#!/usr/bin/env python3
+"""
+Per-dictation latency traces.
+
+Each dictation gets a DictationTrace with a trace ID, instant marks
+(hotkey press, first audio block, stop) and timed spans (tail wait, buffer
+assembly, engine, post-processing, focus restore, clipboard, paste). All
+times are time.monotonic() seconds so spans from different threads line up.
+
+Traces are appended to a JSONL file, which is rotated once it passes
+max_size_mb (traces.jsonl → traces.jsonl.1 → ... up to `backups` old
+files), and can be converted to Chrome trace format for chrome://tracing
+or https://ui.perfetto.dev:
+
+    python -m src.tracing logs/traces.jsonl -o logs/trace.json
+"""
+
+import json
+import os
+import threading
+import time
+import uuid
+from contextlib import contextmanager, nullcontext
+
+
+class DictationTrace:
+    """Timestamped spans and marks for one dictation."""
+
+    def __init__(self, trace_id=None):
+        self.trace_id = trace_id or uuid.uuid4().hex[:12]
+        self.wall_start = time.time()
+        self.mono_start = time.monotonic()
+        self.spans = []
+        self.marks = []
+        self.meta = {}
+        self._lock = threading.Lock()
+
+    def mark(self, name, ts=None, **args):
+        """Record an instant event."""
+        with self._lock:
+            self.marks.append({
+                "name": name,
+                "ts": time.monotonic() if ts is None else ts,
+                "thread": threading.current_thread().name,
+                "args": args,
+            })
+
+    def span(self, name, start, end, **args):
+        """Record a span with explicit start/end (time.monotonic() seconds)."""
+        with self._lock:
+            self.spans.append({
+                "name": name,
+                "start": start,
+                "end": end,
+                "thread": threading.current_thread().name,
+                "args": args,
+            })
+
+    @contextmanager
+    def timed(self, name, **args):
+        """Context manager recording a span around its body."""
+        start = time.monotonic()
+        try:
+            yield
+        finally:
+            self.span(name, start, time.monotonic(), **args)
+
+    def duration(self, name):
+        """Total seconds spent in spans with this name."""
+        return sum(s["end"] - s["start"] for s in self.spans if s["name"] == name)
+
+    def to_dict(self):
+        with self._lock:
+            return {
+                "trace_id": self.trace_id,
+                "wall_start": self.wall_start,
+                "mono_start": self.mono_start,
+                "meta": dict(self.meta),
+                "marks": list(self.marks),
+                "spans": sorted(self.spans, key=lambda s: s["start"]),
+            }
+
+
+class NullTrace:
+    """Drop-in for DictationTrace when tracing is off; records nothing."""
+
+    trace_id = None
+
+    @property
+    def meta(self):
+        return {}  # Fresh dict each time so writes are discarded
+
+    def mark(self, name, ts=None, **args):
+        pass
+
+    def span(self, name, start, end, **args):
+        pass
+
+    def timed(self, name, **args):
+        return nullcontext()
+
+    def duration(self, name):
+        return 0.0
+
+
+NULL_TRACE = NullTrace()
+
+
+class TraceRecorder:
+    """Appends finished traces to a size-capped, rotated JSONL file (thread-safe)."""
+
+    def __init__(self, path="logs/traces.jsonl", enabled=True, max_bytes=10 * 1024 * 1024, backups=3):
+        self.path = path
+        self.enabled = enabled
+        self.max_bytes = max_bytes      # None/0 = no limit
+        self.backups = backups
+        self._lock = threading.Lock()
+
+    def new_trace(self):
+        """Start a trace for a new dictation (a NullTrace when disabled)."""
+        return DictationTrace() if self.enabled else NULL_TRACE
+
+    def write(self, trace):
+        if not self.enabled or trace is NULL_TRACE:
+            return
+        line = json.dumps(trace.to_dict())
+        try:
+            with self._lock:
+                directory = os.path.dirname(self.path)
+                if directory:
+                    os.makedirs(directory, exist_ok=True)
+                if self.max_bytes and self._size() + len(line) + 1 > self.max_bytes:
+                    self._rotate()
+                with open(self.path, "a") as f:
+                    f.write(line + "\n")
+        except OSError as e:
+            print(f"⚠ Could not write trace {trace.trace_id}: {e}")
+
+    def _size(self):
+        try:
+            return os.path.getsize(self.path)
+        except OSError:
+            return 0
+
+    def _rotate(self):
+        """Shift path → path.1 → ... → path.<backups>, dropping the oldest."""
+        if not self.backups:
+            if os.path.exists(self.path):
+                os.remove(self.path)
+            return
+        for i in range(self.backups - 1, 0, -1):
+            older = f"{self.path}.{i}"
+            if os.path.exists(older):
+                os.replace(older, f"{self.path}.{i + 1}")
+        if os.path.exists(self.path):
+            os.replace(self.path, f"{self.path}.1")
+
+
+def load_traces(path):
+    """Read traces from a JSONL file, skipping unparseable lines."""
+    traces = []
+    with open(path) as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                traces.append(json.loads(line))
+            except json.JSONDecodeError:
+                continue
+    return traces
+
+
+def to_chrome_trace(traces):
+    """
+    Convert trace dicts to Chrome trace format (JSON object format).
+
+    Each dictation gets its own track (tid), named after its trace ID.
+    """
+    events = []
+    pid = 1
+    for tid, trace in enumerate(traces, 1):
+        label = trace["trace_id"]
+        if trace.get("meta", {}).get("target_app"):
+            label += f" → {trace['meta']['target_app']}"
+        events.append({
+            "name": "thread_name", "ph": "M", "pid": pid, "tid": tid,
+            "args": {"name": label},
+        })
+        for span in trace["spans"]:
+            events.append({
+                "name": span["name"],
+                "ph": "X",
+                "ts": span["start"] * 1e6,
+                "dur": (span["end"] - span["start"]) * 1e6,
+                "pid": pid,
+                "tid": tid,
+                "args": dict(span.get("args", {}), thread=span.get("thread")),
+            })
+        for mark in trace["marks"]:
+            events.append({
+                "name": mark["name"],
+                "ph": "i",
+                "s": "t",
+                "ts": mark["ts"] * 1e6,
+                "pid": pid,
+                "tid": tid,
+                "args": dict(mark.get("args", {}), thread=mark.get("thread")),
+            })
+    return {"traceEvents": events, "displayTimeUnit": "ms"}
+
+
+def export_chrome_trace(jsonl_path, out_path, last=None):
+    """Write the traces in jsonl_path (optionally only the last N) as a Chrome trace file."""
+    traces = load_traces(jsonl_path)
+    if last:
+        traces = traces[-last:]
+    with open(out_path, "w") as f:
+        json.dump(to_chrome_trace(traces), f)
+    return len(traces)
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Export dictation traces to Chrome trace format")
+    parser.add_argument("jsonl", nargs="?", default="logs/traces.jsonl", help="Trace JSONL file")
+    parser.add_argument("-o", "--output", default="logs/trace.json", help="Chrome trace output file")
+    parser.add_argument("--last", type=int, default=None, help="Only export the last N dictations")
+    args = parser.parse_args()
+
+    count = export_chrome_trace(args.jsonl, args.output, last=args.last)
+    print(f"✓ Exported {count} traces to {args.output} (open in chrome://tracing or ui.perfetto.dev)")
@@ -1,3 +1,4 @@
+import threading
 import AppKit
 from Foundation import NSObject, NSMakeRect, NSColor, NSFont
 
@@ -76,6 +77,9 @@ class StatusBubble:
         self.label.setFrame_(NSMakeRect(0, 15, 250, 30))
         
         self.window.contentView().addSubview_(self.label)
+        
+        # Set by the main thread once orderOut_ has run
+        self._hidden = threading.Event()
     
     def move_to_center(self):
         """Center window on the active screen."""
@@ -104,12 +108,19 @@ class StatusBubble:
     def _hide_on_main(self):
         """Internal method to run on main thread."""
         self.window.orderOut_(None)
+        self._hidden.set()
 
-    def hide(self):
-        """Hide the bubble (Thread-safe) with delay to ensure completion."""
-        import time
+    def hide(self, timeout=0.25):
+        """Hide the bubble (Thread-safe), returning once it is actually hidden."""
+        if AppKit.NSThread.isMainThread():
+            # A callback queued for the main thread can't run while it waits here
+            self._hide_on_main()
+            return
         from PyObjCTools import AppHelper
+        self._hidden.clear()
         AppHelper.callAfter(self._hide_on_main)
         # Wait for hide to complete on main thread before returning
-        # This ensures the bubble is fully hidden before injection
-        time.sleep(0.25)
+        # This ensures the bubble is fully hidden before injection.
+        # timeout is only a ceiling in case the main thread is busy.
+        if not self._hidden.wait(timeout):
+            print(f"⚠ Bubble hide not confirmed after {timeout*1000:.0f}ms")
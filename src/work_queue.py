@@ -0,0 +1,263 @@
+"""
+Shared work queue with leases, in SQLite.
+
+Several processes, on one host or on several hosts sharing a filesystem,
+pull items from the same queue file. Leasing an item marks it as taken by
+one owner until the lease expires. An owner that dies or hangs simply stops
+renewing, and the item goes back to whoever asks next. An item whose lease
+has expired max_attempts times, or that failed that often, is marked failed
+so that it can't stall the queue. Results are stored with the items, so
+the queue file is also the common result store.
+
+Enqueueing is idempotent on each item's key, so any number of nodes can
+enqueue the same sweep. Items done in an earlier run keep their result.
+
+Every transaction that changes state takes the database write lock
+(BEGIN IMMEDIATE), so two nodes never lease the same item. The rollback
+journal is used rather than WAL, because WAL needs shared memory and
+doesn't work over network filesystems. The shared filesystem must
+support POSIX locks (NFSv4, SMB and most cluster filesystems do).
+Lease expiry compares wall clocks across hosts, so keep hosts NTP-synced
+and leases long compared with any clock skew.
+"""
+
+import json
+import sqlite3
+import threading
+import time
+from collections import namedtuple
+from pathlib import Path
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS items (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    key TEXT NOT NULL UNIQUE,
+    grp TEXT,
+    payload TEXT NOT NULL,
+    state TEXT NOT NULL DEFAULT 'pending',
+    owner TEXT,
+    lease_expires REAL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    result TEXT,
+    error TEXT,
+    created_at REAL NOT NULL,
+    finished_at REAL
+);
+CREATE INDEX IF NOT EXISTS items_state ON items(state, grp);
+CREATE TABLE IF NOT EXISTS recorded (
+    grp TEXT NOT NULL,
+    digest TEXT NOT NULL,
+    recorded_at REAL NOT NULL,
+    PRIMARY KEY (grp, digest)
+);
+"""
+
+WorkItem = namedtuple("WorkItem", "id key group payload attempts")
+
+
+class WorkQueue:
+    """Queue handle. One connection per instance; not shared across threads."""
+
+    def __init__(self, path, busy_timeout=60.0):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        # isolation_level=None: transactions are explicit (BEGIN IMMEDIATE)
+        self.db = sqlite3.connect(str(self.path), timeout=busy_timeout, isolation_level=None)
+        self.db.row_factory = sqlite3.Row
+        self.db.execute("PRAGMA journal_mode=DELETE")
+        self.db.executescript(SCHEMA)
+
+    def close(self):
+        self.db.close()
+
+    def _transaction(self):
+        return _Immediate(self.db)
+
+    def add(self, items, reset=False):
+        """
+        Enqueue (key, group, payload) items; keys already queued are left
+        alone unless reset, which puts them back to pending. Returns the
+        number of items now pending because of this call.
+        """
+        now = time.time()
+        added = 0
+        with self._transaction():
+            for key, group, payload in items:
+                cursor = self.db.execute(
+                    "INSERT OR IGNORE INTO items (key, grp, payload, created_at) VALUES (?, ?, ?, ?)",
+                    (key, group, json.dumps(payload), now),
+                )
+                if not cursor.rowcount and reset:
+                    cursor = self.db.execute(
+                        "UPDATE items SET state = 'pending', owner = NULL, lease_expires = NULL, "
+                        "attempts = 0, result = NULL, error = NULL, finished_at = NULL WHERE key = ?",
+                        (key,),
+                    )
+                added += cursor.rowcount
+        return added
+
+    def add_done(self, key, group, payload, result):
+        """Record an item as already done (e.g. a result cached from an earlier run)."""
+        now = time.time()
+        with self._transaction():
+            self.db.execute(
+                "INSERT OR IGNORE INTO items (key, grp, payload, state, result, created_at, finished_at) "
+                "VALUES (?, ?, ?, 'done', ?, ?, ?)",
+                (key, group, json.dumps(payload), json.dumps(result), now, now),
+            )
+
+    def lease(self, owner, lease_seconds, prefer=None, max_attempts=3):
+        """
+        Take the next available item for lease_seconds, preferring items in
+        group prefer (e.g. the config whose model is already loaded).
+        Returns a WorkItem, or None if nothing is available right now.
+        """
+        now = time.time()
+        with self._transaction():
+            # Items whose lease ran out too often are given up on
+            self.db.execute(
+                "UPDATE items SET state = 'failed', error = 'lease expired ' || attempts || ' times', "
+                "finished_at = ? WHERE state = 'leased' AND lease_expires < ? AND attempts >= ?",
+                (now, now, max_attempts),
+            )
+            row = self.db.execute(
+                "SELECT id, key, grp, payload, attempts FROM items "
+                "WHERE state = 'pending' OR (state = 'leased' AND lease_expires < ?) "
+                "ORDER BY grp IS NOT ?, id LIMIT 1",
+                (now, prefer),
+            ).fetchone()
+            if row is None:
+                return None
+            self.db.execute(
+                "UPDATE items SET state = 'leased', owner = ?, lease_expires = ?, attempts = attempts + 1 "
+                "WHERE id = ?",
+                (owner, now + lease_seconds, row["id"]),
+            )
+        return WorkItem(row["id"], row["key"], row["grp"], json.loads(row["payload"]), row["attempts"] + 1)
+
+    def renew(self, item_id, owner, lease_seconds):
+        """Extend a lease. False if the lease was lost (expired and taken by another owner)."""
+        with self._transaction():
+            cursor = self.db.execute(
+                "UPDATE items SET lease_expires = ? WHERE id = ? AND owner = ? AND state = 'leased'",
+                (time.time() + lease_seconds, item_id, owner),
+            )
+        return cursor.rowcount == 1
+
+    def complete(self, item_id, owner, result):
+        """Store an item's result. A late result for an item someone else finished is dropped."""
+        with self._transaction():
+            cursor = self.db.execute(
+                "UPDATE items SET state = 'done', owner = ?, result = ?, error = NULL, finished_at = ? "
+                "WHERE id = ? AND state != 'done'",
+                (owner, json.dumps(result), time.time(), item_id),
+            )
+        return cursor.rowcount == 1
+
+    def fail(self, item_id, owner, error, max_attempts=3):
+        """Give an item back after an error; after max_attempts it is marked failed."""
+        with self._transaction():
+            self.db.execute(
+                "UPDATE items SET state = CASE WHEN attempts >= ? THEN 'failed' ELSE 'pending' END, "
+                "error = ?, lease_expires = NULL, finished_at = ? "
+                "WHERE id = ? AND owner = ? AND state = 'leased'",
+                (max_attempts, error, time.time(), item_id, owner),
+            )
+
+    def counts(self):
+        """Items per state, with expired leases counted as 'expired'."""
+        counts = {"pending": 0, "leased": 0, "expired": 0, "done": 0, "failed": 0}
+        rows = self.db.execute(
+            "SELECT CASE WHEN state = 'leased' AND lease_expires < ? THEN 'expired' ELSE state END AS s, "
+            "COUNT(*) AS n FROM items GROUP BY s",
+            (time.time(),),
+        )
+        for row in rows:
+            counts[row["s"]] = row["n"]
+        return counts
+
+    def unfinished(self):
+        """Items not yet done or failed."""
+        return self.db.execute(
+            "SELECT COUNT(*) FROM items WHERE state IN ('pending', 'leased')"
+        ).fetchone()[0]
+
+    def results(self):
+        """(group, owner, payload, result) for every done item, in queue order."""
+        rows = self.db.execute("SELECT grp, owner, payload, result FROM items WHERE state = 'done' ORDER BY id")
+        return [(row["grp"], row["owner"], json.loads(row["payload"]), json.loads(row["result"]))
+                for row in rows]
+
+    def mark_recorded(self, group, digest):
+        """
+        Claim the recording of a group's results (e.g. into the performance
+        history), identified by a digest of them. False if they were claimed
+        already, so re-running a report doesn't record the same sweep twice.
+        """
+        with self._transaction():
+            cursor = self.db.execute(
+                "INSERT OR IGNORE INTO recorded (grp, digest, recorded_at) VALUES (?, ?, ?)",
+                (group, digest, time.time()),
+            )
+        return cursor.rowcount == 1
+
+    def unmark_recorded(self, group, digest):
+        """Give up a claim from mark_recorded (the recording failed)."""
+        with self._transaction():
+            self.db.execute("DELETE FROM recorded WHERE grp = ? AND digest = ?", (group, digest))
+
+    def failures(self):
+        """(group, payload, error) for every failed item."""
+        rows = self.db.execute("SELECT grp, payload, error FROM items WHERE state = 'failed' ORDER BY id")
+        return [(row["grp"], json.loads(row["payload"]), row["error"]) for row in rows]
+
+
+class _Immediate:
+    """BEGIN IMMEDIATE ... COMMIT (ROLLBACK on error)."""
+
+    def __init__(self, db):
+        self.db = db
+
+    def __enter__(self):
+        self.db.execute("BEGIN IMMEDIATE")
+        return self.db
+
+    def __exit__(self, exc_type, exc, tb):
+        self.db.execute("ROLLBACK" if exc_type else "COMMIT")
+        return False
+
+
+class LeaseKeeper:
+    """
+    Renews a lease from a background thread (with its own connection) while
+    the item is being worked on: model loads and long clips can outlast a
+    lease. lost is set if a renewal finds the item taken over.
+    """
+
+    def __init__(self, path, item, owner, lease_seconds):
+        self.path = path
+        self.item = item
+        self.owner = owner
+        self.lease_seconds = lease_seconds
+        self.lost = False
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="lease-keeper", daemon=True)
+
+    def _run(self):
+        queue = WorkQueue(self.path)
+        try:
+            while not self._stop.wait(self.lease_seconds / 3):
+                if not queue.renew(self.item.id, self.owner, self.lease_seconds):
+                    self.lost = True
+                    return
+        finally:
+            queue.close()
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+        return False
@@ -7,8 +7,36 @@ and generates a detailed report highlighting SuperWhisper pain points:
 1. Tail-cutoff detection
 2. Pause handling
 3. Audio capture vs transcription isolation
+
+The corpus can be sharded across worker processes (each with its own
+engine). Results are written to test_results/ as each test finishes, keyed
+by a hash of the audio, the ground truth and the config, so a re-run only
+runs new or changed tests and an interrupted run resumes where it stopped.
+
+Sweeps (corpus × configs) can be spread over several hosts. Every node
+pulls (audio file, config) items from a shared SQLite queue with leases
+(src/work_queue.py), then writes results under test_results/<config>/ and
+into the queue file. Once the queue is drained, the results are merged into
+one REPORT.md. The corpus, results and queue paths must be the same on
+every node (a shared mount). Local processes can stand in for hosts with
+--nodes.
+
+    python test_runner.py                 # one engine, in-process
+    python test_runner.py --workers 4     # 4 worker processes
+    python test_runner.py --force         # ignore cached results
+    python test_runner.py --force --feature-cache   # reuse log-mel features from earlier runs
+    python test_runner.py --queue /shared/sweep.sqlite --results /shared/results \\
+        --config tiny:tiny.en:1 --config small:distil-small.en:1   # on every host
+    python test_runner.py --queue /tmp/sweep.sqlite --nodes 4 --config ...  # 4 local nodes
+    python test_runner.py --queue /shared/sweep.sqlite --report-only        # merge + record history
 """
 
+import argparse
+import functools
+import hashlib
+import multiprocessing
+import os
+import platform
 import sys
 from pathlib import Path
 import json
@@ -18,20 +46,140 @@ from scipy.io.wavfile import read as read_wav
 # Import our STT components
 from src.engine import WhisperEngine, load_settings, load_vocab
 from src.post_process import load_replacements, process_mode_a
+from src.perf_history import DEFAULT_HISTORY, PROJECT_ROOT, PerfHistory, git_revision
+from src.scoring import ErrorRate, char_error, format_alignment, word_error
+from src.work_queue import LeaseKeeper, WorkQueue
+
+# Bump when the harness's analysis changes, to invalidate cached results
+RUNNER_VERSION = 1
+
+# Per-process runner in worker processes (see _init_worker)
+_worker_runner = None
+
+
+def _init_worker(config=None, feature_cache=False):
+    global _worker_runner
+    _worker_runner = TestRunner(quiet=True, config=config, feature_cache=feature_cache)
+    _worker_runner.load_engine()
+
+
+def _run_in_worker(job):
+    audio_path, cache_key = job
+    result = _worker_runner.run_test(audio_path)
+    if result is not None:
+        result['cache_key'] = cache_key
+    return result
+
+
+def _file_digest(path):
+    return hashlib.sha256(Path(path).read_bytes()).hexdigest()
+
+
+@functools.lru_cache(maxsize=None)
+def code_version():
+    """Git HEAD, plus a digest of the code when the tree is dirty (or not a git checkout)."""
+    commit, dirty = git_revision()
+    if commit and not dirty:
+        return commit
+    digest = hashlib.sha256()
+    for path in sorted([*(PROJECT_ROOT / "src").rglob("*.py"), PROJECT_ROOT / "test_runner.py"]):
+        digest.update(str(path.relative_to(PROJECT_ROOT)).encode())
+        digest.update(path.read_bytes())
+    return f"{commit or 'nogit'}+{digest.hexdigest()[:16]}"
+
+
+def parse_config(spec):
+    """name:model:beam[:compute_type] (as in tests/benchmark_matrix.py)"""
+    parts = spec.split(":")
+    if len(parts) not in (3, 4):
+        raise argparse.ArgumentTypeError("expected name:model:beam[:compute_type]")
+    config = {"name": parts[0], "model": parts[1], "beam": int(parts[2])}
+    if len(parts) == 4:
+        config["compute_type"] = parts[3]
+    return config
+
+
+def percentile(values, q):
+    """Nearest-rank percentile (q in 0..100)."""
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[max(1, -(-len(ordered) * q // 100)) - 1]
+
+
+def feature_cache_summary(results):
+    """One line of feature cache hits and time saved over results, or None if it wasn't used."""
+    stats = [r['feature_cache'] for r in results if r and 'feature_cache' in r]
+    if not stats:
+        return None
+    hits = sum(s['hits'] for s in stats)
+    misses = sum(s['misses'] for s in stats)
+    saved = sum(s['saved_s'] for s in stats)
+    lookups = hits + misses
+    return (f"{hits} hits / {misses} misses ({hits / lookups if lookups else 0:.0%}), "
+            f"~{saved:.2f}s of feature extraction saved")
+
 
 class TestRunner:
-    def __init__(self):
-        print("Initializing test harness...")
+    def __init__(self, corpus_dir="test_data/corpus", results_dir="test_results", quiet=False, config=None,
+                 feature_cache=False):
+        if not quiet:
+            print("Initializing test harness...")
         
-        # Load configs
+        # Load configs; config (see parse_config) overrides model, beam and compute type
         self.settings = load_settings()
+        self.config = config or {"name": "default"}
+        whisper = self.settings.setdefault('whisper', {})
+        for key, setting in (("model", "model"), ("compute_type", "compute_type")):
+            if key in self.config:
+                whisper[setting] = self.config[key]
+        self.beam_size = self.config.get("beam")
+        self.feature_cache = feature_cache
+        if feature_cache:
+            # Doesn't change results, so it stays out of the config hash
+            self.settings['feature_cache'] = {**(self.settings.get('feature_cache') or {}), 'enabled': True}
         self.vocab = load_vocab()
-        self.replacements = load_replacements()
-        
-        # Initialize engine
+        self.replacements = load_replacements("config/replacements.yaml")
+        self.corpus_dir = Path(corpus_dir)
+        self.results_dir = Path(results_dir)
+        self.settings_hash = self.compute_settings_hash()
+        self.config_hash = self.compute_config_hash()
+        self.engine = None
+    
+    def load_engine(self):
+        """Initialize the engine (only processes that transcribe need one)."""
         self.engine = WhisperEngine(self.settings)
-        
-        print("✅ Test harness ready\n")
+    
+    def compute_settings_hash(self):
+        """Hash of the settings that affect results (what the history groups runs by)."""
+        config = {
+            'runner_version': RUNNER_VERSION,
+            'whisper': self.settings.get('whisper', {}),
+            'beam_size': self.beam_size,
+            'vocab': self.vocab,
+            'replacements': self.replacements,
+        }
+        return hashlib.sha256(json.dumps(config, sort_keys=True, default=str).encode()).hexdigest()[:16]
+    
+    def compute_config_hash(self):
+        """Hash of everything besides the audio and ground truth that affects results: settings and code."""
+        config = {'settings': self.settings_hash, 'code_version': code_version()}
+        return hashlib.sha256(json.dumps(config, sort_keys=True).encode()).hexdigest()[:16]
+    
+    def cache_key(self, audio_path):
+        """Key a stored result is valid for: audio, ground truth and config."""
+        txt_path = audio_path.with_suffix('.txt')
+        truth = txt_path.read_bytes() if txt_path.exists() else b''
+        return f"{_file_digest(audio_path)[:16]}-{hashlib.sha256(truth).hexdigest()[:16]}-{self.config_hash}"
+    
+    def load_cached_result(self, audio_path, cache_key):
+        """A stored result for this test if it is still valid, else None."""
+        result_path = self.results_dir / audio_path.stem / 'result.json'
+        try:
+            result = json.loads(result_path.read_text())
+        except (OSError, ValueError):
+            return None
+        return result if result.get('cache_key') == cache_key else None
     
     def load_ground_truth(self, test_path):
         """Load ground truth transcript for a test."""
@@ -42,10 +190,13 @@ class TestRunner:
     
     def transcribe_test(self, audio_path):
         """Run transcription pipeline on a test audio file."""
+        cache = self.engine.feature_cache
+        before = cache.stats() if cache is not None else None
         start_time = time.time()
         
         # Transcribe (bypasses audio capture - tests engine directly)
-        result = self.engine.transcribe(str(audio_path), custom_vocab=self.vocab)
+        options = {'beam_size': self.beam_size} if self.beam_size else {}
+        result = self.engine.transcribe(str(audio_path), custom_vocab=self.vocab, **options)
         raw_text = result['text']
         
         # Post-process
@@ -53,12 +204,20 @@ class TestRunner:
         
         elapsed = time.time() - start_time
         
-        return {
+        output = {
             'raw': raw_text,
             'final': final_text,
             'latency_ms': int(elapsed * 1000),
             'audio_duration': result.get('duration', 0)
         }
+        if cache is not None:
+            after = cache.stats()
+            output['feature_cache'] = {
+                'hits': after['hits'] - before['hits'],
+                'misses': after['misses'] - before['misses'],
+                'saved_s': round(after['saved_seconds'] - before['saved_seconds'], 4),
+            }
+        return output
     
     def check_tail_cutoff(self, ground_truth, transcribed):
         """
@@ -128,39 +287,31 @@ class TestRunner:
     def calculate_wer(self, ground_truth, transcribed):
         """
         Calculate Word Error Rate (WER).
-        Simple implementation: (insertions + deletions + substitutions) / total words
+        (substitutions + deletions + insertions) / reference words, from a
+        word alignment after normalizing case and punctuation
         """
-        if not ground_truth or not transcribed:
-            return 1.0
-        
-        gt_words = ground_truth.lower().split()
-        trans_words = transcribed.lower().split()
-        
-        # Very simple approximation: Levenshtein distance on word level
-        # For now, just compare word counts as proxy
-        diff = abs(len(gt_words) - len(trans_words))
-        total = max(len(gt_words), len(trans_words))
-        
-        return diff / total if total > 0 else 0.0
+        return word_error(ground_truth, transcribed).rate
+    
+    def score(self, ground_truth, transcribed):
+        """Word and character error rates (with alignment) and the time taken to score them."""
+        start = time.perf_counter()
+        wer = word_error(ground_truth, transcribed)
+        cer = char_error(ground_truth, transcribed)
+        return wer, cer, time.perf_counter() - start
     
     def run_test(self, audio_path):
-        """Run a single test and return results."""
+        """Run a single test and return results (None if it has no ground truth)."""
         test_name = audio_path.stem
         
-        print(f"   🧪 {test_name}...", end=' ')
-        sys.stdout.flush()
-        
         # Load ground truth
         ground_truth = self.load_ground_truth(audio_path)
         if ground_truth is None:
-            print("❌ SKIP (no ground truth)")
             return None
         
         # Run transcription
         try:
             result = self.transcribe_test(audio_path)
         except Exception as e:
-            print(f"❌ ERROR: {e}")
             return {
                 'test_name': test_name,
                 'ground_truth': ground_truth,
@@ -171,18 +322,16 @@ class TestRunner:
         # Analysis
         tail_check = self.check_tail_cutoff(ground_truth, result['final'])
         pause_check = self.check_pause_handling(test_name, ground_truth, result['final'])
-        wer = self.calculate_wer(ground_truth, result['final'])
+        wer, cer, scoring_time = self.score(ground_truth, result['final'])
         
         # Determine pass/fail
         passed = (
             not tail_check['detected'] and
             (not pause_check.get('applicable') or not pause_check.get('issue_detected', False)) and
-            wer < 0.3  # Allow up to 30% word error rate
+            wer.rate < 0.3  # Allow up to 30% word error rate
         )
         
-        print("✅ PASS" if passed else "❌ FAIL")
-        
-        return {
+        output = {
             'test_name': test_name,
             'ground_truth': ground_truth,
             'transcribed': result['final'],
@@ -191,9 +340,17 @@ class TestRunner:
             'audio_duration_s': result['audio_duration'],
             'tail_cutoff': tail_check,
             'pause_handling': pause_check,
-            'word_error_rate': wer,
+            'word_error_rate': wer.rate,
+            'wer_breakdown': wer.as_dict(),
+            'char_error_rate': cer.rate,
+            'cer_breakdown': cer.as_dict(),
+            'alignment': format_alignment(wer.alignment),
+            'scoring_time_s': scoring_time,
             'pass': passed
         }
+        if 'feature_cache' in result:
+            output['feature_cache'] = result['feature_cache']
+        return output
     
     def save_test_result(self, result, results_dir):
         """Save individual test result to disk."""
@@ -219,9 +376,20 @@ class TestRunner:
             'tail_cutoff': result.get('tail_cutoff'),
             'pause_handling': result.get('pause_handling'),
             'word_error_rate': result.get('word_error_rate'),
+            'wer_breakdown': result.get('wer_breakdown'),
+            'char_error_rate': result.get('char_error_rate'),
+            'cer_breakdown': result.get('cer_breakdown'),
             'error': result.get('error')
         }
         (test_dir / 'metrics.json').write_text(json.dumps(metrics, indent=2))
+        
+        if 'alignment' in result:
+            (test_dir / 'alignment.txt').write_text(result['alignment'] + "\n")
+        
+        # Full result last, atomically: its cache key marks the test as done
+        tmp_path = test_dir / 'result.json.tmp'
+        tmp_path.write_text(json.dumps(result, indent=2))
+        os.replace(tmp_path, test_dir / 'result.json')
     
     def generate_report(self, results, report_path):
         """Generate summary report in Markdown."""
@@ -267,6 +435,20 @@ class TestRunner:
         else:
             report.append("✅ **All pause tests passed!**\n")
         
+        # Accuracy analysis (corpus totals: errors summed, then divided)
+        scored = [r for r in results if r and 'wer_breakdown' in r]
+        if scored:
+            wer_total = sum((ErrorRate.from_dict(r['wer_breakdown']) for r in scored), ErrorRate())
+            cer_total = sum((ErrorRate.from_dict(r['cer_breakdown']) for r in scored), ErrorRate())
+            report.append("---\n")
+            report.append("## 📝 Accuracy\n")
+            report.append(f"**Corpus WER:** {wer_total.rate:.2%} "
+                          f"(S={wer_total.substitutions}, D={wer_total.deletions}, I={wer_total.insertions}, "
+                          f"N={wer_total.reference_length})")
+            report.append(f"**Corpus CER:** {cer_total.rate:.2%}")
+            scoring_time = sum(r.get('scoring_time_s', 0) for r in scored)
+            report.append(f"**Scoring time:** {scoring_time * 1000:.1f}ms\n")
+        
         # Latency analysis
         report.append("---\n")
         report.append("## ⏱️ Performance\n")
@@ -298,7 +480,11 @@ class TestRunner:
                 continue
             
             report.append(f"**Latency:** {r.get('latency_ms', 0)}ms")
-            report.append(f"**WER:** {r.get('word_error_rate', 0):.2%}\n")
+            breakdown = r.get('wer_breakdown', {})
+            report.append(f"**WER:** {r.get('word_error_rate', 0):.2%} "
+                          f"(S={breakdown.get('substitutions', 0)}, D={breakdown.get('deletions', 0)}, "
+                          f"I={breakdown.get('insertions', 0)})")
+            report.append(f"**CER:** {r.get('char_error_rate', 0):.2%}\n")
             
             report.append(f"**Ground Truth:**")
             report.append(f"```")
@@ -310,6 +496,12 @@ class TestRunner:
             report.append(f"{r.get('transcribed', 'ERROR')}")
             report.append(f"```\n")
             
+            if r.get('word_error_rate'):
+                report.append(f"**Alignment:**")
+                report.append(f"```")
+                report.append(r['alignment'])
+                report.append(f"```\n")
+            
             # Tail analysis
             tail = r.get('tail_cutoff', {})
             if tail.get('detected'):
@@ -326,28 +518,86 @@ class TestRunner:
         
         return report_text
     
-    def run_all(self):
-        """Run all tests in the corpus."""
-        corpus_dir = Path("test_data/corpus")
-        results_dir = Path("test_results")
+    def print_result(self, result, note=""):
+        status = "✅ PASS" if result['pass'] else "❌ FAIL"
+        if 'error' in result:
+            status = f"❌ ERROR: {result['error']}"
+        print(f"   🧪 {result['test_name']}... {status}{note}")
+    
+    def record_history(self, results, history_path, notes=None):
+        """Add this run's fresh results to the performance history."""
+        history = PerfHistory(history_path)
+        try:
+            run_id = history.record_run(
+                results, self.settings.get('whisper', {}).get('model'), self.settings_hash, notes
+            )
+        finally:
+            history.close()
+        print(f"📈 Recorded run {run_id} ({len(results)} tests) in {history_path}")
+        print("   Compare with: python -m src.perf_history compare")
+    
+    def run_all(self, workers=1, force=False, history_path=None, notes=None):
+        """Run all tests in the corpus (new or changed ones only, unless force)."""
+        results_dir = self.results_dir
         results_dir.mkdir(parents=True, exist_ok=True)
         
         # Find all test audio files
-        test_files = sorted(corpus_dir.glob("*.wav"))
+        test_files = sorted(self.corpus_dir.glob("*.wav"))
         
         if not test_files:
-            print("❌ No test files found in test_data/corpus/")
+            print(f"❌ No test files found in {self.corpus_dir}/")
             print("   Run test_record_corpus.py first to create test data.")
             return
         
-        print(f"Running {len(test_files)} tests...\n")
-        
         results = []
+        pending = []
         for test_file in test_files:
-            result = self.run_test(test_file)
-            if result:
-                results.append(result)
+            if not test_file.with_suffix('.txt').exists():
+                print(f"   🧪 {test_file.stem}... ❌ SKIP (no ground truth)")
+                continue
+            key = self.cache_key(test_file)
+            cached = None if force else self.load_cached_result(test_file, key)
+            if cached is not None:
+                results.append(cached)
+            else:
+                pending.append((test_file, key))
+        
+        workers = max(1, min(workers, len(pending)))
+        print(f"Running {len(pending)} tests ({len(results)} unchanged, reused) "
+              f"with {workers} worker{'s' if workers > 1 else ''}...\n")
+        
+        # Longest clips first so no worker is left with a big one at the end
+        pending.sort(key=lambda job: job[0].stat().st_size, reverse=True)
+        run_start = time.time()
+        if pending and workers == 1:
+            if self.engine is None:
+                self.load_engine()
+            for test_file, key in pending:
+                result = self.run_test(test_file)
+                result['cache_key'] = key
                 self.save_test_result(result, results_dir)
+                self.print_result(result)
+                results.append(result)
+        elif pending:
+            # Each worker process loads its own engine; results are saved
+            # as they arrive, so an interrupted run keeps finished tests
+            ctx = multiprocessing.get_context("spawn")
+            with ctx.Pool(workers, initializer=_init_worker, initargs=(self.config, self.feature_cache)) as pool:
+                for done, result in enumerate(pool.imap_unordered(_run_in_worker, pending), 1):
+                    self.save_test_result(result, results_dir)
+                    self.print_result(result, f" [{done}/{len(pending)}]")
+                    results.append(result)
+        if pending:
+            print(f"\n⏱️  Ran {len(pending)} tests in {time.time() - run_start:.1f}s")
+            fresh = {key for _, key in pending}
+            summary = feature_cache_summary([r for r in results if r.get('cache_key') in fresh])
+            if summary:
+                print(f"🗄️  Feature cache: {summary}")
+            if history_path:
+                # Only fresh results: reused ones are already in the history
+                self.record_history([r for r in results if r.get('cache_key') in fresh], history_path, notes)
+        
+        results.sort(key=lambda r: r['test_name'])
         
         print("\n" + "=" * 70)
         print("Generating report...")
@@ -370,6 +620,7 @@ class TestRunner:
         if len(results) > 0:
             pass_rate = len(passed) / len(results) * 100
             print(f"   Pass Rate: {pass_rate:.1f}%")
+        print(f"   Scoring time: {sum(r.get('scoring_time_s', 0) for r in results) * 1000:.1f}ms")
         
         # Key findings
         tail_issues = [r for r in results if r.get('tail_cutoff', {}).get('detected')]
@@ -385,7 +636,252 @@ class TestRunner:
         else:
             print(f"\n⚠️  {len(failed)} tests need attention. See REPORT.md for details.")
 
+# ----------------------------------------------------------------------
+# Distributed sweeps: a shared work queue of (audio file, config) items
+# ----------------------------------------------------------------------
+
+def default_node_name():
+    return f"{platform.node()}-{os.getpid()}"
+
+
+def enqueue_sweep(queue_path, configs, corpus_dir, results_dir, force=False):
+    """
+    Queue every corpus test × config. Tests with a current result in
+    results_dir/<config>/ are recorded as done (unless force).
+    Returns (queued, reused).
+    """
+    queue = WorkQueue(queue_path)
+    queued = reused = 0
+    try:
+        for config in configs:
+            runner = TestRunner(corpus_dir=corpus_dir, results_dir=Path(results_dir) / config['name'],
+                                quiet=True, config=config)
+            items = []
+            for test_file in sorted(runner.corpus_dir.glob("*.wav")):
+                if not test_file.with_suffix('.txt').exists():
+                    continue
+                cache_key = runner.cache_key(test_file)
+                key = f"{config['name']}:{cache_key}"
+                payload = {'audio': str(test_file.resolve()), 'config': config, 'cache_key': cache_key}
+                cached = None if force else runner.load_cached_result(test_file, cache_key)
+                if cached is not None:
+                    queue.add_done(key, config['name'], payload, cached)
+                    reused += 1
+                else:
+                    items.append((key, config['name'], payload))
+            queued += queue.add(items, reset=force)
+    finally:
+        queue.close()
+    return queued, reused
+
+
+def run_node(queue_path, results_dir, node=None, lease_seconds=300.0, max_attempts=3, poll=2.0,
+             feature_cache=False):
+    """
+    Work through the queue until it is drained: lease an item, run it with
+    an engine for its config (kept loaded while items of that config keep
+    coming), save the result and hand it back. Waits while other nodes hold
+    leases, taking over any that expire. Returns the number of items done.
+    """
+    node = node or default_node_name()
+    queue = WorkQueue(queue_path)
+    runner = None
+    done = 0
+    finished = []
+    try:
+        while True:
+            item = queue.lease(node, lease_seconds, prefer=runner and runner.config['name'],
+                               max_attempts=max_attempts)
+            if item is None:
+                if not queue.unfinished():
+                    break
+                time.sleep(poll)
+                continue
+            config = item.payload['config']
+            try:
+                with LeaseKeeper(queue_path, item, node, lease_seconds) as keeper:
+                    if runner is None or runner.config != config:
+                        runner = None   # Release the previous engine before loading the next
+                        runner = TestRunner(results_dir=Path(results_dir) / config['name'],
+                                            quiet=True, config=config, feature_cache=feature_cache)
+                        runner.load_engine()
+                    result = runner.run_test(Path(item.payload['audio']))
+            except Exception as e:
+                queue.fail(item.id, node, f"{type(e).__name__}: {e}", max_attempts)
+                print(f"   ✗ {item.key} on {node} (attempt {item.attempts}): {e}")
+                continue
+            if keeper.lost:
+                print(f"   ⚠ {node} lost the lease on {item.key}; keeping the result anyway")
+            result.update(cache_key=item.payload['cache_key'], config=config['name'], node=node)
+            runner.save_test_result(result, runner.results_dir)
+            finished.append(result)
+            if queue.complete(item.id, node, result):
+                done += 1
+                runner.print_result(result, f" [{config['name']} @ {node}]")
+    finally:
+        queue.close()
+    summary = feature_cache_summary(finished)
+    if summary:
+        print(f"🗄️  Feature cache on {node}: {summary}")
+    return done
+
+
+def _node_main(queue_path, results_dir, node, lease_seconds, max_attempts, feature_cache):
+    run_node(queue_path, results_dir, node, lease_seconds, max_attempts, feature_cache=feature_cache)
+
+
+def record_sweep_history(queue_path, name, runner, results, history_path, notes=None):
+    """Record a config's sweep results in the history unless this queue already recorded them."""
+    digest = hashlib.sha256(json.dumps(results, sort_keys=True, default=str).encode()).hexdigest()[:16]
+    queue = WorkQueue(queue_path)
+    try:
+        if not queue.mark_recorded(name, digest):
+            print(f"📈 {name}: these results are already in the history")
+            return
+        try:
+            runner.record_history(results, history_path, notes)
+        except BaseException:
+            queue.unmark_recorded(name, digest)
+            raise
+    finally:
+        queue.close()
+
+
+def merge_report(queue_path, results_dir, history_path=None, notes=None):
+    """
+    One report for the whole sweep: a per-config summary in
+    results_dir/REPORT.md and the full report for each config in
+    results_dir/<config>/REPORT.md. Optionally records each config as a run
+    in the performance history, once per set of results (re-running the
+    report doesn't record them again).
+    """
+    queue = WorkQueue(queue_path)
+    try:
+        counts = queue.counts()
+        done = queue.results()
+        failures = queue.failures()
+    finally:
+        queue.close()
+    results_dir = Path(results_dir)
+    by_config = {}
+    for name, owner, payload, result in done:
+        entry = by_config.setdefault(name, {'config': payload['config'], 'results': [], 'nodes': set()})
+        entry['results'].append(result)
+        entry['nodes'].add(owner)
+    
+    report = ["# Sweep Report\n"]
+    report.append(f"**Generated:** {time.strftime('%Y-%m-%d %H:%M:%S')}")
+    report.append(f"**Queue:** `{queue_path}` ({counts['done']} done, {counts['failed']} failed, "
+                  f"{counts['pending'] + counts['leased'] + counts['expired']} unfinished)\n")
+    report.append("| Config | Model | Beam | Tests | Pass Rate | Corpus WER | Corpus CER | "
+                  "P50 Latency | P95 Latency | Nodes |")
+    report.append("|---|---|---|---|---|---|---|---|---|---|")
+    for name, entry in by_config.items():
+        results = sorted(entry['results'], key=lambda r: r['test_name'])
+        config = entry['config']
+        runner = TestRunner(results_dir=results_dir / name, quiet=True, config=config)
+        config_dir = results_dir / name
+        config_dir.mkdir(parents=True, exist_ok=True)
+        runner.generate_report(results, config_dir / "REPORT.md")
+        if history_path:
+            record_sweep_history(queue_path, name, runner, results, history_path, notes)
+        
+        passed = sum(1 for r in results if r['pass'])
+        scored = [r for r in results if 'wer_breakdown' in r]
+        wer = sum((ErrorRate.from_dict(r['wer_breakdown']) for r in scored), ErrorRate())
+        cer = sum((ErrorRate.from_dict(r['cer_breakdown']) for r in scored), ErrorRate())
+        latencies = [r['latency_ms'] for r in results if 'latency_ms' in r]
+        p50, p95 = percentile(latencies, 50), percentile(latencies, 95)
+        report.append(
+            f"| [{name}]({name}/REPORT.md) | {runner.settings['whisper'].get('model')} | "
+            f"{runner.beam_size or '-'} | {len(results)} | {passed / len(results):.1%} | "
+            f"{wer.rate:.2%} | {cer.rate:.2%} | {p50 if p50 is not None else '-'}ms | "
+            f"{p95 if p95 is not None else '-'}ms | {len(entry['nodes'])} |")
+    
+    if failures:
+        report.append("\n## ❌ Failed Items\n")
+        for name, payload, error in failures:
+            report.append(f"- `{name}` / `{Path(payload['audio']).stem}`: {error}")
+    
+    results_dir.mkdir(parents=True, exist_ok=True)
+    report_path = results_dir / "REPORT.md"
+    tmp_path = results_dir / "REPORT.md.tmp"
+    tmp_path.write_text("\n".join(report) + "\n")
+    os.replace(tmp_path, report_path)
+    return report_path, by_config, failures
+
+
+def run_distributed(args):
+    """--queue mode: enqueue the sweep, work on it, then merge the report."""
+    configs = args.config or [{"name": "default"}]
+    if not args.report_only:
+        queued, reused = enqueue_sweep(args.queue, configs, args.corpus, args.results, args.force)
+        print(f"📥 Queued {queued} items ({reused} unchanged, reused) for {len(configs)} config(s) "
+              f"in {args.queue}")
+    if not args.enqueue_only and not args.report_only:
+        node = args.node or default_node_name()
+        run_start = time.time()
+        if args.nodes > 1:
+            ctx = multiprocessing.get_context("spawn")
+            processes = [
+                ctx.Process(target=_node_main, name=f"{node}-{i}",
+                            args=(args.queue, args.results, f"{node}-{i}", args.lease, args.max_attempts,
+                                  args.feature_cache))
+                for i in range(args.nodes)
+            ]
+            for process in processes:
+                process.start()
+            for process in processes:
+                process.join()
+        else:
+            run_node(args.queue, args.results, node, args.lease, args.max_attempts,
+                     feature_cache=args.feature_cache)
+        print(f"\n⏱️  Queue drained in {time.time() - run_start:.1f}s")
+    if args.enqueue_only:
+        return 0
+    
+    history_path = args.history if args.report_only and not args.no_history else None
+    report_path, by_config, failures = merge_report(args.queue, args.results, history_path, args.notes)
+    print(f"\n✅ Report saved to: {report_path.absolute()}")
+    for name, entry in by_config.items():
+        passed = sum(1 for r in entry['results'] if r['pass'])
+        print(f"   {name}: {passed}/{len(entry['results'])} passed "
+              f"({len(entry['nodes'])} node{'s' if len(entry['nodes']) != 1 else ''})")
+    if failures:
+        print(f"   ❌ {len(failures)} items failed (see {report_path})")
+    return 1 if failures else 0
+
+
 def main():
+    parser = argparse.ArgumentParser(description="Run the test corpus through the transcription pipeline")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="Worker processes, each with its own engine (default: 1, in-process)")
+    parser.add_argument("--corpus", default="test_data/corpus", help="Directory of .wav + .txt tests")
+    parser.add_argument("--results", default="test_results", help="Where results and REPORT.md go")
+    parser.add_argument("--force", action="store_true", help="Re-run tests even if their results are current")
+    parser.add_argument("--history", default=str(DEFAULT_HISTORY), help="Performance history database")
+    parser.add_argument("--no-history", action="store_true", help="Don't record this run in the history")
+    parser.add_argument("--notes", help="Free-form note stored with the run")
+    parser.add_argument("--config", action="append", type=parse_config, default=[],
+                        help="name:model:beam[:compute_type] (default: settings.yaml; "
+                             "several need --queue)")
+    parser.add_argument("--feature-cache", action="store_true",
+                        help="Reuse log-mel features from earlier runs (feature_cache in settings.yaml)")
+    distributed = parser.add_argument_group("distributed sweeps")
+    distributed.add_argument("--queue", help="Shared SQLite work queue; run as one node of the sweep")
+    distributed.add_argument("--node", help="This node's name in the queue (default: host-pid)")
+    distributed.add_argument("--nodes", type=int, default=1, help="Local node processes to start")
+    distributed.add_argument("--lease", type=float, default=300.0,
+                             help="Seconds an item stays leased without renewal")
+    distributed.add_argument("--max-attempts", type=int, default=3,
+                             help="Attempts per item before it is marked failed")
+    distributed.add_argument("--enqueue-only", action="store_true", help="Fill the queue and exit")
+    distributed.add_argument("--report-only", action="store_true",
+                             help="Merge the queue's results into one report (and record history)")
+    args = parser.parse_args()
+    if len(args.config) > 1 and not args.queue:
+        parser.error("several --config need --queue (e.g. --queue /tmp/sweep.sqlite --nodes 4)")
+    
     print("=" * 70)
     print("ERIK STT TEST RUNNER")
     print("=" * 70)
@@ -395,9 +891,13 @@ def main():
     print("  2. Pause handling (pauses cause truncation)")
     print("\nNote: This bypasses live audio capture to isolate transcription issues.\n")
     
-    runner = TestRunner()
-    runner.run_all()
+    if args.queue:
+        return run_distributed(args)
+    
+    runner = TestRunner(corpus_dir=args.corpus, results_dir=args.results,
+                        config=args.config[0] if args.config else None, feature_cache=args.feature_cache)
+    runner.run_all(workers=args.workers, force=args.force,
+                   history_path=None if args.no_history else args.history, notes=args.notes)
 
 if __name__ == "__main__":
-    main()
-
+    sys.exit(main())
@@ -0,0 +1,242 @@
+"""
+Corpus augmentation: thousands of labelled variants from a small base corpus.
+
+Each base clip (16-bit WAV with a .txt ground truth: test_data/corpus/, or
+the synthetic corpus) gets N variants with, per variant:
+- time-stretch (speed perturbation by resampling, so pitch moves too),
+- an inserted pause at a quiet point (the mid-sentence pause scenarios),
+- leading and trailing silence (the fast-stop / tail scenarios),
+- gain in dB,
+- white or pink noise mixed at a target SNR (relative to the clip's power).
+
+Variants of a clip are generated as one (variants × samples) batch. All
+time-domain edits compose into a single source position per output
+sample, so stretch, pause and padding are one vectorized gather with
+linear interpolation. Noise is read from a bank of white and pink noise
+generated once per run, at a random offset per variant; it and gain and
+SNR scaling are array ops over the whole batch. The words don't change, so each variant
+gets a copy of its clip's .txt. Parameters for every variant go to
+augment.json.
+
+    python tests/augment_corpus.py --variants 200
+    python tests/augment_corpus.py test_data/corpus test_data/augmented --snr 0 20 --stretch 0.8 1.2
+"""
+
+import argparse
+import json
+import shutil
+import time
+from pathlib import Path
+
+import numpy as np
+
+from synthetic_corpus import SAMPLE_RATE, build_corpus, load_corpus, read_wav, write_wav
+
+FRAME = 480                 # 30 ms frames for finding quiet points
+QUIET_DB = -30.0            # Frames this far below the loudest are quiet
+NOISE_TYPES = ("white", "pink")
+NOISE_BANK_SECONDS = 60
+
+
+def _uniform(rng, bounds, n):
+    low, high = bounds
+    return rng.uniform(low, high, n) if high > low else np.full(n, float(low))
+
+
+def quiet_points(samples):
+    """Sample offsets of quiet frames between the first and last loud ones."""
+    frames = samples[:len(samples) // FRAME * FRAME].reshape(-1, FRAME)
+    level = 10 * np.log10((frames ** 2).mean(axis=1) + 1e-12)
+    loud = level > level.max() + QUIET_DB
+    if not loud.any():
+        return np.empty(0, dtype=np.int64)
+    first, last = np.flatnonzero(loud)[[0, -1]]
+    quiet = np.flatnonzero(~loud[first:last]) + first
+    return quiet * FRAME + FRAME // 2
+
+
+def draw_params(rng, n, length, samples, args):
+    """Per-variant parameters as arrays of length n."""
+    stretch = _uniform(rng, args.stretch, n)
+    pause = np.where(rng.random(n) < args.pause_prob, _uniform(rng, args.pause, n), 0.0)
+    points = quiet_points(samples)
+    if len(points):
+        at = points[rng.integers(0, len(points), n)]
+    else:
+        at = rng.integers(0, length, n)
+    return {
+        "stretch": stretch,
+        "pause_s": pause,
+        "pause_at_s": at / SAMPLE_RATE,
+        "lead_s": _uniform(rng, args.lead, n),
+        "trail_s": _uniform(rng, args.trail, n),
+        "gain_db": _uniform(rng, args.gain_db, n),
+        "snr_db": rng.choice(args.snr, n) if args.snr else np.full(n, np.inf),
+        "noise": rng.choice(args.noise, n),
+        "noise_offset": rng.integers(0, 1 << 40, n),
+    }
+
+
+def source_positions(params, length):
+    """
+    (positions, lengths): for every output sample of every variant, the
+    (fractional) source sample it reads, or -1 for padding and pauses; and
+    each variant's output length.
+    """
+    stretched = np.floor((length - 1) / params["stretch"]).astype(np.int64) + 1
+    lead = np.round(params["lead_s"] * SAMPLE_RATE).astype(np.int64)
+    trail = np.round(params["trail_s"] * SAMPLE_RATE).astype(np.int64)
+    pause = np.round(params["pause_s"] * SAMPLE_RATE).astype(np.int64)
+    pause_at = np.round(params["pause_at_s"] * SAMPLE_RATE / params["stretch"]).astype(np.int64)
+    lengths = lead + stretched + pause + trail
+
+    def column(values):
+        return values.astype(np.int32)[:, None]
+
+    t = np.arange(lengths.max(), dtype=np.int32)[None, :]
+    u = t - column(lead)                            # Stretched-clip time
+    after = u >= column(pause_at + pause)
+    outside = (u >= column(pause_at)) & ~after      # In the pause
+    u -= after * column(pause)
+    outside |= (u < 0) | (u >= column(stretched))
+    positions = u * params["stretch"][:, None]
+    positions[outside] = -1
+    return positions, lengths
+
+
+def gather(samples, positions):
+    """Linear interpolation of samples at positions (0 outside the clip), for the whole batch at once."""
+    out = np.interp(positions.ravel(), np.arange(len(samples), dtype=np.float64), samples, left=0.0, right=0.0)
+    return out.astype(np.float32).reshape(positions.shape)
+
+
+def noise_bank(rng, seconds=NOISE_BANK_SECONDS):
+    """Unit-power white and pink noise to draw variants' noise from."""
+    n = 1 << (int(seconds * SAMPLE_RATE) - 1).bit_length()
+    white = rng.standard_normal(n, dtype=np.float32)
+    # Shape white noise to a 1/f power spectrum (no DC)
+    spectrum = np.fft.rfft(rng.standard_normal(n, dtype=np.float32))
+    spectrum[0] = 0
+    spectrum[1:] /= np.sqrt(np.arange(1, len(spectrum)))
+    pink = np.fft.irfft(spectrum, n=n).astype(np.float32)
+    return {"white": white, "pink": pink / np.sqrt((pink ** 2).mean())}
+
+
+def noise(bank, kinds, offsets, lengths):
+    """
+    Noise rows read from the bank at each row's offset (wrapping around),
+    rescaled to unit power over the row's length.
+    """
+    width = int(lengths.max())
+    rows = np.empty((len(kinds), width), dtype=np.float32)
+    for kind, source in bank.items():
+        mine = kinds == kind
+        if mine.any():
+            # Every window of the (wrapped) bank as a strided view; pick rows from it
+            wrapped = np.resize(source, len(source) + width)
+            windows = np.lib.stride_tricks.sliding_window_view(wrapped, width)
+            rows[mine] = windows[offsets[mine] % len(source)]
+    rows *= np.arange(width)[None, :] < lengths[:, None]
+    rows /= np.sqrt((rows ** 2).sum(axis=1, keepdims=True) / lengths[:, None])
+    return rows
+
+
+def augment(samples, params, bank):
+    """(batch of variants, lengths) for one clip."""
+    positions, lengths = source_positions(params, len(samples))
+    batch = gather(samples, positions)
+    batch *= (10 ** (params["gain_db"] / 20)).astype(np.float32)[:, None]
+
+    # Noise relative to the power of the (gained) clip where it's audible
+    noisy = np.flatnonzero(np.isfinite(params["snr_db"]))
+    if len(noisy):
+        audible = np.abs(batch[noisy]) > 1e-4
+        power = np.einsum("ij,ij->i", batch[noisy], batch[noisy] * audible) \
+            / np.maximum(audible.sum(axis=1), 1)
+        scale = np.sqrt(power / 10 ** (params["snr_db"][noisy] / 10)).astype(np.float32)
+        rows = noise(bank, params["noise"][noisy], params["noise_offset"][noisy], lengths[noisy])
+        batch[noisy] += rows[:, :batch.shape[1]] * scale[:, None]
+    return np.clip(batch, -1.0, 1.0, out=batch), lengths
+
+
+def augment_corpus(src_dir, out_dir, args):
+    """Write args.variants variants of every clip in src_dir. Returns (files, audio seconds)."""
+    out_dir = Path(out_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    rng = np.random.default_rng(args.seed)
+    bank = noise_bank(rng)
+    manifest = []
+    files, seconds = 0, 0.0
+    for clip in load_corpus(src_dir):
+        samples, rate = read_wav(clip)
+        if rate != SAMPLE_RATE:
+            raise ValueError(f"{clip}: expected {SAMPLE_RATE} Hz, got {rate}")
+        truth = clip.with_suffix(".txt").read_text()
+        for start in range(0, args.variants, args.batch):
+            n = min(args.batch, args.variants - start)
+            params = draw_params(rng, n, len(samples), samples, args)
+            batch, lengths = augment(samples, params, bank)
+            for k in range(n):
+                name = f"{clip.stem}_aug{start + k:05d}"
+                write_wav(out_dir / f"{name}.wav", batch[k, :lengths[k]])
+                (out_dir / f"{name}.txt").write_text(truth)
+                manifest.append({"file": f"{name}.wav", "source": clip.name,
+                                 **{key: _plain(value[k]) for key, value in params.items()}})
+            files += n
+            seconds += lengths.sum() / SAMPLE_RATE
+    (out_dir / "augment.json").write_text(json.dumps({"seed": args.seed, "variants": manifest}, indent=1))
+    return files, seconds
+
+
+def _plain(value):
+    value = value.item()
+    return None if isinstance(value, float) and not np.isfinite(value) else value
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate augmented variants of a corpus")
+    parser.add_argument("src_dir", nargs="?", help="Base corpus (default: test_data/corpus, "
+                        "else the synthetic corpus)")
+    parser.add_argument("out_dir", nargs="?", default="test_data/augmented")
+    parser.add_argument("--variants", type=int, default=100, help="Variants per base clip")
+    parser.add_argument("--snr", type=float, nargs="*", default=[5.0, 10.0, 20.0, 30.0],
+                        help="SNRs in dB to pick from (none: no noise)")
+    parser.add_argument("--noise", nargs="+", choices=NOISE_TYPES, default=list(NOISE_TYPES))
+    parser.add_argument("--gain-db", type=float, nargs=2, default=[-12.0, 6.0], metavar=("MIN", "MAX"))
+    parser.add_argument("--stretch", type=float, nargs=2, default=[0.9, 1.1], metavar=("MIN", "MAX"),
+                        help="Speed factor range (>1 is faster)")
+    parser.add_argument("--pause-prob", type=float, default=0.3, help="Chance of inserting a pause")
+    parser.add_argument("--pause", type=float, nargs=2, default=[0.5, 3.0], metavar=("MIN", "MAX"),
+                        help="Inserted pause length in seconds")
+    parser.add_argument("--lead", type=float, nargs=2, default=[0.0, 1.0], metavar=("MIN", "MAX"),
+                        help="Leading silence in seconds")
+    parser.add_argument("--trail", type=float, nargs=2, default=[0.0, 1.0], metavar=("MIN", "MAX"),
+                        help="Trailing silence in seconds")
+    parser.add_argument("--batch", type=int, default=16, help="Variants generated per array batch")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--clean", action="store_true", help="Empty out_dir first")
+    args = parser.parse_args()
+
+    src_dir = args.src_dir
+    if src_dir is None:
+        src_dir = "test_data/corpus"
+        if not load_corpus(src_dir):
+            src_dir = "test_data/synthetic"
+            if not load_corpus(src_dir):
+                build_corpus(src_dir)
+    if not load_corpus(src_dir):
+        print(f"❌ No WAVs with ground truth in {src_dir}")
+        return 1
+    if args.clean and Path(args.out_dir).exists():
+        shutil.rmtree(args.out_dir)
+
+    t0 = time.perf_counter()
+    files, seconds = augment_corpus(src_dir, args.out_dir, args)
+    elapsed = time.perf_counter() - t0
+    print(f"✓ {files} variants ({seconds / 3600:.1f}h of audio) from {src_dir} in {args.out_dir} "
+          f"in {elapsed:.1f}s ({files / elapsed:.0f} files/s)")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
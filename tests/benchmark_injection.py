@@ -0,0 +1,145 @@
+import sys
+import os
+import time
+import statistics
+
+# Add src to path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from src.injection import Injector, FakeBackend, SubprocessBackend, AppKitBackend, has_appkit, has_quartz
+
+RUNS = 20
+TEST_TEXT = "I'm trading MNQ futures on TradeZella today."
+
+# Long-form dictation for the keystroke fallback (~2k chars, with paragraph breaks)
+LONG_TEXT = "\n".join([TEST_TEXT * 10] * 5)
+
+# Chunking strategies for the keystroke fallback
+KEYSTROKE_CONFIGS = [
+    {"name": "fixed 8", "chunk_initial": 8, "chunk_max": 8},
+    {"name": "fixed 64", "chunk_initial": 64, "chunk_min": 64, "chunk_max": 64},
+    {"name": "fixed 512", "chunk_initial": 512, "chunk_min": 512},
+    {"name": "adaptive 8..512", "chunk_initial": 64},
+]
+# Stand-in target apps: fixed cost per keystroke call plus a per-character
+# cost, and an input queue that drops chunks it has no room for
+KEYSTROKE_SINKS = [
+    {"name": "fast app", "buffer": 400, "drain_rate": 6000},
+    {"name": "slow app", "buffer": 48, "drain_rate": 1500},
+]
+KEYSTROKE_CALL_OVERHEAD = 0.010
+KEYSTROKE_CHAR_COST = 0.0001
+KEYSTROKE_INJECTIONS = 3    # Same injector, so the adaptive size carries over
+
+# Simulated per-call costs: a process spawn vs. an in-process call
+FAKE_CONFIGS = [
+    {"name": "Fake: per-call subprocess (30ms)", "call_overhead": 0.030},
+    {"name": "Fake: persistent backend (0.2ms)", "call_overhead": 0.0002},
+]
+
+def bench_fake(conf):
+    """Time full inject() calls against a recording fake backend."""
+    times = []
+    calls_per_injection = 0
+    for i in range(RUNS):
+        backend = FakeBackend(frontmost="Terminal", call_overhead=conf["call_overhead"])
+        injector = Injector(backend=backend)
+        # Alternate targets so half the runs need a focus restore
+        target = "Notes" if i % 2 else "Terminal"
+        t0 = time.perf_counter()
+        injector.inject(TEST_TEXT, restore_app=target)
+        times.append(time.perf_counter() - t0)
+        calls_per_injection = max(calls_per_injection, len(backend.calls))
+    return times, calls_per_injection
+
+def bench_keystrokes(conf, sink):
+    """
+    Time the chunked keystroke fallback against a fake app. Returns
+    (seconds, chars/s, chunks, rejected, ok) over KEYSTROKE_INJECTIONS injections.
+    """
+    backend = FakeBackend(call_overhead=KEYSTROKE_CALL_OVERHEAD, keystroke_char_cost=KEYSTROKE_CHAR_COST,
+                          keystroke_buffer=sink["buffer"], keystroke_drain_rate=sink["drain_rate"])
+    injector = Injector(backend=backend, settings={
+        "keystroke_chunk_initial": conf["chunk_initial"],
+        "keystroke_chunk_min": conf.get("chunk_min", 8),
+        "keystroke_chunk_max": conf.get("chunk_max", 512),
+    })
+    seconds = chunks = rejected = 0
+    ok = True
+    for _ in range(KEYSTROKE_INJECTIONS):
+        backend.typed = []
+        t0 = time.perf_counter()
+        ok = injector.inject(LONG_TEXT, force_applescript=True)
+        seconds += time.perf_counter() - t0
+        stats = injector.last_keystroke_stats
+        chunks += stats.get("chunks", 0)
+        rejected += stats.get("rejected", 0)
+        if not ok:
+            break
+        assert "".join(backend.typed) == LONG_TEXT, "typed text does not match input"
+    return seconds, len(LONG_TEXT) * KEYSTROKE_INJECTIONS / seconds if ok else 0.0, chunks, rejected, ok
+
+def check_clipboard_failure():
+    """A rejected clipboard write must fall back to keystrokes, not fail the injection."""
+    backend = FakeBackend(clipboard_ok=False)
+    injector = Injector(backend=backend)
+    assert injector.inject(TEST_TEXT), "injection failed when the clipboard write was rejected"
+    assert "".join(backend.typed) == TEST_TEXT, "keystroke fallback did not type the text"
+    assert not backend.pasted, "pasted although the clipboard write was rejected"
+
+def bench_real(backend):
+    """Time the non-intrusive calls (frontmost lookup, clipboard write) on a real backend."""
+    lookups, writes = [], []
+    for _ in range(RUNS):
+        t0 = time.perf_counter()
+        backend.frontmost_app(max_age=0)
+        lookups.append(time.perf_counter() - t0)
+
+        t0 = time.perf_counter()
+        backend.set_clipboard(TEST_TEXT)
+        writes.append(time.perf_counter() - t0)
+    return lookups, writes
+
+def run_benchmark():
+    check_clipboard_failure()
+    print("✓ Rejected clipboard write falls back to keystrokes")
+
+    print("\n" + "="*80)
+    print(f"{'BACKEND':<40} | {'MEDIAN':<9} | {'MAX':<9} | {'CALLS'}")
+    print("="*80)
+
+    for conf in FAKE_CONFIGS:
+        times, calls = bench_fake(conf)
+        print(f"{conf['name']:<40} | {statistics.median(times)*1000:<7.1f}ms | {max(times)*1000:<7.1f}ms | {calls}")
+
+    print("-"*80)
+    print(f"{'KEYSTROKE FALLBACK (x' + str(KEYSTROKE_INJECTIONS) + ')':<40} | {'TOTAL':<9} | {'CHARS/S':<9} | "
+          f"{'CHUNKS (REJECTED)'}")
+    print("-"*80)
+    for sink in KEYSTROKE_SINKS:
+        for conf in KEYSTROKE_CONFIGS:
+            seconds, rate, chunks, rejected, ok = bench_keystrokes(conf, sink)
+            name = f"{sink['name']}: {conf['name']}"
+            if ok:
+                print(f"{name:<40} | {seconds:<8.2f}s | {rate:<9.0f} | {chunks} ({rejected})")
+            else:
+                print(f"{name:<40} | {'✗ failed':<9} | {'-':<9} | {chunks} ({rejected})")
+
+    if "--real" in sys.argv:
+        # Note: overwrites the clipboard
+        backends = [("osascript/pbcopy", SubprocessBackend())]
+        if has_appkit() and has_quartz():
+            backends.append(("AppKit (persistent)", AppKitBackend()))
+        print("-"*80)
+        for name, backend in backends:
+            lookups, writes = bench_real(backend)
+            print(f"{name + ' frontmost_app':<40} | {statistics.median(lookups)*1000:<7.1f}ms | {max(lookups)*1000:<7.1f}ms |")
+            print(f"{name + ' set_clipboard':<40} | {statistics.median(writes)*1000:<7.1f}ms | {max(writes)*1000:<7.1f}ms |")
+    else:
+        print("-"*80)
+        print("(Run with --real on macOS to also time the real backends; overwrites the clipboard)")
+
+    print("="*80)
+
+if __name__ == "__main__":
+    run_benchmark()
@@ -0,0 +1,340 @@
+"""
+Load generator: concurrent transcription requests against one WhisperEngine.
+
+Every request transcribes a corpus clip (test_data/corpus/, or the synthetic
+corpus) on a single shared engine, from many threads at once, the way a
+server handling several users would. Two ways to drive it:
+
+- closed loop (--concurrency): N clients, each sending its next request as
+  soon as the previous one returns. Shows whether throughput scales with
+  requests in flight and where it stops (the knee).
+- open loop (--rate): requests arrive as a Poisson process at R per second
+  whether or not earlier ones have finished. Latency is measured from the
+  arrival time, so time spent queued behind a saturated engine counts
+  (no coordinated omission).
+
+Before the first level each clip is transcribed once on its own. A
+concurrent result that differs from that reference counts as a mismatch
+(the engine isn't safe to share), an exception as an error.
+
+Reported per level: completed requests, errors, mismatches, throughput
+(requests/s and audio seconds transcribed per second) and p50/p90/p99/max
+latency; for open loop also the arrival rate achieved, median latency per
+second of audio (clips differ in length, so raw latency isn't comparable
+across requests) and the requests still unfinished when the level's drain
+timeout ran out. An open-loop level is saturated when requests are left
+unfinished or the backlog (requests outstanding at each arrival) keeps
+growing through it; with fewer than MIN_SAMPLES arrivals there is too
+little to tell a growing backlog from noise, so the level isn't judged on
+it. Exits 1 on any error or mismatch.
+
+faster-whisper runs one transcribe() per worker at a time; whisper.num_workers
+(--num-workers) sets how many. The stub backend (--stub-rtf for a decode
+cost) behaves the same way.
+
+    python tests/benchmark_load.py --backend stub --stub-rtf 0.1 --concurrency 1 2 4 8
+    python tests/benchmark_load.py --rate 0.5 1 2 4 --duration 60 --json logs/load.json
+    python tests/benchmark_load.py --model distil-small.en --num-workers 2 --concurrency 1 2 4
+"""
+
+import argparse
+import itertools
+import json
+import os
+import platform
+import random
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, ROOT)
+
+from benchmark_matrix import percentile
+from headless import silenced
+from synthetic_corpus import build_corpus, load_corpus
+
+KNEE_GAIN = 0.1         # Closed loop: less throughput gain than this from the previous level is the knee
+QUEUE_GROWTH = 2.0      # Open loop: last third's mean backlog this many times the first third's...
+MIN_BACKLOG_GROWTH = 2  # ...and at least this many requests more
+MIN_SAMPLES = 20        # Open loop: arrivals needed before judging backlog growth
+MAX_ERRORS_SHOWN = 3
+
+
+def engine_settings(args):
+    from src.engine import load_settings
+
+    settings = load_settings(os.path.join(ROOT, "config", "settings.yaml"))
+    whisper = settings.setdefault("whisper", {})
+    for key, value in (("backend", args.backend), ("model", args.model), ("compute_type", args.compute_type),
+                       ("num_workers", args.num_workers), ("cpu_threads", args.cpu_threads)):
+        if value is not None:
+            whisper[key] = value
+    if args.stub_rtf is not None:
+        whisper.setdefault("stub", {})["rtf"] = args.stub_rtf
+    return settings
+
+
+class Load:
+    """Issues requests against one engine and collects a record per request."""
+
+    def __init__(self, engine, clips, args):
+        self.engine = engine
+        self.clips = clips
+        self.args = args
+        self.references = {}
+
+    def transcribe(self, clip):
+        return self.engine.transcribe(str(clip), beam_size=self.args.beam)
+
+    def warm_up(self):
+        """Transcribe every clip once, serially; the texts are the references."""
+        for clip in self.clips:
+            result = self.transcribe(clip)
+            self.references[clip] = result["text"]
+
+    def request(self, clip, arrival):
+        start = time.perf_counter()
+        record = {"clip": clip.stem, "arrival": arrival, "start": start}
+        try:
+            result = self.transcribe(clip)
+        except Exception as e:
+            record.update(end=time.perf_counter(), error=f"{type(e).__name__}: {e}")
+            return record
+        end = time.perf_counter()
+        record.update(end=end, latency=end - arrival, audio_s=result["duration"],
+                      mismatch=result["text"] != self.references[clip])
+        return record
+
+    def closed_loop(self, concurrency):
+        """concurrency clients back to back for --duration seconds (or --requests requests)."""
+        records = []
+        order = itertools.count()
+        started = time.perf_counter()
+        deadline = started + self.args.duration
+
+        def client():
+            while time.perf_counter() < deadline:
+                i = next(order)
+                if self.args.requests and i >= self.args.requests:
+                    return
+                # list.append is atomic; no lock needed
+                records.append(self.request(self.clips[i % len(self.clips)], time.perf_counter()))
+
+        threads = [threading.Thread(target=client, name=f"load-client-{k}") for k in range(concurrency)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return summarize(records, started, concurrency=concurrency)
+
+    def open_loop(self, rate):
+        """Poisson arrivals at rate/s for --duration seconds, then up to --drain seconds to finish."""
+        rng = random.Random(self.args.seed)
+        futures, arrivals = [], []
+        started = time.perf_counter()
+        arrival = started
+        with ThreadPoolExecutor(self.args.max_inflight, thread_name_prefix="load-request") as pool:
+            for i in itertools.count():
+                arrival += rng.expovariate(rate)
+                if arrival - started >= self.args.duration:
+                    break
+                delay = arrival - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+                futures.append(pool.submit(self.request, self.clips[i % len(self.clips)], arrival))
+                arrivals.append(arrival)
+            limit = self.args.duration + self.args.drain
+            _, unfinished = wait(futures, timeout=max(0.0, limit - (time.perf_counter() - started)))
+            for future in unfinished:
+                future.cancel()     # Not started yet; running ones finish before the pool exits
+        # Requests that finished after the drain deadline count as unfinished
+        ends = [f.result()["end"] if not f.cancelled() else float("inf") for f in futures]
+        ends = [end if end - started <= limit else float("inf") for end in ends]
+        records = [f.result() for f, end in zip(futures, ends) if end != float("inf")]
+        summary = summarize(records, started, rate=rate)
+        summary["offered"] = len(futures)
+        summary["arrival_rate"] = len(futures) / self.args.duration
+        summary["unfinished"] = len(futures) - summary["requests"]
+        summary.update(backlog_growth(arrivals, ends))
+        summary["saturated"] = summary["unfinished"] > 0 or bool(summary["backlog_growing"])
+        return summary
+
+
+def summarize(records, started, **level):
+    ok = [r for r in records if "error" not in r]
+    latencies = [r["latency"] for r in ok]
+    elapsed = max((r["end"] for r in records), default=started) - started
+    errors = [r["error"] for r in records if "error" in r]
+    return {
+        **level,
+        "requests": len(records),
+        "errors": len(errors),
+        "error_samples": list(dict.fromkeys(errors))[:MAX_ERRORS_SHOWN],
+        "mismatches": sum(1 for r in ok if r["mismatch"]),
+        "elapsed_s": elapsed,
+        "throughput_rps": len(ok) / elapsed if elapsed else 0.0,
+        "audio_per_s": sum(r["audio_s"] for r in ok) / elapsed if elapsed else 0.0,
+        "latency_p50_ms": _ms(percentile(latencies, 50)),
+        "latency_p90_ms": _ms(percentile(latencies, 90)),
+        "latency_p99_ms": _ms(percentile(latencies, 99)),
+        "latency_max_ms": _ms(max(latencies, default=None)),
+        "latency_per_audio_s_p50": percentile([r["latency"] / r["audio_s"] for r in ok if r["audio_s"]], 50),
+    }
+
+
+def backlog_growth(arrivals, ends):
+    """Mean backlog (requests outstanding) at arrival over the first and last third of arrivals,
+    and whether it grew by QUEUE_GROWTH and MIN_BACKLOG_GROWTH (None below MIN_SAMPLES arrivals).
+    arrivals are in order; ends[i] is when request i finished (inf if it never did)."""
+    backlog = [sum(1 for j in range(i) if ends[j] > arrival) for i, arrival in enumerate(arrivals)]
+    third = len(backlog) // 3
+    first = sum(backlog[:third]) / third if third else None
+    last = sum(backlog[-third:]) / third if third else None
+    growing = None
+    if len(arrivals) >= MIN_SAMPLES:
+        growing = last >= QUEUE_GROWTH * first and last - first >= MIN_BACKLOG_GROWTH
+    return {"backlog_first": first, "backlog_last": last, "backlog_growing": growing}
+
+
+def _ms(seconds):
+    return seconds * 1000 if seconds is not None else None
+
+
+def knee(levels):
+    """Closed loop: the last concurrency that still raised throughput by KNEE_GAIN (None if all did)."""
+    for previous, level in zip(levels, levels[1:]):
+        if level["throughput_rps"] < previous["throughput_rps"] * (1 + KNEE_GAIN):
+            return previous["concurrency"]
+    return None
+
+
+def print_level(name, s):
+    def cell(value):
+        return f"{value:>7.0f}ms" if value is not None else f"{'-':>9}"
+
+    extra = ""
+    if "rate" in s:
+        per_audio = s["latency_per_audio_s_p50"]
+        extra = (f" | {s['arrival_rate']:.2f}/s in, {s['unfinished']} unfinished, "
+                 f"p50 {per_audio * 1000 if per_audio is not None else 0:.0f}ms/audio s")
+        if s["backlog_growing"] is None:
+            extra += f", backlog not judged (<{MIN_SAMPLES} arrivals)"
+        else:
+            extra += f", backlog {s['backlog_first']:.1f}→{s['backlog_last']:.1f}"
+        extra += " ⚠" if s["saturated"] else ""
+    print(f"{name:<12} | {s['requests']:>6} | {s['errors']:>5} | {s['mismatches']:>8} | "
+          f"{s['throughput_rps']:>7.2f} | {s['audio_per_s']:>7.1f}x | {cell(s['latency_p50_ms'])} | "
+          f"{cell(s['latency_p90_ms'])} | {cell(s['latency_p99_ms'])} | {cell(s['latency_max_ms'])}{extra}")
+    for error in s["error_samples"]:
+        print(f"{'':<12} |   ✗ {error}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Concurrent load generator for WhisperEngine")
+    parser.add_argument("--corpus", help="Directory of WAVs with .txt ground truth "
+                        "(default: synthetic corpus in test_data/synthetic)")
+    parser.add_argument("--limit", type=int, help="Use only the first N clips")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[],
+                        help="Closed loop: clients in flight, per level")
+    parser.add_argument("--rate", type=float, nargs="+", default=[],
+                        help="Open loop: Poisson arrivals per second, per level")
+    parser.add_argument("--duration", type=float, default=20.0, help="Seconds per level")
+    parser.add_argument("--requests", type=int, help="Closed loop: stop a level after this many requests")
+    parser.add_argument("--drain", type=float, default=30.0,
+                        help="Open loop: seconds after the last arrival for requests to finish")
+    parser.add_argument("--max-inflight", type=int, default=64,
+                        help="Open loop: threads issuing requests (later arrivals wait for one)")
+    parser.add_argument("--backend", choices=["faster_whisper", "stub"], help="Override whisper.backend")
+    parser.add_argument("--model", help="Override whisper.model")
+    parser.add_argument("--compute-type", help="Override whisper.compute_type")
+    parser.add_argument("--num-workers", type=int, help="Override whisper.num_workers")
+    parser.add_argument("--cpu-threads", type=int, help="Override whisper.cpu_threads")
+    parser.add_argument("--stub-rtf", type=float, help="Simulated decode cost for the stub backend")
+    parser.add_argument("--beam", type=int, default=5, help="Beam size")
+    parser.add_argument("--seed", type=int, default=0, help="Seed for open-loop arrivals")
+    parser.add_argument("--verbose", action="store_true", help="Show the engine's output")
+    parser.add_argument("--json", help="Write results to this file")
+    args = parser.parse_args()
+    if not args.concurrency and not args.rate:
+        args.concurrency = [1, 2, 4, 8]
+
+    corpus_dir = args.corpus or os.path.join(ROOT, "test_data", "synthetic")
+    clips = load_corpus(corpus_dir)
+    if not clips and not args.corpus:
+        build_corpus(corpus_dir)
+        clips = load_corpus(corpus_dir)
+    if not clips:
+        print(f"❌ No WAVs with ground truth in {corpus_dir}")
+        return 1
+    clips = clips[:args.limit] if args.limit else clips
+    os.chdir(ROOT)
+
+    from src.engine import WhisperEngine
+
+    settings = engine_settings(args)
+    whisper = settings["whisper"]
+    with silenced(not args.verbose):
+        engine = WhisperEngine(config=settings)
+    load = Load(engine, clips, args)
+    t0 = time.perf_counter()
+    with silenced(not args.verbose):
+        load.warm_up()
+    print("=" * 110)
+    print(f"LOAD: {whisper.get('model')} ({whisper.get('backend', 'faster_whisper')}, "
+          f"num_workers={whisper.get('num_workers', 1)}), {len(clips)} clips, {args.duration:.0f}s per level "
+          f"(reference pass {time.perf_counter() - t0:.1f}s)")
+    print("=" * 110)
+    print(f"{'LEVEL':<12} | {'REQS':>6} | {'ERR':>5} | {'MISMATCH':>8} | {'REQ/S':>7} | {'AUDIO':>8} | "
+          f"{'P50':>9} | {'P90':>9} | {'P99':>9} | {'MAX':>9}")
+    print("-" * 110)
+
+    closed, opened = [], []
+    for concurrency in args.concurrency:
+        with silenced(not args.verbose):
+            summary = load.closed_loop(concurrency)
+        closed.append(summary)
+        print_level(f"{concurrency} client{'s' if concurrency > 1 else ''}", summary)
+    for rate in args.rate:
+        with silenced(not args.verbose):
+            summary = load.open_loop(rate)
+        opened.append(summary)
+        print_level(f"{rate:g}/s", summary)
+    print("=" * 110)
+
+    closed_knee = knee(closed)
+    if closed_knee is not None:
+        print(f"Throughput stops scaling past {closed_knee} concurrent requests "
+              f"(<{KNEE_GAIN:.0%} gain from the next level)")
+    saturated = next((s["rate"] for s in opened if s["saturated"]), None)
+    if saturated is not None:
+        print(f"Saturated at {saturated:g} requests/s (requests left unfinished or a growing backlog)")
+    failed = sum(s["errors"] + s["mismatches"] for s in closed + opened)
+    print(("✗ Errors or mismatched transcripts under load" if failed else "✓ No errors or mismatches"))
+
+    if args.json:
+        from src.perf_history import git_revision
+        commit, dirty = git_revision()
+        os.makedirs(os.path.dirname(os.path.abspath(args.json)), exist_ok=True)
+        with open(args.json, "w") as f:
+            json.dump({
+                "git_commit": commit,
+                "git_dirty": dirty,
+                "host": {"platform": platform.platform(), "python": platform.python_version(),
+                         "cpus": os.cpu_count()},
+                "args": vars(args),
+                "whisper": whisper,
+                "corpus": str(corpus_dir),
+                "clips": len(clips),
+                "closed_loop": closed,
+                "open_loop": opened,
+                "knee_concurrency": closed_knee,
+                "saturated_rate": saturated,
+            }, f, indent=2)
+        print(f"\nResults written to {args.json}")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
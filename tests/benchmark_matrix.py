@@ -0,0 +1,246 @@
+"""
+Benchmark matrix: every config × every corpus clip × N repetitions.
+
+Runs on Linux and macOS without TTS. The corpus is a directory of WAVs
+with .txt ground truth (test_data/corpus/, or the synthetic corpus from
+tests/synthetic_corpus.py, generated on demand). With `--backend stub` the
+model is replaced by the deterministic stub (src/stub_model.py), which
+benchmarks everything around WhisperEngine on machines without weights.
+
+Each config runs in a fresh process so load time and peak RSS aren't
+polluted by the previous one. Reported per config: load time, p50/p95
+transcription latency, p50/p95 post-processing time, RTF (latency / audio
+duration) and peak RSS. With --feature-cache, log-mel features come from
+the on-disk cache (src/feature_cache.py) and its hit rate and time saved
+are reported too.
+
+    python tests/benchmark_matrix.py --backend stub --reps 10
+    python tests/benchmark_matrix.py --corpus test_data/corpus --json logs/matrix.json
+    python tests/benchmark_matrix.py --config fast:distil-small.en:1 --config tiny:tiny.en:1:int8
+"""
+
+import argparse
+import json
+import multiprocessing
+import os
+import platform
+import queue
+import sys
+import time
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, ROOT)
+
+from synthetic_corpus import build_corpus, load_corpus
+
+# Same matrix as benchmark_speed.py
+CONFIGS = [
+    {"name": "Baseline (Medium, Beam 5)", "model": "distil-medium.en", "beam": 5},
+    {"name": "Turbo (Medium, Beam 1)", "model": "distil-medium.en", "beam": 1},
+    {"name": "Fast (Small, Beam 1)", "model": "distil-small.en", "beam": 1},
+    {"name": "Lightning (Tiny, Beam 1)", "model": "tiny.en", "beam": 1},
+]
+
+
+def percentile(values, q):
+    """Nearest-rank percentile (q in 0..100)."""
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = max(1, -(-len(ordered) * q // 100))  # ceil
+    return ordered[int(rank) - 1]
+
+
+def peak_rss_bytes():
+    import resource
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports KiB, macOS bytes
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+def _engine_settings(conf, args):
+    from src.engine import load_settings
+
+    settings = load_settings(os.path.join(ROOT, "config", "settings.yaml"))
+    whisper = settings.setdefault("whisper", {})
+    whisper["model"] = conf["model"]
+    whisper["compute_type"] = conf.get("compute_type", whisper.get("compute_type", "int8"))
+    if args.backend:
+        whisper["backend"] = args.backend
+    if args.stub_rtf is not None:
+        whisper.setdefault("stub", {})["rtf"] = args.stub_rtf
+    if args.feature_cache:
+        settings["feature_cache"] = {**(settings.get("feature_cache") or {}), "enabled": True}
+    return settings
+
+
+def run_config(conf, clips, args, results):
+    """Child process: load the engine once, then transcribe every clip reps times."""
+    os.chdir(ROOT)
+    from src.engine import WhisperEngine, load_vocab
+    from src.metrics import resident_memory_bytes
+    from src.post_process import compile_replacements, load_replacements, process_mode_a
+
+    settings = _engine_settings(conf, args)
+    vocab = load_vocab()
+    replacements = compile_replacements(load_replacements(os.path.join(ROOT, "config", "replacements.yaml")))
+    try:
+        t0 = time.perf_counter()
+        engine = WhisperEngine(config=settings)
+        load_time = time.perf_counter() - t0
+    except Exception as e:
+        results.put({"error": f"{type(e).__name__}: {e}"})
+        return
+    rss_loaded = resident_memory_bytes()
+
+    samples = []
+    errors = 0
+    for clip in clips:
+        for rep in range(args.warmup + args.reps):
+            try:
+                t0 = time.perf_counter()
+                result = engine.transcribe(str(clip), custom_vocab=vocab, beam_size=conf["beam"])
+                t1 = time.perf_counter()
+                process_mode_a(result["text"], replacements)
+                t2 = time.perf_counter()
+            except Exception as e:
+                errors += 1
+                print(f"   ✗ {clip.name}: {e}")
+                continue
+            if rep >= args.warmup:
+                samples.append({
+                    "clip": clip.stem,
+                    "duration": result["duration"],
+                    "latency": t1 - t0,
+                    "post_process": t2 - t1,
+                })
+
+    results.put({
+        "load_time": load_time,
+        "rss_loaded": rss_loaded,
+        "peak_rss": peak_rss_bytes(),
+        "samples": samples,
+        "errors": errors,
+        "feature_cache": engine.feature_cache.stats() if engine.feature_cache is not None else None,
+    })
+
+
+def summarize(raw):
+    samples = raw["samples"]
+    latencies = [s["latency"] for s in samples]
+    post = [s["post_process"] for s in samples]
+    rtfs = [s["latency"] / s["duration"] for s in samples if s["duration"] > 0]
+    return {
+        "load_time_s": raw["load_time"],
+        "runs": len(samples),
+        "errors": raw["errors"],
+        "latency_p50_ms": percentile(latencies, 50) * 1000 if latencies else None,
+        "latency_p95_ms": percentile(latencies, 95) * 1000 if latencies else None,
+        "post_process_p50_ms": percentile(post, 50) * 1000 if post else None,
+        "post_process_p95_ms": percentile(post, 95) * 1000 if post else None,
+        "rtf_p50": percentile(rtfs, 50),
+        "rtf_p95": percentile(rtfs, 95),
+        "rss_loaded_mb": raw["rss_loaded"] / 1e6 if raw["rss_loaded"] else None,
+        "peak_rss_mb": raw["peak_rss"] / 1e6,
+        "feature_cache": raw.get("feature_cache"),
+    }
+
+
+def parse_config(spec):
+    """name:model:beam[:compute_type]"""
+    parts = spec.split(":")
+    if len(parts) not in (3, 4):
+        raise argparse.ArgumentTypeError("expected name:model:beam[:compute_type]")
+    conf = {"name": parts[0], "model": parts[1], "beam": int(parts[2])}
+    if len(parts) == 4:
+        conf["compute_type"] = parts[3]
+    return conf
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Latency/RTF/RSS benchmark matrix")
+    parser.add_argument("--corpus", help="Directory of WAVs with .txt ground truth "
+                        "(default: synthetic corpus in test_data/synthetic)")
+    parser.add_argument("--config", action="append", type=parse_config, default=[],
+                        help="name:model:beam[:compute_type] (repeatable; default: the standard matrix)")
+    parser.add_argument("--backend", choices=["faster_whisper", "stub"], help="Override whisper.backend")
+    parser.add_argument("--stub-rtf", type=float, help="Simulated decode cost for the stub backend")
+    parser.add_argument("--reps", type=int, default=5, help="Timed repetitions per clip")
+    parser.add_argument("--warmup", type=int, default=1, help="Untimed repetitions per clip")
+    parser.add_argument("--limit", type=int, help="Use only the first N clips")
+    parser.add_argument("--feature-cache", action="store_true",
+                        help="Serve log-mel features from the on-disk cache (feature_cache in settings.yaml)")
+    parser.add_argument("--json", help="Write results to this file")
+    args = parser.parse_args()
+
+    corpus_dir = args.corpus or os.path.join(ROOT, "test_data", "synthetic")
+    clips = load_corpus(corpus_dir)
+    if not clips and not args.corpus:
+        build_corpus(corpus_dir)
+        clips = load_corpus(corpus_dir)
+    if not clips:
+        print(f"❌ No WAVs with ground truth in {corpus_dir}")
+        return 1
+    clips = clips[:args.limit] if args.limit else clips
+    configs = args.config or CONFIGS
+
+    print("=" * 100)
+    print(f"BENCHMARK MATRIX: {len(configs)} configs × {len(clips)} clips × {args.reps} reps "
+          f"(backend: {args.backend or 'settings.yaml'})")
+    print("=" * 100)
+    print(f"{'CONFIGURATION':<30} | {'LOAD':>7} | {'P50':>8} | {'P95':>8} | {'RTF P50':>7} | "
+          f"{'POST P95':>8} | {'PEAK RSS':>8}")
+    print("-" * 100)
+
+    ctx = multiprocessing.get_context("spawn")
+    report = {}
+    for conf in configs:
+        results = ctx.Queue()
+        process = ctx.Process(target=run_config, args=(conf, clips, args, results))
+        process.start()
+        raw = None
+        while raw is None:
+            try:
+                raw = results.get(timeout=0.5)
+            except queue.Empty:
+                if not process.is_alive():
+                    raw = {"error": f"benchmark process exited with code {process.exitcode}"}
+        process.join()
+        if "error" in raw:
+            print(f"{conf['name']:<30} | ✗ {raw['error']}")
+            report[conf["name"]] = {"config": conf, "error": raw["error"]}
+            continue
+        summary = summarize(raw)
+        report[conf["name"]] = {"config": conf, **summary, "samples": raw["samples"]}
+        if not summary["runs"]:
+            print(f"{conf['name']:<30} | ✗ every run failed")
+            continue
+        print(f"{conf['name']:<30} | {summary['load_time_s']:>6.2f}s | "
+              f"{summary['latency_p50_ms']:>6.0f}ms | {summary['latency_p95_ms']:>6.0f}ms | "
+              f"{summary['rtf_p50']:>7.3f} | {summary['post_process_p95_ms']:>6.2f}ms | "
+              f"{summary['peak_rss_mb']:>6.0f}MB")
+        cache = summary["feature_cache"]
+        if cache:
+            print(f"{'':<30} | feature cache: {cache['hits']} hits / {cache['misses']} misses "
+                  f"({cache['hit_rate']:.0%}), ~{cache['saved_seconds']:.2f}s saved")
+    print("=" * 100)
+
+    if args.json:
+        os.makedirs(os.path.dirname(os.path.abspath(args.json)), exist_ok=True)
+        with open(args.json, "w") as f:
+            json.dump({
+                "host": {"platform": platform.platform(), "python": platform.python_version(),
+                         "cpus": os.cpu_count()},
+                "corpus": str(corpus_dir),
+                "clips": len(clips),
+                "reps": args.reps,
+                "warmup": args.warmup,
+                "backend": args.backend,
+                "results": report,
+            }, f, indent=2)
+        print(f"\nResults written to {args.json}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,283 @@
+"""
+Memory benchmark: model footprint and allocations on the dictation path.
+
+Two parts, each measurement in a fresh spawned process:
+
+1. Models: for each model × compute_type, RSS before load, after load,
+   steady state over repeated transcriptions (median of the second half),
+   growth across them, and peak RSS (ru_maxrss).
+
+2. Capture: a headless ErikSTT (tests/headless.py) records 10 s, 60 s and
+   10 min of synthetic audio through audio_callback in 100 ms blocks, then
+   runs process_audio. tracemalloc reports what capture keeps per audio
+   second and the extra peak process_audio needs per audio second, with
+   the top allocation sites, plus the RSS delta. tracemalloc only sees
+   Python/NumPy allocations; model-side (CTranslate2) memory shows up in
+   the RSS columns only.
+
+Results are keyed by config and duration and tagged with the git commit, so
+two --json files from different commits can be diffed with --compare.
+
+    python tests/benchmark_memory.py --backend stub
+    python tests/benchmark_memory.py --compute-type int8 --compute-type float32 --json logs/memory.json
+    python tests/benchmark_memory.py --backend stub --json new.json --compare logs/memory.json
+"""
+
+import argparse
+import json
+import multiprocessing
+import os
+import platform
+import queue
+import statistics
+import sys
+import time
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, ROOT)
+
+from benchmark_matrix import CONFIGS, peak_rss_bytes
+from synthetic_corpus import SAMPLE_RATE, SCENARIOS, synthesize
+
+MODELS = list(dict.fromkeys(conf["model"] for conf in CONFIGS))
+DURATIONS = [10, 60, 600]
+TOP_SITES = 5
+
+
+def _rss():
+    from src.metrics import resident_memory_bytes
+    return resident_memory_bytes() or 0
+
+
+def _speech(seconds, seed=0):
+    """seconds of synthetic dictation (the scenario texts, looped)."""
+    import numpy as np
+
+    text = " ".join(text for _, text in SCENARIOS)
+    samples, _ = synthesize(text, seed)
+    return np.resize(samples, int(seconds * SAMPLE_RATE))
+
+
+def measure_model(conf, args, results):
+    """Child process: load one model, transcribe a clip repeatedly, sample RSS."""
+    os.chdir(ROOT)
+    from headless import headless_settings
+    from src.engine import WhisperEngine
+
+    clip = _speech(args.clip_seconds)
+    settings = headless_settings(backend=args.backend, model=conf["model"],
+                                 compute_type=conf["compute_type"], stub_rtf=args.stub_rtf)
+    baseline = _rss()
+    try:
+        t0 = time.perf_counter()
+        engine = WhisperEngine(config=settings)
+        engine.transcribe(clip[:SAMPLE_RATE], language="en")     # Load lazily-built state
+        load_time = time.perf_counter() - t0
+    except Exception as e:
+        results.put({"error": f"{type(e).__name__}: {e}"})
+        return
+    loaded = _rss()
+
+    samples = []
+    for _ in range(args.reps):
+        engine.transcribe(clip, language="en")
+        samples.append(_rss())
+    steady = statistics.median(samples[len(samples) // 2:])
+    results.put({
+        "load_time_s": load_time,
+        "baseline_mb": baseline / 1e6,
+        "loaded_mb": loaded / 1e6,
+        "model_mb": (loaded - baseline) / 1e6,
+        "steady_mb": steady / 1e6,
+        "growth_mb": (samples[-1] - samples[0]) / 1e6,
+        "peak_mb": peak_rss_bytes() / 1e6,
+    })
+
+
+def _top_sites(after, before):
+    import tracemalloc
+
+    ignore = [tracemalloc.Filter(False, tracemalloc.__file__)]
+    stats = after.filter_traces(ignore).compare_to(before.filter_traces(ignore), "lineno")
+    return [
+        {"site": f"{os.path.relpath(s.traceback[0].filename, ROOT)}:{s.traceback[0].lineno}",
+         "size_kb": s.size_diff / 1e3, "count": s.count_diff}
+        for s in stats[:TOP_SITES] if s.size_diff > 0
+    ]
+
+
+def measure_capture(seconds, args, results):
+    """Child process: record seconds of audio through a headless app, then process it."""
+    import tracemalloc
+
+    os.chdir(ROOT)
+    from headless import feed, headless_app, silenced
+
+    app = headless_app(backend=args.backend, model=args.capture_model, stub_rtf=args.stub_rtf)
+    audio = _speech(seconds, seed=int(seconds))
+    # One short dictation first, so imports and the model load aren't counted
+    with silenced():
+        app.start_recording()
+        feed(app, audio[:2 * SAMPLE_RATE])
+        app.is_recording = False
+        app.process_audio()
+
+    rss_before = _rss()
+    tracemalloc.start(args.frames)
+    with silenced():
+        app.start_recording()
+        start = tracemalloc.take_snapshot()
+        base, _ = tracemalloc.get_traced_memory()
+        feed(app, audio)
+        app.is_recording = False
+        captured, capture_peak = tracemalloc.get_traced_memory()
+        end_of_capture = tracemalloc.take_snapshot()
+        tracemalloc.reset_peak()
+        t0 = time.perf_counter()
+        app.process_audio()
+        process_time = time.perf_counter() - t0
+        _, process_peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    retained = captured - base
+    results.put({
+        "audio_seconds": seconds,
+        "blocks": len(app.audio_data),
+        "capture_retained_mb": retained / 1e6,
+        "capture_bytes_per_s": retained / seconds,
+        "capture_peak_mb": (capture_peak - base) / 1e6,
+        "process_extra_peak_mb": (process_peak - captured) / 1e6,
+        "process_bytes_per_s": (process_peak - captured) / seconds,
+        "process_time_s": process_time,
+        "rss_delta_mb": (_rss() - rss_before) / 1e6,
+        "peak_rss_mb": peak_rss_bytes() / 1e6,
+        "capture_sites": _top_sites(end_of_capture, start),
+        "injected": app.injector.count,
+    })
+
+
+def run_isolated(target, *args):
+    """Run target(*args, queue) in a spawned process and return what it put on the queue."""
+    ctx = multiprocessing.get_context("spawn")
+    results = ctx.Queue()
+    process = ctx.Process(target=target, args=(*args, results))
+    process.start()
+    raw = None
+    while raw is None:
+        try:
+            raw = results.get(timeout=0.5)
+        except queue.Empty:
+            if not process.is_alive():
+                raw = {"error": f"benchmark process exited with code {process.exitcode}"}
+    process.join()
+    return raw
+
+
+def _delta(new, old, key, unit):
+    if not old or key not in old or key not in new:
+        return ""
+    diff = new[key] - old[key]
+    return f" ({diff:+.1f}{unit})" if abs(diff) >= 0.05 else ""
+
+
+def main():
+    parser = argparse.ArgumentParser(description="RSS per model and allocations per audio second")
+    parser.add_argument("--model", action="append", default=[],
+                        help="Model to measure (repeatable; default: the benchmark_speed models)")
+    parser.add_argument("--capture-model", help="Model for the capture profile (default: settings.yaml)")
+    parser.add_argument("--compute-type", action="append", default=[],
+                        help="compute_type to measure (repeatable; default: int8)")
+    parser.add_argument("--duration", action="append", type=float, default=[],
+                        help="Recording length in seconds for the capture profile (default: 10, 60, 600)")
+    parser.add_argument("--backend", choices=["faster_whisper", "stub"], help="Override whisper.backend")
+    parser.add_argument("--stub-rtf", type=float, help="Simulated decode cost for the stub backend")
+    parser.add_argument("--reps", type=int, default=5, help="Transcriptions per model for steady-state RSS")
+    parser.add_argument("--clip-seconds", type=float, default=10.0, help="Clip length for the model part")
+    parser.add_argument("--frames", type=int, default=1, help="tracemalloc traceback depth")
+    parser.add_argument("--skip-models", action="store_true", help="Only run the capture profile")
+    parser.add_argument("--skip-capture", action="store_true", help="Only run the model part")
+    parser.add_argument("--json", help="Write results to this file")
+    parser.add_argument("--compare", help="Earlier --json output to show deltas against")
+    args = parser.parse_args()
+    models = args.model or MODELS
+    compute_types = args.compute_type or ["int8"]
+    durations = args.duration or DURATIONS
+    baseline = {}
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+
+    from src.perf_history import git_revision
+    commit, dirty = git_revision()
+    report = {
+        "git_commit": commit,
+        "git_dirty": dirty,
+        "host": {"platform": platform.platform(), "python": platform.python_version(),
+                 "cpus": os.cpu_count()},
+        "backend": args.backend,
+        "models": {},
+        "capture": {},
+    }
+
+    if not args.skip_models:
+        print("=" * 96)
+        print(f"MODEL MEMORY (backend: {args.backend or 'settings.yaml'}, {args.reps} × "
+              f"{args.clip_seconds:.0f}s transcriptions)")
+        print("=" * 96)
+        print(f"{'MODEL':<28} | {'BASE':>7} | {'LOADED':>7} | {'MODEL':>16} | {'STEADY':>7} | "
+              f"{'GROWTH':>7} | {'PEAK':>16}")
+        print("-" * 96)
+        for model in models:
+            for compute_type in compute_types:
+                key = f"{model}/{compute_type}"
+                raw = run_isolated(measure_model, {"model": model, "compute_type": compute_type}, args)
+                report["models"][key] = raw
+                if "error" in raw:
+                    print(f"{key:<28} | ✗ {raw['error']}")
+                    continue
+                old = baseline.get("models", {}).get(key)
+                print(f"{key:<28} | {raw['baseline_mb']:>5.0f}MB | {raw['loaded_mb']:>5.0f}MB | "
+                      f"{raw['model_mb']:>5.0f}MB{_delta(raw, old, 'model_mb', ''):>9} | "
+                      f"{raw['steady_mb']:>5.0f}MB | {raw['growth_mb']:>5.1f}MB | "
+                      f"{raw['peak_mb']:>5.0f}MB{_delta(raw, old, 'peak_mb', ''):>9}")
+        print("=" * 96)
+
+    if not args.skip_capture:
+        print()
+        print("=" * 96)
+        print(f"CAPTURE → PROCESS_AUDIO (tracemalloc, model: {args.capture_model or 'settings.yaml'})")
+        print("=" * 96)
+        print(f"{'AUDIO':>7} | {'KEPT':>8} | {'KEPT/S':>14} | {'PROCESS PEAK':>12} | {'PEAK/S':>14} | "
+              f"{'TIME':>7} | {'RSS Δ':>7}")
+        print("-" * 96)
+        for seconds in durations:
+            key = f"{seconds:g}s"
+            raw = run_isolated(measure_capture, seconds, args)
+            report["capture"][key] = raw
+            if "error" in raw:
+                print(f"{key:>7} | ✗ {raw['error']}")
+                continue
+            old = baseline.get("capture", {}).get(key)
+            print(f"{key:>7} | {raw['capture_retained_mb']:>6.1f}MB | "
+                  f"{raw['capture_bytes_per_s'] / 1e3:>5.1f}KB{_delta(raw, old, 'capture_bytes_per_s', 'B'):>7} | "
+                  f"{raw['process_extra_peak_mb']:>10.1f}MB | "
+                  f"{raw['process_bytes_per_s'] / 1e3:>5.1f}KB{_delta(raw, old, 'process_bytes_per_s', 'B'):>7} | "
+                  f"{raw['process_time_s']:>6.2f}s | {raw['rss_delta_mb']:>5.0f}MB")
+        print("=" * 96)
+        last = report["capture"].get(f"{durations[-1]:g}s", {})
+        if last.get("capture_sites"):
+            print(f"\nTop capture allocation sites ({durations[-1]:g}s):")
+            for site in last["capture_sites"]:
+                print(f"   {site['size_kb']:>10.0f} KB in {site['count']:>6} blocks  {site['site']}")
+
+    if args.json:
+        os.makedirs(os.path.dirname(os.path.abspath(args.json)), exist_ok=True)
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"\nResults written to {args.json}")
+    failed = [k for part in ("models", "capture") for k, v in report[part].items() if "error" in v]
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
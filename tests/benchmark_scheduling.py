@@ -0,0 +1,132 @@
+"""
+CPU scheduling benchmark: does inference load starve audio capture?
+
+Simulates the PortAudio callback with a thread that wakes every block
+(10 ms by default) and measures how late each wake-up is, while worker
+processes spin on every core as a stand-in for CTranslate2 decode. A wake-up
+later than the device buffer counts as an overflow (a dropped block).
+
+Runs twice: unguarded, then with the load processes handed to CpuGuard the
+way an isolated inference worker is (niceness, plus affinity off the
+reserved cores while "recording" on Linux).
+
+    python tests/benchmark_scheduling.py
+    python tests/benchmark_scheduling.py --seconds 10 --workers 8 --json logs/scheduling.json
+"""
+
+import argparse
+import json
+import multiprocessing
+import os
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.scheduling import CpuGuard, scheduling_settings
+
+
+def _spin(stop):
+    """Busy loop standing in for a decode thread."""
+    x = 0
+    while not stop.is_set():
+        for _ in range(10000):
+            x += 1
+
+
+def _callback_thread(block, seconds, lateness):
+    """Wake every `block` seconds, recording how late each wake-up was."""
+    next_at = time.perf_counter() + block
+    end = next_at + seconds
+    while next_at < end:
+        delay = next_at - time.perf_counter()
+        if delay > 0:
+            time.sleep(delay)
+        lateness.append(max(0.0, time.perf_counter() - next_at))
+        next_at += block
+
+
+def _percentile(values, q):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+def run(conf, workers, seconds, block, buffer):
+    ctx = multiprocessing.get_context("spawn")
+    stop = ctx.Event()
+    procs = [ctx.Process(target=_spin, args=(stop,), daemon=True) for _ in range(workers)]
+    for p in procs:
+        p.start()
+    time.sleep(0.5)  # Let the load ramp up
+
+    # Each load process stands in for an isolated inference worker
+    guards = []
+    if conf is not None:
+        for p in procs:
+            guard = CpuGuard(conf)
+            guard.set_worker(p.pid)
+            guards.append(guard)
+
+    lateness = []
+    callback = threading.Thread(target=_callback_thread, args=(block, seconds, lateness))
+    try:
+        for guard in guards:
+            guard.recording_started()
+        callback.start()
+        callback.join()
+    finally:
+        for guard in guards:
+            guard.release()
+        stop.set()
+        for p in procs:
+            p.join(5)
+
+    return {
+        "callbacks": len(lateness),
+        "p50_ms": _percentile(lateness, 0.5) * 1000,
+        "p99_ms": _percentile(lateness, 0.99) * 1000,
+        "max_ms": max(lateness) * 1000,
+        "overflows": sum(1 for late in lateness if late > buffer),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Audio callback lateness under inference load")
+    parser.add_argument("--seconds", type=float, default=5.0, help="Duration of each run")
+    parser.add_argument("--workers", type=int, default=None, help="Spinning load processes (default: 2 x cores)")
+    parser.add_argument("--block-ms", type=float, default=10.0, help="Callback period")
+    parser.add_argument("--buffer-ms", type=float, default=20.0, help="Lateness that counts as an overflow")
+    parser.add_argument("--reserve-cores", type=int, default=1)
+    parser.add_argument("--nice", type=int, default=5)
+    parser.add_argument("--json", help="Write results to this file")
+    args = parser.parse_args()
+
+    cores = len(os.sched_getaffinity(0)) if hasattr(os, "sched_getaffinity") else (os.cpu_count() or 1)
+    workers = args.workers or 2 * cores
+    conf = scheduling_settings({"scheduling": {"reserve_cores": args.reserve_cores, "nice": args.nice}})
+
+    print("=" * 60)
+    print(f"AUDIO CALLBACK UNDER LOAD ({cores} cores, {workers} load processes, "
+          f"{args.block_ms:.0f} ms blocks)")
+    print("=" * 60)
+
+    results = {}
+    for label in ("unguarded", "guarded"):
+        if label == "guarded":
+            print(f"\nCPU guard: {CpuGuard(conf).describe()}")
+        r = run(conf if label == "guarded" else None, workers, args.seconds, args.block_ms / 1000, args.buffer_ms / 1000)
+        results[label] = r
+        print(f"{label:<10} p50 {r['p50_ms']:6.2f} ms  p99 {r['p99_ms']:6.2f} ms  "
+              f"max {r['max_ms']:7.2f} ms  overflows {r['overflows']}/{r['callbacks']}")
+
+    if args.json:
+        os.makedirs(os.path.dirname(os.path.abspath(args.json)), exist_ok=True)
+        with open(args.json, "w") as f:
+            json.dump({"cores": cores, "workers": workers, "block_ms": args.block_ms,
+                       "buffer_ms": args.buffer_ms, "results": results}, f, indent=2)
+        print(f"\nResults written to {args.json}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+"""
+Scoring benchmark: WER/CER alignment speed on corpus-sized and long-form input.
+
+Compares src.scoring against a plain Python Levenshtein DP (checking both
+agree) on:
+- a thousand short dictations with a few errors each,
+- one long-form transcript (default 5000 words) at ~5% WER,
+- the same long-form pair at character level.
+
+    python tests/benchmark_scoring.py
+    python tests/benchmark_scoring.py --words 20000 --skip-naive
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.scoring import align, char_error, edit_distance, normalize, word_error
+
+VOCAB = (
+    "the quick brown fox jumps over lazy dog voice activity detection is crucial for "
+    "ignoring background noise trading futures today speed accuracy reliability first "
+    "second point summary thinking about one more thing matters most check runpod ollama"
+).split()
+
+
+def naive_distance(ref, hyp):
+    prev = list(range(len(hyp) + 1))
+    for i in range(1, len(ref) + 1):
+        cur = [i] + [0] * len(hyp)
+        for j in range(1, len(hyp) + 1):
+            cur[j] = min(prev[j] + 1, cur[j - 1] + 1, prev[j - 1] + (ref[i - 1] != hyp[j - 1]))
+        prev = cur
+    return prev[-1]
+
+
+def corrupt(words, rng, rate):
+    """Apply roughly rate * len(words) random substitutions/deletions/insertions."""
+    out = list(words)
+    for _ in range(max(1, int(len(words) * rate))):
+        op = rng.random()
+        if op < 0.6 and out:
+            out[rng.randrange(len(out))] = rng.choice(VOCAB)
+        elif op < 0.8 and out:
+            out.pop(rng.randrange(len(out)))
+        else:
+            out.insert(rng.randrange(len(out) + 1), rng.choice(VOCAB))
+    return out
+
+
+def timed(fn):
+    start = time.perf_counter()
+    value = fn()
+    return value, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description="WER/CER scorer speed")
+    parser.add_argument("--files", type=int, default=1000, help="Short dictations in the corpus case")
+    parser.add_argument("--words", type=int, default=5000, help="Words in the long-form case")
+    parser.add_argument("--skip-naive", action="store_true", help="Don't run the pure Python DP")
+    args = parser.parse_args()
+    rng = random.Random(0)
+
+    print("=" * 72)
+    print(f"{'CASE':<34} | {'SCORER':>10} | {'NAIVE DP':>10} | {'RESULT'}")
+    print("=" * 72)
+
+    # Corpus of short dictations
+    pairs = []
+    for _ in range(args.files):
+        ref = [rng.choice(VOCAB) for _ in range(rng.randint(3, 60))]
+        pairs.append((" ".join(ref), " ".join(corrupt(ref, rng, 0.1))))
+    rates, scorer_time = timed(lambda: [word_error(r, h).rate for r, h in pairs])
+    naive = "-"
+    if not args.skip_naive:
+        distances, naive_time = timed(lambda: [naive_distance(r.split(), h.split()) for r, h in pairs])
+        assert distances == [edit_distance(r.split(), h.split()) for r, h in pairs]
+        naive = f"{naive_time * 1000:.0f}ms"
+    print(f"{f'{args.files} dictations (WER)':<34} | {scorer_time * 1000:>8.0f}ms | {naive:>10} | "
+          f"mean {sum(rates) / len(rates):.1%}")
+
+    # Long-form transcript
+    ref = [rng.choice(VOCAB) for _ in range(args.words)]
+    hyp = corrupt(ref, rng, 0.05)
+    (ops, exact), scorer_time = timed(lambda: align(ref, hyp))
+    errors = sum(op != "=" for op, _, _ in ops)
+    naive = "-"
+    if not args.skip_naive and args.words <= 5000:
+        distance, naive_time = timed(lambda: naive_distance(ref, hyp))
+        assert distance == errors
+        naive = f"{naive_time * 1000:.0f}ms"
+    print(f"{f'{args.words}-word transcript (WER)':<34} | {scorer_time * 1000:>8.0f}ms | {naive:>10} | "
+          f"{errors / len(ref):.1%}{'' if exact else ' (bound)'}")
+
+    ref_text, hyp_text = " ".join(ref), " ".join(hyp)
+    cer, scorer_time = timed(lambda: char_error(ref_text, hyp_text))
+    print(f"{f'{len(normalize(ref_text))}-char transcript (CER)':<34} | {scorer_time * 1000:>8.0f}ms | "
+          f"{'-':>10} | {cer.rate:.1%}{'' if cer.exact else ' (bound)'}")
+    print("=" * 72)
+
+
+if __name__ == "__main__":
+    main()
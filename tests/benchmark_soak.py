@@ -0,0 +1,235 @@
+"""
+Soak test: thousands of dictations in one process, failing on upward trends.
+
+Drives a headless ErikSTT (tests/headless.py: fake audio stream, fake
+injector) through record/stop cycles the way the menubar app does: idle
+audio into the pre-roll, start_recording, a synthetic utterance, then
+stop_recording with on_complete, feeding the tail while the pipeline works.
+Every --sample-every cycles it records RSS, open file descriptors, threads,
+temp files left behind and the window's stop → done latency.
+
+After discarding the warmup, the run fails (exit 1) if:
+- RSS grows by more than --max-rss-growth MB over the run (least-squares fit),
+- file descriptors, threads or leftover temp files grow at all,
+- median latency in the last quarter is more than --max-latency-growth %
+  above the first quarter,
+- any dictation is dropped, fails or isn't injected.
+
+    python tests/benchmark_soak.py --backend stub --cycles 2000
+    python tests/benchmark_soak.py --backend stub --cycles 5000 --sync --json logs/soak.json
+"""
+
+import argparse
+import gc
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import threading
+import time
+
+import numpy as np
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, ROOT)
+
+from benchmark_matrix import percentile
+from headless import BLOCK_FRAMES, feed, headless_app, silenced
+from synthetic_corpus import SAMPLE_RATE, SCENARIOS, synthesize
+
+WARMUP_FRACTION = 0.1
+
+
+def open_fds():
+    for fd_dir in ("/proc/self/fd", "/dev/fd"):
+        try:
+            return len(os.listdir(fd_dir))
+        except OSError:
+            continue
+    return None
+
+
+def os_threads():
+    """OS-level threads (includes native threads Python doesn't know about)."""
+    try:
+        return len(os.listdir("/proc/self/task"))
+    except OSError:
+        return threading.active_count()
+
+
+def slope(xs, ys):
+    """Least-squares slope of ys against xs."""
+    mean_x, mean_y = statistics.fmean(xs), statistics.fmean(ys)
+    var = sum((x - mean_x) ** 2 for x in xs)
+    if not var:
+        return 0.0
+    return sum((x - mean_x) * (y - mean_y) for x, y in zip(xs, ys)) / var
+
+
+class Soak:
+    def __init__(self, app, utterances, args, temp_dir):
+        self.app = app
+        self.utterances = utterances
+        self.args = args
+        self.temp_dir = temp_dir
+        self.silence = np.zeros(BLOCK_FRAMES, dtype=np.float32)
+        self.window = []
+        self.samples = []
+
+    def cycle(self, i):
+        """One dictation; returns stop → done seconds."""
+        app = self.app
+        audio = self.utterances[i % len(self.utterances)]
+        for _ in range(self.args.idle_blocks):
+            feed(app, self.silence)
+        app.start_recording()
+        feed(app, audio)
+        if self.args.sync:
+            app.is_recording = False
+            t0 = time.perf_counter()
+            app.process_audio()
+            return time.perf_counter() - t0
+
+        done = threading.Event()
+        t0 = time.perf_counter()
+        app.stop_recording(on_complete=done.set)
+        # Keep the stream going: the tail, then pre-roll, as PortAudio would
+        while not done.wait(BLOCK_FRAMES / SAMPLE_RATE if self.args.realtime else 0.001):
+            feed(app, self.silence)
+            if time.perf_counter() - t0 > self.args.timeout:
+                raise TimeoutError(f"dictation {i} didn't finish within {self.args.timeout}s")
+        return time.perf_counter() - t0
+
+    def sample(self, cycle):
+        gc.collect()
+        from src.metrics import resident_memory_bytes
+        point = {
+            "cycle": cycle,
+            "time_s": time.perf_counter() - self.started,
+            "rss_mb": (resident_memory_bytes() or 0) / 1e6,
+            "fds": open_fds(),
+            "threads": os_threads(),
+            "temp_files": len(os.listdir(self.temp_dir)),
+            "latency_p50_ms": percentile(self.window, 50) * 1000,
+            "latency_p95_ms": percentile(self.window, 95) * 1000,
+        }
+        self.samples.append(point)
+        self.window = []
+        return point
+
+    def run(self):
+        self.started = time.perf_counter()
+        for i in range(self.args.cycles):
+            with silenced(not self.args.verbose):
+                self.window.append(self.cycle(i))
+            if (i + 1) % self.args.sample_every == 0 or i + 1 == self.args.cycles:
+                point = self.sample(i + 1)
+                print(f"{point['cycle']:>7} | {point['time_s']:>7.0f}s | {point['rss_mb']:>7.1f}MB | "
+                      f"{point['fds']!s:>5} | {point['threads']:>7} | {point['temp_files']:>5} | "
+                      f"{point['latency_p50_ms']:>7.1f}ms | {point['latency_p95_ms']:>7.1f}ms")
+        return self.samples
+
+
+def check_trends(samples, args):
+    """List of (metric, description, ok)."""
+    steady = samples[int(len(samples) * WARMUP_FRACTION):]
+    if len(steady) < 4:
+        return [("samples", f"only {len(steady)} samples after warmup; raise --cycles", False)]
+    cycles = [s["cycle"] for s in steady]
+    span = cycles[-1] - cycles[0]
+    checks = []
+
+    rss_growth = slope(cycles, [s["rss_mb"] for s in steady]) * span
+    checks.append(("rss", f"{rss_growth:+.1f} MB over {span} cycles (limit {args.max_rss_growth} MB)",
+                   rss_growth <= args.max_rss_growth))
+    for key in ("fds", "threads", "temp_files"):
+        if steady[0][key] is None:
+            continue
+        grew = max(s[key] for s in steady[len(steady) // 2:]) - steady[0][key]
+        checks.append((key, f"{steady[0][key]} → {steady[-1][key]} (max growth {grew:+d})", grew <= 0))
+
+    quarter = max(1, len(steady) // 4)
+    first = statistics.median(s["latency_p50_ms"] for s in steady[:quarter])
+    last = statistics.median(s["latency_p50_ms"] for s in steady[-quarter:])
+    growth = (last / first - 1) * 100 if first else 0.0
+    checks.append(("latency", f"p50 {first:.1f}ms → {last:.1f}ms ({growth:+.0f}%, limit "
+                   f"{args.max_latency_growth:.0f}%)", growth <= args.max_latency_growth))
+    return checks
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Leak and drift soak test for ErikSTT")
+    parser.add_argument("--cycles", type=int, default=2000, help="Dictations to run")
+    parser.add_argument("--sample-every", type=int, default=50, help="Cycles between resource samples")
+    parser.add_argument("--backend", choices=["faster_whisper", "stub"], help="Override whisper.backend")
+    parser.add_argument("--model", help="Override whisper.model")
+    parser.add_argument("--stub-rtf", type=float, help="Simulated decode cost for the stub backend")
+    parser.add_argument("--sync", action="store_true",
+                        help="Use process_audio on the calling thread instead of the pipeline")
+    parser.add_argument("--tail", type=float, default=0.05,
+                        help="Tail capture seconds after stop (the app uses 0.5)")
+    parser.add_argument("--idle-blocks", type=int, default=5, help="Pre-roll blocks before each recording")
+    parser.add_argument("--realtime", action="store_true", help="Feed tail audio at real-time pace")
+    parser.add_argument("--timeout", type=float, default=60.0, help="Seconds before a dictation counts as hung")
+    parser.add_argument("--max-rss-growth", type=float, default=20.0, help="Allowed RSS growth (MB)")
+    parser.add_argument("--max-latency-growth", type=float, default=25.0,
+                        help="Allowed median latency growth (%%)")
+    parser.add_argument("--verbose", action="store_true", help="Show the app's per-dictation output")
+    parser.add_argument("--json", help="Write the time series and verdict to this file")
+    args = parser.parse_args()
+    os.chdir(ROOT)
+
+    # Temp WAVs go to a private directory so leftovers can be counted
+    temp_dir = tempfile.mkdtemp(prefix="erik-stt-soak-")
+    tempfile.tempdir = temp_dir
+    utterances = [synthesize(text, seed=i)[0] for i, (_, text) in enumerate(SCENARIOS)]
+    app = headless_app(backend=args.backend, model=args.model, stub_rtf=args.stub_rtf)
+    app.tail_seconds = args.tail
+
+    print("=" * 84)
+    print(f"SOAK: {args.cycles} dictations ({'process_audio' if args.sync else 'pipeline'}, "
+          f"backend: {args.backend or 'settings.yaml'})")
+    print("=" * 84)
+    print(f"{'CYCLE':>7} | {'TIME':>8} | {'RSS':>9} | {'FDS':>5} | {'THREADS':>7} | {'TEMP':>5} | "
+          f"{'P50':>9} | {'P95':>9}")
+    print("-" * 84)
+    soak = Soak(app, utterances, args, temp_dir)
+    error = None
+    try:
+        samples = soak.run()
+    except (Exception, KeyboardInterrupt) as e:
+        error = f"{type(e).__name__}: {e}"
+        samples = soak.samples
+    print("=" * 84)
+
+    pipeline = app.pipeline
+    checks = check_trends(samples, args) if error is None else [("run", error, False)]
+    completed = app.injector.count
+    expected = len(samples) and samples[-1]["cycle"]
+    checks.append(("dictations", f"{completed}/{expected} injected, {pipeline.dropped} dropped, "
+                   f"{pipeline.failed} failed", completed == expected and not pipeline.dropped
+                   and not pipeline.failed))
+    for name, description, ok in checks:
+        print(f"{'✓' if ok else '✗'} {name:<11} {description}")
+    passed = all(ok for _, _, ok in checks)
+    print("\n" + ("✓ No upward trends" if passed else "✗ Soak test failed"))
+
+    if args.json:
+        os.makedirs(os.path.dirname(os.path.abspath(args.json)), exist_ok=True)
+        with open(args.json, "w") as f:
+            json.dump({
+                "host": {"platform": platform.platform(), "python": platform.python_version(),
+                         "cpus": os.cpu_count()},
+                "args": vars(args),
+                "passed": passed,
+                "checks": [{"name": n, "description": d, "ok": ok} for n, d, ok in checks],
+                "samples": samples,
+            }, f, indent=2)
+        print(f"Results written to {args.json}")
+    return 0 if passed else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
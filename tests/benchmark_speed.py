@@ -1,6 +1,7 @@
 import sys
 import os
 import time
+import shutil
 import subprocess
 import yaml
 
@@ -25,6 +26,11 @@ CONFIGS_TO_TEST = [
 
 def generate_audio():
     print(f"Generating test audio: '{TEST_PHRASE}'")
+    if shutil.which("say") is None:
+        # No macOS TTS: use the procedurally generated voice instead
+        from synthetic_corpus import synthesize, write_wav
+        write_wav(AUDIO_FILE, synthesize(TEST_PHRASE)[0])
+        return
     subprocess.run(["say", "-o", AUDIO_FILE, "--data-format=LEI16@16000", TEST_PHRASE], check=True)
 
 def run_benchmark():
@@ -43,7 +49,9 @@ def run_benchmark():
             "whisper": {
                 "model": conf["model"],
                 "device": "cpu",
-                "compute_type": "int8"
+                "compute_type": "int8",
+                # Resolve models through the hub: these needn't be in the registry
+                "offline": False,
             }
         }
 
@@ -0,0 +1,175 @@
+"""
+Startup benchmark and budget check.
+
+Measures import time of the app's modules with `python -X importtime` (in a
+fresh interpreter each run) and, with --listener, the wall time from launching
+`python -m src.main` until the hotkey listener is ready.
+
+Exits non-zero if a module goes over its import-time budget or pulls in one
+of the heavy modules that should only be imported on first use.
+
+    python tests/benchmark_startup.py                 # budget check
+    python tests/benchmark_startup.py --listener      # + time-to-listener-ready
+    python tests/benchmark_startup.py --json logs/startup.json
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+
+RUNS = 5
+
+# Import-time budgets (seconds, median of RUNS cold interpreters)
+BUDGETS = {
+    "src.main": 0.25,
+    "src.engine": 0.1,
+    "src.injection": 0.1,
+    "src.post_process": 0.1,
+    "src.metrics": 0.05,
+}
+
+# Heavy modules that must be deferred to first use
+FORBIDDEN = [
+    "faster_whisper", "ctranslate2", "numpy", "scipy", "sounddevice",
+    "pynput", "Quartz", "AppKit", "torch",
+]
+
+LISTENER_BUDGET = 10.0
+LISTENER_READY = "Hotkey listener ready"
+
+def import_profile(module):
+    """Import module in a fresh interpreter; return (seconds, imported module names, self-time list)."""
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=ROOT, capture_output=True, text=True
+    )
+    if proc.returncode != 0:
+        raise RuntimeError(proc.stderr.strip().splitlines()[-1])
+
+    rows = []
+    for line in proc.stderr.splitlines():
+        # "import time:  self [us] | cumulative | imported package"
+        if not line.startswith("import time:") or "imported package" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        rows.append((int(self_us) / 1e6, int(cumulative_us) / 1e6, name.rstrip()))
+
+    # Children are listed before their parent; keep only the module's subtree
+    # (everything since the previous top-level import, e.g. site at startup)
+    end = max(i for i, row in enumerate(rows) if row[2].strip() == module)
+    start = end
+    while start > 0 and rows[start - 1][2].startswith("  "):
+        start -= 1
+    subtree = rows[start:end + 1]
+    modules = {name.strip().split(".")[0] for _, _, name in subtree}
+    self_times = [(secs, name.strip()) for secs, _, name in subtree]
+    total = rows[end][1]
+    return total, modules, self_times
+
+def bench_imports(runs, scale):
+    """Time each budgeted module; return (results, violations)."""
+    results, violations = {}, []
+    for module, budget in BUDGETS.items():
+        budget *= scale
+        try:
+            import_profile(module)  # Warm-up (writes .pyc files)
+            samples = [import_profile(module) for _ in range(runs)]
+        except RuntimeError as e:
+            # A missing heavy dependency at import means it isn't deferred
+            heavy = [m for m in FORBIDDEN if f"'{m}'" in str(e)]
+            if heavy:
+                violations.append(f"{module} eagerly imports {', '.join(heavy)}")
+            print(f"{module:<20} | {'HEAVY' if heavy else 'skipped'}: {e}")
+            results[module] = {"error": str(e), "heavy": heavy}
+            continue
+
+        median = statistics.median(s[0] for s in samples)
+        heavy = sorted(m for m in samples[-1][1] if m in FORBIDDEN)
+        top = sorted(samples[-1][2], reverse=True)[:3]
+        status = "OK"
+        if median > budget:
+            status = "OVER"
+            violations.append(f"{module} imports in {median*1000:.0f}ms (budget {budget*1000:.0f}ms)")
+        if heavy:
+            status = "HEAVY"
+            violations.append(f"{module} eagerly imports {', '.join(heavy)}")
+        print(f"{module:<20} | {median*1000:<7.1f}ms | {budget*1000:<7.0f}ms | {status:<6} | "
+              f"{', '.join(name for _, name in top)}")
+        results[module] = {
+            "median": median,
+            "budget": budget,
+            "heavy": heavy,
+            "top_self": [{"module": name, "seconds": secs} for secs, name in top],
+        }
+    return results, violations
+
+def bench_listener(timeout=120):
+    """Launch the CLI app and time until the hotkey listener is ready."""
+    t0 = time.perf_counter()
+    proc = subprocess.Popen(
+        [sys.executable, "-u", "-m", "src.main"],
+        cwd=ROOT, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True
+    )
+    ready = None
+    try:
+        for line in proc.stdout:
+            if LISTENER_READY in line:
+                ready = time.perf_counter() - t0
+                break
+            if time.perf_counter() - t0 > timeout:
+                break
+    finally:
+        proc.terminate()
+        try:
+            proc.wait(timeout=5)
+        except subprocess.TimeoutExpired:
+            proc.kill()
+    return ready
+
+def run_benchmark():
+    parser = argparse.ArgumentParser(description="Startup time benchmark and budget check")
+    parser.add_argument("--runs", type=int, default=RUNS, help="Cold imports per module")
+    parser.add_argument("--listener", action="store_true", help="Also time `python -m src.main` to listener ready")
+    parser.add_argument("--budget-scale", type=float, default=1.0, help="Multiply budgets (slow machines/CI)")
+    parser.add_argument("--json", help="Write results to this file")
+    args = parser.parse_args()
+
+    print("\n" + "="*80)
+    print(f"{'MODULE':<20} | {'IMPORT':<9} | {'BUDGET':<9} | {'STATUS':<6} | {'TOP SELF TIME'}")
+    print("="*80)
+    results, violations = bench_imports(args.runs, args.budget_scale)
+
+    report = {"python": sys.version.split()[0], "imports": results}
+    if args.listener:
+        print("-"*80)
+        ready = bench_listener()
+        budget = LISTENER_BUDGET * args.budget_scale
+        if ready is None:
+            print(f"{'Listener ready':<20} | did not start (see `python -m src.main`)")
+            violations.append("hotkey listener did not start")
+        else:
+            print(f"{'Listener ready':<20} | {ready:<8.2f}s | {budget:<8.1f}s | {'OK' if ready <= budget else 'OVER'}")
+            if ready > budget:
+                violations.append(f"listener ready after {ready:.2f}s (budget {budget:.1f}s)")
+        report["listener_ready"] = ready
+    print("="*80)
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(dict(report, violations=violations), f, indent=2)
+
+    if violations:
+        print("\n✗ Startup budget exceeded:")
+        for violation in violations:
+            print(f"   • {violation}")
+        sys.exit(1)
+    print("\n✓ Startup within budget")
+
+if __name__ == "__main__":
+    run_benchmark()
@@ -0,0 +1,129 @@
+"""
+Run ErikSTT without a microphone, keyboard or target app.
+
+ErikSTT accepts settings, an injector and an audio stream in place of
+config/settings.yaml, the real Injector and sounddevice. These are the
+stand-ins the memory and soak benchmarks use: a stream that does nothing
+(audio is pushed through audio_callback by feed()), and an injector that
+records what would have been typed.
+
+    from headless import headless_app, feed
+    app = headless_app(backend="stub")
+    app.start_recording()
+    feed(app, samples)
+    app.is_recording = False
+    app.process_audio()
+"""
+
+import os
+import sys
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, ROOT)
+
+BLOCK_FRAMES = 1600     # 100 ms at 16 kHz
+
+
+class FakeStream:
+    """Stands in for sounddevice.InputStream; the caller drives audio_callback."""
+
+    def __init__(self):
+        self.active = False
+
+    def start(self):
+        self.active = True
+
+    def stop(self):
+        self.active = False
+
+    def close(self):
+        self.active = False
+
+
+class _FakeBackend:
+    def __init__(self, app_name):
+        self.app_name = app_name
+
+    def frontmost_app(self):
+        return self.app_name
+
+
+class FakeInjector:
+    """Stands in for src.injection.Injector; keeps injected text instead of typing it."""
+
+    def __init__(self, app_name="Benchmark", keep=100):
+        self.backend = _FakeBackend(app_name)
+        self.last_timings = {}
+        self.injected = []
+        self.count = 0
+        self.keep = keep
+
+    def inject(self, text, restore_app=None, trace=None):
+        self.count += 1
+        self.injected.append(text)
+        del self.injected[:-self.keep]
+        return True
+
+
+def headless_settings(backend=None, model=None, compute_type=None, stub_rtf=None):
+    """
+    config/settings.yaml with the side effects a harness doesn't want turned
+    off: trace and metrics files, the idle trimmer and profiling.
+    """
+    from src.engine import load_settings
+
+    settings = load_settings(os.path.join(ROOT, "config", "settings.yaml"))
+    whisper = settings.setdefault("whisper", {})
+    if backend:
+        whisper["backend"] = backend
+    if model:
+        whisper["model"] = model
+    if compute_type:
+        whisper["compute_type"] = compute_type
+    if stub_rtf is not None:
+        whisper.setdefault("stub", {})["rtf"] = stub_rtf
+    settings.setdefault("tracing", {})["enabled"] = False
+    settings.setdefault("metrics", {})["enabled"] = False
+    settings.setdefault("idle", {})["unload_after"] = None
+    settings.setdefault("profiling", {})["enabled"] = False
+    return settings
+
+
+def headless_app(settings=None, injector=None, quiet=True, **overrides):
+    """An ErikSTT on a FakeStream and FakeInjector (prints suppressed when quiet)."""
+    from src.main import ErikSTT
+
+    settings = settings or headless_settings(**overrides)
+    with silenced(quiet):
+        return ErikSTT(settings=settings, injector=injector or FakeInjector(), stream=FakeStream())
+
+
+def feed(app, samples, block=BLOCK_FRAMES):
+    """Push samples through app.audio_callback in (block, 1) float32 blocks, as PortAudio does."""
+    import numpy as np
+
+    samples = np.asarray(samples, dtype=np.float32).reshape(-1, 1)
+    for start in range(0, len(samples), block):
+        indata = samples[start:start + block]
+        app.audio_callback(indata, len(indata), None, None)
+
+
+class silenced:
+    """Redirect stdout to /dev/null (ErikSTT narrates every step)."""
+
+    def __init__(self, enabled=True):
+        self.enabled = enabled
+
+    def __enter__(self):
+        if self.enabled:
+            self._stdout = sys.stdout
+            self._devnull = open(os.devnull, "w")
+            sys.stdout = self._devnull
+        return self
+
+    def __exit__(self, *exc):
+        if self.enabled:
+            sys.stdout = self._stdout
+            self._devnull.close()
+        return False
+
@@ -0,0 +1,146 @@
+"""
+Procedurally generated test corpus (no TTS, no microphone).
+
+Each word becomes a run of voiced "syllables" (a harmonic tone with a
+Hann envelope), with short gaps between words, longer ones at sentence ends
+and real silences for the `[Ns pause]` markers used by test_record_corpus.py.
+It isn't intelligible speech, so a real model won't transcribe it
+correctly; it has speech-like timing, level and pauses, which is what
+latency, VAD and pipeline benchmarks need, and the stub backend
+(`whisper.backend: stub`) returns the ground truth for it.
+
+Generation is deterministic (seeded from the clip id) and writes 16-bit
+16 kHz WAVs with a .txt ground truth next to each, the same layout as
+test_data/corpus/.
+
+    python tests/synthetic_corpus.py test_data/synthetic --repeat 3
+"""
+
+import argparse
+import re
+import wave
+import zlib
+from pathlib import Path
+
+import numpy as np
+
+SAMPLE_RATE = 16000
+
+# Mirrors the scenarios in test_record_corpus.py
+SCENARIOS = [
+    ("01_quick_phrase", "Test number one."),
+    ("02_medium_sentence", "I'm trading MNQ futures on TradeZella today."),
+    ("03_long_dictation",
+     "So the plan for this week is to finish the dictation pipeline, measure latency on "
+     "every model we ship, and write down what we learn. After that we can look at the "
+     "menu bar app again and decide which settings should be exposed to users. "
+     "Nothing here is urgent, but it all needs to be done before the next release."),
+    ("04_jargon_heavy", "Check Runpod, Ollama, and Victron in Cochise County."),
+    ("05_trailing_important",
+     "The three requirements are speed, accuracy, and the most important one is reliability."),
+    ("06_mid_pause", "I was thinking... [1s pause] about the MNQ trade."),
+    ("07_long_pause", "First point is speed. [3s pause] Second point is accuracy."),
+    ("08_fast_stop", "Quick test stop."),
+    ("09_breath_then_final",
+     "Those are the main points. [1s pause] Oh and one more thing, reliability matters most."),
+    ("10_two_sentences_end", "That's the summary. Got it? Good."),
+]
+
+PAUSE = re.compile(r"\[(\d+(?:\.\d+)?)s pause\]")
+WORD_GAP = 0.06
+SENTENCE_GAP = 0.3
+EDGE_SILENCE = 0.3
+NOISE_RMS = 0.001       # Below the stub backend's silence gate
+
+
+def _syllables(word):
+    return max(1, len(re.findall(r"[aeiouy]+", word.lower())))
+
+
+def _voiced(seconds, f0, rng):
+    """One syllable: a few harmonics of f0 under a Hann envelope."""
+    n = int(seconds * SAMPLE_RATE)
+    t = np.arange(n) / SAMPLE_RATE
+    harmonics = np.arange(1, 6)[:, None]
+    amplitudes = (0.5 ** np.arange(5))[:, None] * rng.uniform(0.6, 1.0, (5, 1))
+    tone = (amplitudes * np.sin(2 * np.pi * f0 * harmonics * t)).sum(axis=0)
+    return (0.25 * tone / amplitudes.sum() * np.hanning(n)).astype(np.float32)
+
+
+def synthesize(text, seed=0):
+    """(float32 samples at 16 kHz, ground truth text) for a scenario text."""
+    rng = np.random.default_rng(seed)
+    f0 = rng.uniform(95, 210)
+    pieces = [np.zeros(int(EDGE_SILENCE * SAMPLE_RATE), np.float32)]
+    # split() with a group alternates text and pause lengths
+    for i, token in enumerate(PAUSE.split(text)):
+        if i % 2:
+            pieces.append(np.zeros(int(float(token) * SAMPLE_RATE), np.float32))
+            continue
+        for word in token.split():
+            for _ in range(_syllables(word)):
+                pieces.append(_voiced(rng.uniform(0.12, 0.2), f0 * rng.uniform(0.9, 1.1), rng))
+            gap = SENTENCE_GAP if word[-1] in ".?!" else WORD_GAP
+            pieces.append(np.zeros(int(gap * SAMPLE_RATE), np.float32))
+    pieces.append(np.zeros(int(EDGE_SILENCE * SAMPLE_RATE), np.float32))
+    samples = np.concatenate(pieces)
+    samples += rng.normal(0, NOISE_RMS, len(samples)).astype(np.float32)
+    truth = " ".join(PAUSE.sub(" ", text).split())
+    return samples, truth
+
+
+def write_wav(path, samples, sample_rate=SAMPLE_RATE):
+    pcm = (np.clip(samples, -1.0, 1.0) * 32767).astype("<i2")
+    with wave.open(str(path), "wb") as f:
+        f.setnchannels(1)
+        f.setsampwidth(2)
+        f.setframerate(sample_rate)
+        f.writeframes(pcm.tobytes())
+
+
+def read_wav(path):
+    """(float32 mono samples, sample rate) from a 16-bit PCM WAV."""
+    with wave.open(str(path), "rb") as f:
+        rate, channels, width = f.getframerate(), f.getnchannels(), f.getsampwidth()
+        raw = f.readframes(f.getnframes())
+    if width != 2:
+        raise ValueError(f"{path}: expected 16-bit PCM")
+    samples = np.frombuffer(raw, dtype="<i2").astype(np.float32) / 32768.0
+    if channels > 1:
+        samples = samples.reshape(-1, channels).mean(axis=1)
+    return samples, rate
+
+
+def build_corpus(out_dir, scenarios=SCENARIOS, repeat=1):
+    """Write every scenario (repeat times, each with a different voice). Returns the WAV paths."""
+    out_dir = Path(out_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    paths = []
+    for rep in range(repeat):
+        for clip_id, text in scenarios:
+            name = clip_id if repeat == 1 else f"{clip_id}_v{rep}"
+            samples, truth = synthesize(text, seed=zlib.crc32(name.encode()))
+            wav_path = out_dir / f"{name}.wav"
+            write_wav(wav_path, samples)
+            wav_path.with_suffix(".txt").write_text(truth)
+            paths.append(wav_path)
+    return paths
+
+
+def load_corpus(corpus_dir):
+    """WAVs in corpus_dir that have a ground truth .txt next to them."""
+    return [p for p in sorted(Path(corpus_dir).glob("*.wav")) if p.with_suffix(".txt").exists()]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate the synthetic test corpus")
+    parser.add_argument("out_dir", nargs="?", default="test_data/synthetic")
+    parser.add_argument("--repeat", type=int, default=1, help="Voices per scenario")
+    args = parser.parse_args()
+    paths = build_corpus(args.out_dir, repeat=args.repeat)
+    seconds = sum(Path(p).stat().st_size - 44 for p in paths) / 2 / SAMPLE_RATE
+    print(f"✓ {len(paths)} clips ({seconds:.0f}s of audio) in {args.out_dir}")
+
+
+if __name__ == "__main__":
+    main()
@@ -10,7 +10,7 @@ import contextlib
 sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
 
 try:
-    from src.engine import WhisperEngine
+    from src.engine import WhisperEngine, load_settings
 except ImportError:
     print("Error: Could not import src.engine. Make sure you are running this from the project root or tests directory.")
     sys.exit(1)
@@ -66,7 +66,10 @@ def run_suite():
 
     print("Initializing Engine (this might take a few seconds)...")
     try:
-        engine = WhisperEngine()
+        settings = load_settings(os.path.join(os.path.dirname(__file__), '..', 'config', 'settings.yaml'))
+        # Resolve the model through the hub, so this works without pre_download_model.py
+        settings.setdefault("whisper", {})["offline"] = False
+        engine = WhisperEngine(config=settings)
     except Exception as e:
         print(f"CRITICAL: Engine failed to initialize. {e}")
         return